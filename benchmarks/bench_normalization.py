@@ -0,0 +1,64 @@
+"""Micro-benchmark for the content normalization pipeline.
+
+Reports normalization cost per KB of page text for the default pipeline,
+a pipeline with typical per-URL rules, and the old inline re.sub.
+
+    python benchmarks/bench_normalization.py [--kb 64] [--iterations 200]
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+# zealy_bot reads these at import time
+os.environ.setdefault("TELEGRAM_BOT_TOKEN", "benchmark")
+os.environ.setdefault("CHAT_ID", "0")
+os.environ.setdefault("IS_RENDER", "true")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import zealy_bot
+
+LEGACY_PATTERN = r'\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}Z|\d+ XP|\b[A-F0-9]{8}-(?:[A-F0-9]{4}-){3}[A-F0-9]{12}\b'
+
+QUEST_BLOCK = """Follow us on X
+150 XP
+Ends in 3h 12m 05s
+Claimed by 1,284 users
+Updated 2024-05-01T12:30:00Z
+ID 1B4E28BA-2FA1-11D2-883F-0016D3CCA427
+
+"""
+
+SAMPLE_RULES = [
+    {"type": "drop_lines", "pattern": r"^Ends in "},
+    {"type": "scrub", "pattern": r"Claimed by [\d,]+ users"},
+    {"type": "collapse_whitespace"},
+]
+
+def make_text(size_kb: int) -> str:
+    repeats = max(1, size_kb * 1024 // len(QUEST_BLOCK))
+    return QUEST_BLOCK * repeats
+
+def bench_legacy(text: str, iterations: int) -> float:
+    size_kb = len(text.encode()) / 1024
+    start = time.perf_counter()
+    for _ in range(iterations):
+        re.sub(LEGACY_PATTERN, '', text).strip()
+    return (time.perf_counter() - start) / iterations / size_kb * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--kb", type=int, default=64, help="Size of the synthetic page text in KB")
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    text = make_text(args.kb)
+    print(f"\n📏 Normalization benchmark - {len(text.encode()) / 1024:.1f}KB, {args.iterations} iterations")
+    print(f"   legacy inline re.sub:   {bench_legacy(text, args.iterations):8.1f} µs/KB")
+    for label, rules in (("default pipeline", None), ("with per-URL rules", SAMPLE_RULES)):
+        result = zealy_bot.benchmark_normalization(text, rules, args.iterations)
+        print(f"   {label + ':':<23} {result['us_per_kb']:8.1f} µs/KB ({result['stages']} stages, {result['us_per_call'] / 1000:.2f}ms/call)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Local fake Telegram Bot API for exercising the outbound notification queue.
+
+Serves getMe and sendMessage on localhost, answering every Nth sendMessage
+with a 429 and retry_after, then pushes one simulated check cycle through
+zealy_bot.notification_queue: a burst of change alerts (one digest), a long
+status message (split, not truncated) and a priority alert queued last.
+Reports what the fake server received, in order.
+
+    python benchmarks/fake_bot_api.py [--changes 25] [--throttle-every 3]
+
+The bot itself can be pointed at this server with
+TELEGRAM_API_BASE_URL=http://127.0.0.1:<port>/bot
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+# zealy_bot reads these at import time
+os.environ.setdefault("TELEGRAM_BOT_TOKEN", "123456:benchmark")
+os.environ.setdefault("CHAT_ID", "42")
+os.environ.setdefault("IS_RENDER", "true")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aiohttp import web
+from telegram import Bot
+
+import zealy_bot
+
+
+class FakeBotApi:
+    def __init__(self, throttle_every: int, retry_after: int):
+        self.throttle_every = throttle_every
+        self.retry_after = retry_after
+        self.calls = 0
+        self.throttled = 0
+        self.received = []
+
+    async def handle(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        if method == "getMe":
+            return web.json_response({"ok": True, "result": {
+                "id": 123456, "is_bot": True, "first_name": "Fake", "username": "fake_bot"
+            }})
+        if method != "sendMessage":
+            return web.json_response({"ok": True, "result": True})
+
+        data = dict(await request.post()) or await request.json()
+        self.calls += 1
+        if self.throttle_every and self.calls % self.throttle_every == 0:
+            self.throttled += 1
+            return web.json_response({
+                "ok": False, "error_code": 429,
+                "description": f"Too Many Requests: retry after {self.retry_after}",
+                "parameters": {"retry_after": self.retry_after},
+            }, status=429)
+
+        self.received.append((time.perf_counter(), data.get("chat_id"), data.get("text", "")))
+        return web.json_response({"ok": True, "result": {
+            "message_id": len(self.received), "date": int(time.time()),
+            "chat": {"id": int(data.get("chat_id", 0)), "type": "private"},
+            "text": data.get("text", ""),
+        }})
+
+
+async def run(changes: int, throttle_every: int, retry_after: int):
+    api = FakeBotApi(throttle_every, retry_after)
+    app = web.Application()
+    app.router.add_post("/bot{token}/{method}", api.handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+
+    queue = zealy_bot.notification_queue
+    started = time.perf_counter()
+    async with Bot(zealy_bot.TELEGRAM_BOT_TOKEN, base_url=f"http://127.0.0.1:{port}/bot") as bot:
+        for i in range(changes):
+            await zealy_bot.send_notification(bot, f"🚨 CHANGE DETECTED!\nhttps://zealy.io/cw/c{i}/questboard", digest=True)
+        await zealy_bot.send_notification(bot, "\n".join(f"status line {i} " + "x" * 60 for i in range(150)))
+        await zealy_bot.send_notification(bot, "🚨 MEMORY ALERT!", priority=True)
+        queue.flush_digest()  # end of the simulated cycle
+        await queue.drain(timeout=120)
+        queue.stop()
+    await runner.cleanup()
+
+    print(f"sendMessage calls: {api.calls} ({api.throttled} answered with 429)")
+    print(f"messages delivered: {len(api.received)} | sent {queue.sent}, failed {queue.failed}, "
+          f"RetryAfter {queue.retry_after_count}")
+    for at, chat_id, text in api.received:
+        first_line = text.splitlines()[0] if text else ""
+        print(f"  +{at - started:6.2f}s chat {chat_id} {len(text):5d} chars  {first_line[:50]}")
+    latencies = sorted(queue.send_latencies)
+    if latencies:
+        print(f"enqueue->delivered p50 {latencies[len(latencies) // 2]:.2f}s, max {latencies[-1]:.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--changes", type=int, default=25)
+    parser.add_argument("--throttle-every", type=int, default=3, help="answer every Nth sendMessage with 429 (0 = never)")
+    parser.add_argument("--retry-after", type=int, default=1)
+    args = parser.parse_args()
+    asyncio.run(run(args.changes, args.throttle_every, args.retry_after))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,318 @@
+"""Offline throughput/latency benchmark of the real fetch and check paths.
+
+Starts a local Zealy-like fixture server and runs zealy_bot.run_check_unit
+against it for every fetch mode and concurrency level. Boards render like
+the React app: the quest container appears after a delay and keeps mutating
+for a while. Slowness and failures can be set per run. Reports checks per
+minute, p50/p99 check latency and peak process-tree memory.
+
+    python benchmarks/fetch_bench.py [--modes http,single,multitab,process,cdp] [--concurrency 1,2,4]
+                                     [--urls 8] [--checks 24] [--render-delay-ms 1500]
+                                     [--latency-ms 0] [--fail-rate 0] [--fixtures DIR]
+
+Modes: http = plain HTTP fast path (__NEXT_DATA__); single = one Chrome
+page per check; multitab = MAX_TABS_PER_BROWSER tabs per browser;
+process = single, in isolated fetch worker processes; cdp = pages of one
+Chrome driven over the DevTools WebSocket from the event loop, no threads.
+
+The fixture server alone, e.g. to point a real bot at:
+
+    python benchmarks/fetch_bench.py serve [--port 8700]
+
+--fixtures serves recorded pages (*.html, e.g. saved questboards) round-robin
+instead of the generated ones.
+"""
+import argparse
+import asyncio
+import glob
+import html
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+# zealy_bot reads these at import time
+os.environ.setdefault("TELEGRAM_BOT_TOKEN", "benchmark")
+os.environ.setdefault("CHAT_ID", "0")
+os.environ.setdefault("IS_RENDER", "true")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aiohttp import web
+
+import zealy_bot
+
+MODES = {
+    # mode: (HTTP_FIRST_ENABLED, FETCH_MODE, FETCH_BACKEND)
+    "http": (True, "single", "thread"),
+    "single": (False, "single", "thread"),
+    "multitab": (False, "multitab", "thread"),
+    "process": (False, "single", "process"),
+    "cdp": (False, "single", "cdp"),
+}
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html><head><title>{community} | Questboard</title>
+<script id="__NEXT_DATA__" type="application/json">{next_data}</script>
+</head><body><div id="__next"><div class="spinner">Loading...</div></div>
+<script>
+const quests = {quests};
+setTimeout(() => {{
+  const root = document.getElementById("__next");
+  root.innerHTML = "";
+  const board = document.createElement("div");
+  board.className = "flex flex-col w-full pt-100";
+  const stamp = document.createElement("div");
+  board.appendChild(stamp);
+  quests.forEach((quest, i) => {{
+    const card = document.createElement("a");
+    card.href = "/cw/{community}/quests/" + i;
+    card.innerText = quest.name + "\\n" + quest.xp + " XP\\n" + quest.status;
+    board.appendChild(card);
+  }});
+  root.appendChild(board);
+  // Hydration noise: keep touching the DOM for a while, like the real app
+  const settleUntil = Date.now() + {settle_ms};
+  const tick = setInterval(() => {{
+    stamp.innerText = "Updated " + new Date().toISOString().slice(0, 19) + "Z";
+    if (Date.now() > settleUntil) clearInterval(tick);
+  }}, 100);
+}}, {render_delay_ms});
+</script></body></html>"""
+
+
+class FixtureServer:
+    """Serves /cw/<community>/questboard pages with configurable rendering delay, latency and failures"""
+
+    def __init__(self, render_delay_ms: int = 1500, settle_ms: int = 1000, latency_ms: int = 0,
+                 jitter_ms: int = 0, fail_rate: float = 0.0, quests: int = 20, change_every: float = 0,
+                 fixtures: str = None):
+        self.render_delay_ms = render_delay_ms
+        self.settle_ms = settle_ms
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.fail_rate = fail_rate
+        self.quests = quests
+        self.change_every = change_every
+        self.recorded = [open(path, encoding="utf-8").read() for path in sorted(glob.glob(os.path.join(fixtures, "*.html")))] if fixtures else []
+        self.requests = 0
+        self.failures = 0
+        self.port = None
+        self._loop = None
+        self._runner = None
+
+    def quest_list(self, community: str) -> list:
+        version = int(time.time() // self.change_every) if self.change_every else 0
+        rng = random.Random(f"{community}-{version}")
+        statuses = ["", "claimed", "locked", "in review"]
+        return [{"name": f"{community} quest {i}: {rng.choice(['Follow', 'Retweet', 'Join', 'Invite'])}",
+                 "xp": rng.choice([50, 100, 150, 250]), "status": rng.choice(statuses), "questId": f"q{i}"}
+                for i in range(self.quests)]
+
+    async def handle(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        delay = self.latency_ms + (random.uniform(0, self.jitter_ms) if self.jitter_ms else 0)
+        if delay:
+            await asyncio.sleep(delay / 1000)
+        if self.fail_rate and random.random() < self.fail_rate:
+            self.failures += 1
+            return web.Response(status=random.choice([500, 502, 503]), text="upstream error")
+
+        community = request.match_info["community"]
+        if self.recorded:
+            return web.Response(text=self.recorded[hash(community) % len(self.recorded)], content_type="text/html")
+        quests = self.quest_list(community)
+        page = PAGE_TEMPLATE.format(
+            community=html.escape(community),
+            next_data=json.dumps({"props": {"pageProps": {"quests": quests}}}),
+            quests=json.dumps(quests),
+            settle_ms=self.settle_ms,
+            render_delay_ms=self.render_delay_ms,
+        )
+        return web.Response(text=page, content_type="text/html")
+
+    async def _start(self, port: int):
+        app = web.Application()
+        app.router.add_get("/cw/{community}/questboard", self.handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+
+    def start_in_thread(self, port: int = 0):
+        """Serve from a thread with its own event loop, so it does not compete with the checks"""
+        ready = threading.Event()
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            self._loop.run_until_complete(self._start(port))
+            ready.set()
+            self._loop.run_forever()
+
+        threading.Thread(target=run, daemon=True, name="fixture-server").start()
+        ready.wait()
+
+    def url(self, index: int) -> str:
+        return f"http://127.0.0.1:{self.port}/cw/community-{index}/questboard"
+
+
+class PeakMemory:
+    """Samples the process-tree footprint (bot, fetch workers, Chrome) in the background"""
+
+    def __init__(self, interval: float = 0.25):
+        self.interval = interval
+        self.peak_mb = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak_mb = max(self.peak_mb, zealy_bot.get_memory_snapshot(max_age=0).tree_mb)
+            self._stop.wait(self.interval)
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def configure(mode: str, concurrency: int):
+    """Point the module's globals at one mode/concurrency, with fresh pools"""
+    http_first, fetch_mode, backend = MODES[mode]
+    zealy_bot.HTTP_FIRST_ENABLED = http_first
+    zealy_bot.FETCH_MODE = fetch_mode
+    zealy_bot.FETCH_BACKEND = backend
+    zealy_bot.driver_pool = zealy_bot.DriverPool(concurrency, zealy_bot.DRIVER_MAX_USES, zealy_bot.DRIVER_MAX_MEMORY_MB)
+    zealy_bot.fetch_process_pool = zealy_bot.FetchProcessPool(
+        concurrency, zealy_bot.FETCH_WORKER_MAX_FETCHES, zealy_bot.FETCH_WORKER_RECYCLE_MB, zealy_bot.FETCH_WORKER_MEMORY_MB
+    )
+    zealy_bot.cdp_fetcher = zealy_bot.CdpFetcher(concurrency, zealy_bot.CDP_MAX_FETCHES, zealy_bot.CDP_RECYCLE_MB)
+    zealy_bot.concurrency_limiter = zealy_bot.AdaptiveConcurrencyLimiter(concurrency, min_limit=concurrency)
+
+
+async def run_config(server: FixtureServer, mode: str, concurrency: int, urls: int, checks: int) -> dict:
+    configure(mode, concurrency)
+    zealy_bot.monitored_urls.clear()
+    for i in range(urls):
+        url = server.url(i)
+        zealy_bot.monitored_urls[url] = zealy_bot.URLData(
+            hash="", last_notified=0, last_checked=0, failures=0, consecutive_successes=0
+        )
+        zealy_bot.phase_timings.forget(url)
+
+    unit_size = zealy_bot.MAX_TABS_PER_BROWSER if mode == "multitab" else 1
+    order = [server.url(i % urls) for i in range(checks)]
+    units = [order[i:i + unit_size] for i in range(0, len(order), unit_size)]
+    # Keep one unit per URL in flight at a time, like the scheduler does
+    busy = set()
+    pending = list(units)
+    in_flight = set()
+    requests_before = server.requests
+
+    started = time.perf_counter()
+    with PeakMemory() as memory:
+        while pending or in_flight:
+            for unit in list(pending):
+                if busy.intersection(unit):
+                    continue
+                if zealy_bot.concurrency_limiter.active >= concurrency:
+                    break
+                if not await zealy_bot.concurrency_limiter.acquire():
+                    break
+                pending.remove(unit)
+                busy.update(unit)
+                task = asyncio.create_task(zealy_bot.run_check_unit(None, unit))
+                task.add_done_callback(lambda _, unit=unit: busy.difference_update(unit))
+                in_flight.add(task)
+            if in_flight:
+                done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+        elapsed = time.perf_counter() - started
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, zealy_bot.driver_pool.close_idle)
+        zealy_bot.fetch_process_pool.close()
+        await zealy_bot.cdp_fetcher.close()
+
+    records = [record for url in zealy_bot.monitored_urls for record in zealy_bot.phase_timings.records(url)]
+    latencies = [record.total for record in records]
+    return {
+        "mode": mode,
+        "concurrency": concurrency,
+        "checks": len(records),
+        "ok": sum(1 for record in records if record.ok),
+        "per_min": len(records) / elapsed * 60 if elapsed else 0,
+        "p50": zealy_bot.percentile(latencies, 50) if latencies else 0,
+        "p99": zealy_bot.percentile(latencies, 99) if latencies else 0,
+        "peak_mb": memory.peak_mb,
+        "requests": server.requests - requests_before,
+    }
+
+
+async def run(args):
+    server = FixtureServer(args.render_delay_ms, args.settle_ms, args.latency_ms, args.jitter_ms,
+                           args.fail_rate, args.quests, args.change_every, args.fixtures)
+    server.start_in_thread()
+    print(f"Fixture server on http://127.0.0.1:{server.port} "
+          f"(render {args.render_delay_ms}ms, latency {args.latency_ms}±{args.jitter_ms}ms, fail rate {args.fail_rate:.0%})")
+
+    # Admission control is not what is being measured
+    zealy_bot.MEMORY_WARNING_MB = zealy_bot.MEMORY_CRITICAL_MB = zealy_bot.MEMORY_LIMIT_MB = 1 << 20
+
+    results = []
+    for mode in args.modes.split(","):
+        for concurrency in [int(c) for c in args.concurrency.split(",")]:
+            print(f"▶ {mode} x{concurrency} ...", flush=True)
+            results.append(await run_config(server, mode, concurrency, args.urls, args.checks))
+    await zealy_bot.http_fetcher.close()
+
+    print(f"\n{'mode':<10} {'conc':>4} {'checks':>6} {'ok':>4} {'checks/min':>10} {'p50':>7} {'p99':>7} {'peak tree':>10}")
+    for r in results:
+        print(f"{r['mode']:<10} {r['concurrency']:>4} {r['checks']:>6} {r['ok']:>4} {r['per_min']:>10.1f} "
+              f"{r['p50']:>6.2f}s {r['p99']:>6.2f}s {r['peak_mb']:>8.0f}MB")
+
+
+def serve(args):
+    server = FixtureServer(args.render_delay_ms, args.settle_ms, args.latency_ms, args.jitter_ms,
+                           args.fail_rate, args.quests, args.change_every, args.fixtures)
+    server.start_in_thread(args.port)
+    print(f"Serving {server.url(0)} (any community name works) - Ctrl+C to stop")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("command", nargs="?", choices=["run", "serve"], default="run")
+    parser.add_argument("--modes", default="http,single,multitab,process,cdp")
+    parser.add_argument("--concurrency", default="1,2,4", help="comma-separated concurrency levels")
+    parser.add_argument("--urls", type=int, default=8, help="distinct boards")
+    parser.add_argument("--checks", type=int, default=24, help="checks per mode/concurrency run")
+    parser.add_argument("--render-delay-ms", type=int, default=1500, help="before the quest container appears")
+    parser.add_argument("--settle-ms", type=int, default=1000, help="DOM keeps mutating this long after render")
+    parser.add_argument("--latency-ms", type=int, default=0, help="server response delay")
+    parser.add_argument("--jitter-ms", type=int, default=0, help="extra random response delay, up to this")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="fraction of requests answered with a 5xx")
+    parser.add_argument("--quests", type=int, default=20, help="quests per generated board")
+    parser.add_argument("--change-every", type=float, default=0, help="regenerate quests every N seconds (0 = never)")
+    parser.add_argument("--fixtures", help="directory of recorded *.html boards to serve instead")
+    parser.add_argument("--port", type=int, default=8700, help="port for 'serve'")
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        serve(args)
+        return
+    # State, PID and Chrome registry files land in a throw-away directory
+    os.chdir(tempfile.mkdtemp(prefix="zealy-bench-"))
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
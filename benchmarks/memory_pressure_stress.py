@@ -0,0 +1,88 @@
+"""Synthetic memory stress test for the memory pressure watcher.
+
+Allocates memory in steps, then releases it, with the warning, critical
+and alert thresholds set relative to the starting footprint. Reports every
+level transition the watcher publishes, plus how long it took to publish
+after the allocation that crossed the threshold.
+
+    python benchmarks/memory_pressure_stress.py [--step-mb 40] [--steps 6] [--hold 2]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+# zealy_bot reads these at import time
+os.environ.setdefault("TELEGRAM_BOT_TOKEN", "benchmark")
+os.environ.setdefault("CHAT_ID", "0")
+os.environ.setdefault("IS_RENDER", "true")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import zealy_bot
+
+
+def allocate(mb: int) -> bytearray:
+    """Allocate and touch every page so the memory is actually resident"""
+    block = bytearray(mb * 1024 * 1024)
+    for i in range(0, len(block), 4096):
+        block[i] = 1
+    return block
+
+
+async def run(step_mb: int, steps: int, hold: float, interval: float):
+    baseline = zealy_bot.get_memory_snapshot(max_age=0).effective_mb
+    zealy_bot.MEMORY_WARNING_MB = baseline + step_mb * 1.5
+    zealy_bot.MEMORY_CRITICAL_MB = baseline + step_mb * 3.5
+    zealy_bot.MEMORY_LIMIT_MB = baseline + step_mb * 5.5
+    zealy_bot.MEMORY_CHECK_INTERVAL = interval
+    zealy_bot.PRESSURE_IDLE_INTERVAL = interval
+    zealy_bot.PRESSURE_ELEVATED_INTERVAL = interval
+
+    print(f"Baseline {baseline:.1f}MB, thresholds "
+          f"{zealy_bot.MEMORY_WARNING_MB:.0f}/{zealy_bot.MEMORY_CRITICAL_MB:.0f}/{zealy_bot.MEMORY_LIMIT_MB:.0f}MB")
+
+    transitions = []
+    crossed_at = {}
+
+    def record(old_level, new_level, memory_mb):
+        transitions.append((old_level, new_level, memory_mb, time.perf_counter()))
+
+    watcher = zealy_bot.MemoryPressureWatcher()
+    watcher.subscribe(record)
+    watcher.start()
+
+    blocks = []
+    for _ in range(steps):
+        blocks.append(allocate(step_mb))
+        level = zealy_bot.classify_memory_pressure(zealy_bot.get_memory_snapshot(max_age=0).effective_mb)
+        crossed_at.setdefault(level, time.perf_counter())
+        await asyncio.sleep(hold)
+
+    blocks.clear()
+    released_at = time.perf_counter()
+    crossed_at[zealy_bot.PRESSURE_NORMAL] = released_at
+    await asyncio.sleep(hold + interval)
+    watcher.stop()
+
+    print(f"Backend: {watcher.backend}, kernel events: {watcher.events}")
+    print(f"{'transition':<24} {'memory':>10} {'latency':>10}")
+    for old_level, new_level, memory_mb, at in transitions:
+        start = crossed_at.get(new_level)
+        latency = f"{(at - start) * 1000:.0f}ms" if start and at >= start else "-"
+        print(f"{old_level + ' -> ' + new_level:<24} {memory_mb:>8.1f}MB {latency:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--step-mb", type=int, default=40)
+    parser.add_argument("--steps", type=int, default=6)
+    parser.add_argument("--hold", type=float, default=2.0)
+    parser.add_argument("--interval", type=float, default=1.0,
+                        help="polling/re-sample interval used by the watcher")
+    args = parser.parse_args()
+    asyncio.run(run(args.step_mb, args.steps, args.hold, args.interval))
+
+
+if __name__ == "__main__":
+    main()
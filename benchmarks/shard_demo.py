@@ -0,0 +1,88 @@
+"""Run several sharding workers on one box and watch the URLs move between them.
+
+Seeds a throw-away state database with fake boards (monitoring left off, so
+no browser is started), launches ZEALY_ROLE=worker processes against it and
+prints the lease table as workers join, one is killed without warning, and
+a replacement joins.
+
+    python benchmarks/shard_demo.py [--workers 3] [--urls 30]
+"""
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+
+# zealy_bot reads these at import time
+os.environ.setdefault("TELEGRAM_BOT_TOKEN", "benchmark")
+os.environ.setdefault("CHAT_ID", "0")
+os.environ.setdefault("IS_RENDER", "true")
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+
+
+def seed(workdir: str, urls: int):
+    os.chdir(workdir)
+    import zealy_bot
+    for i in range(urls):
+        url = zealy_bot.canonical_url(f"https://zealy.io/cw/community-{i}/questboard")
+        zealy_bot.monitored_urls[url] = zealy_bot.URLData(
+            hash="", last_notified=0, last_checked=0, failures=0, consecutive_successes=0
+        )
+        zealy_bot.subscribe(zealy_bot.CHAT_ID, url)
+    zealy_bot.save_bot_state(list(zealy_bot.monitored_urls), chats=[zealy_bot.CHAT_ID], immediate=True)
+    return zealy_bot
+
+
+def start_worker(workdir: str, worker_id: str) -> subprocess.Popen:
+    env = dict(os.environ, ZEALY_ROLE="worker", WORKER_ID=worker_id)
+    log = open(os.path.join(workdir, f"{worker_id}.log"), "w")
+    return subprocess.Popen([sys.executable, os.path.join(REPO, "zealy_bot.py")], cwd=workdir, env=env,
+                            stdout=log, stderr=subprocess.STDOUT)
+
+
+def show(zealy_bot, label: str, wait: float):
+    time.sleep(wait)
+    counts = zealy_bot.shard_coordinator.lease_counts()
+    total = sum(counts.values())
+    print(f"{label:<40} {total:>3}/{len(zealy_bot.monitored_urls)} leased  "
+          + "  ".join(f"{worker}={count}" for worker, count in sorted(counts.items())))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=3)
+    parser.add_argument("--urls", type=int, default=30)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="zealy-shards-")
+    zealy_bot = seed(workdir, args.urls)
+    settle = zealy_bot.SHARD_HEARTBEAT_INTERVAL * 3
+    print(f"State database: {os.path.join(workdir, zealy_bot.STATE_DB_FILE)}")
+
+    workers = {f"w{i}": start_worker(workdir, f"w{i}") for i in range(1, args.workers + 1)}
+    try:
+        show(zealy_bot, f"{args.workers} workers started", settle)
+        show(zealy_bot, "steady state", zealy_bot.SHARD_HEARTBEAT_INTERVAL * 2)
+
+        victim = "w1"
+        workers.pop(victim).send_signal(signal.SIGKILL)
+        show(zealy_bot, f"{victim} killed (leases not yet expired)", zealy_bot.SHARD_HEARTBEAT_INTERVAL)
+        show(zealy_bot, f"after lease TTL ({zealy_bot.SHARD_LEASE_TTL}s)", zealy_bot.SHARD_LEASE_TTL + settle)
+
+        new_id = f"w{args.workers + 1}"
+        workers[new_id] = start_worker(workdir, new_id)
+        show(zealy_bot, f"{new_id} joined", settle * 2)
+    finally:
+        for proc in workers.values():
+            proc.send_signal(signal.SIGINT)
+        for proc in workers.values():
+            proc.wait(timeout=30)
+    show(zealy_bot, "all workers stopped", 0)
+    print(f"Worker logs in {workdir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""Replay captured page snapshots through hashing and normalization offline.
+
+Snapshots are written by the bot when SNAPSHOT_DIR is set (one JSON per
+fetch, see zealy_bot.SnapshotRecorder), or by the capture command here.
+Replay re-hashes every snapshot with the current normalization pipeline and
+compares consecutive snapshots of each board. For each pair that hashes
+differently it says why: quests actually changed, or only text outside the
+quest cards did (a would-be false positive). It also shows the first
+normalized lines that differ, and flags snapshots whose stored hash no
+longer matches, i.e. normalization changed since capture.
+
+    python benchmarks/snapshot_replay.py replay SNAPSHOT_DIR [--rules rules.json] [--state bot_state.db] [--lines 6]
+    python benchmarks/snapshot_replay.py capture URL [URL ...] --dir SNAPSHOT_DIR [--count 5] [--interval 60] [--artifact dom]
+
+--rules is a JSON list of per-URL rules (as /rules stores them) applied to
+every board instead of the rules saved with each snapshot; --state takes
+each board's rules from a bot state database.
+"""
+import argparse
+import asyncio
+import difflib
+import hashlib
+import json
+import os
+import sys
+import time
+from collections import defaultdict
+
+# zealy_bot reads these at import time
+os.environ.setdefault("TELEGRAM_BOT_TOKEN", "benchmark")
+os.environ.setdefault("CHAT_ID", "0")
+os.environ.setdefault("IS_RENDER", "true")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import zealy_bot
+
+
+def state_rules(path: str) -> dict:
+    """url -> normalization rules from a bot state database"""
+    store = zealy_bot.StateStore(path, 0)
+    urls, _, _ = store.load()
+    return {url: row.get("normalization_rules") or [] for url, row in urls.items()}
+
+
+def normalize(snapshot: dict, rules: list) -> str:
+    return zealy_bot.get_normalization_pipeline(rules).normalize(snapshot["text"])
+
+
+def fingerprints(snapshot: dict) -> dict:
+    """Re-fingerprint from the captured card texts when there are any, so parser changes count too"""
+    if snapshot.get("card_texts"):
+        return zealy_bot.build_fingerprints(zealy_bot.parse_quest_cards(snapshot["card_texts"], snapshot["url"]))
+    return snapshot.get("fingerprints") or {}
+
+
+def explain(old: dict, new: dict, old_text: str, new_text: str, lines: int) -> list:
+    old_prints, new_prints = fingerprints(old), fingerprints(new)
+    report = []
+    if old_prints and new_prints:
+        diff = zealy_bot.diff_fingerprints(old_prints, new_prints)
+        if any(diff.values()):
+            report.append("quests changed: " + ", ".join(f"{len(items)} {kind}" for kind, items in diff.items() if items))
+            report.extend(f"      {kind}: {item}" for kind, items in diff.items() for item in items[:lines])
+        else:
+            report.append("noise only - quest cards identical (the bot compares fingerprints here, no alert)")
+    else:
+        report.append("no quest fingerprints - the bot would alert on this text difference")
+    changed = [line for line in difflib.unified_diff(old_text.splitlines(), new_text.splitlines(), lineterm="", n=0)
+               if line[:1] in "+-" and not line.startswith(("+++", "---"))]
+    report.extend(f"      {line[:100]}" for line in changed[:lines])
+    if len(changed) > lines:
+        report.append(f"      ... {len(changed) - lines} more changed lines")
+    return report
+
+
+def replay(args):
+    snapshots = zealy_bot.load_snapshots(args.directory)
+    if not snapshots:
+        print(f"No snapshots under {args.directory}")
+        return
+    override = json.load(open(args.rules)) if args.rules else None
+    for rule in override or []:
+        error = zealy_bot.validate_normalization_rule(rule)
+        if error:
+            sys.exit(f"{error}: {rule}")
+    saved_rules = state_rules(args.state) if args.state else {}
+
+    by_url = defaultdict(list)
+    for snapshot in snapshots:
+        by_url[(snapshot["url"], snapshot["source"])].append(snapshot)
+
+    totals = defaultdict(int)
+    started = time.perf_counter()
+    for (url, source), series in sorted(by_url.items()):
+        rules = override if override is not None else saved_rules.get(url, series[-1].get("rules") or [])
+        texts = [normalize(snapshot, rules) for snapshot in series]
+        hashes = [hashlib.sha256(text.encode()).hexdigest() for text in texts]
+        drifted = sum(1 for snapshot, digest in zip(series, hashes) if snapshot["hash"] != digest)
+        differing = 0
+        print(f"\n{url} via {source}: {len(series)} snapshots, {len(set(hashes))} distinct hashes, "
+              f"{drifted} re-hash differently than at capture")
+        for i in range(1, len(series)):
+            totals["pairs"] += 1
+            if hashes[i] == hashes[i - 1]:
+                continue
+            differing += 1
+            reasons = explain(series[i - 1], series[i], texts[i - 1], texts[i], args.lines)
+            totals["noise" if reasons[0].startswith("noise") else "quests" if reasons[0].startswith("quests") else "text"] += 1
+            print(f"  {os.path.basename(series[i - 1]['path'])} -> {os.path.basename(series[i]['path'])}: {reasons[0]}")
+            for line in reasons[1:]:
+                print(line)
+        totals["differing"] += differing
+        totals["drifted"] += drifted
+        totals["snapshots"] += len(series)
+
+    elapsed = time.perf_counter() - started
+    print(f"\n{totals['snapshots']} snapshots, {totals['pairs']} consecutive pairs, {totals['differing']} hash differently: "
+          f"{totals['quests']} quest changes, {totals['noise']} noise only (fingerprints absorb it), "
+          f"{totals['text']} text-only alerts (no fingerprints)")
+    print(f"{totals['drifted']} snapshots hash differently than when captured | replayed in {elapsed * 1000:.0f}ms")
+
+
+async def capture(args):
+    zealy_bot.snapshot_recorder = zealy_bot.SnapshotRecorder(args.dir, args.artifact)
+    for url in args.urls:
+        zealy_bot.monitored_urls[url] = zealy_bot.URLData(
+            hash="", last_notified=0, last_checked=0, failures=0, consecutive_successes=0
+        )
+    try:
+        for round_number in range(1, args.count + 1):
+            for url in args.urls:
+                content_hash, response_time, error, _, source = await zealy_bot.fetch_url_content(url)
+                zealy_bot.pop_fetch_details(url)
+                print(f"[{round_number}/{args.count}] {url} via {source}: "
+                      f"{content_hash[:12] if content_hash else error} ({response_time:.1f}s)")
+            if round_number < args.count:
+                await asyncio.sleep(args.interval)
+    finally:
+        await zealy_bot.http_fetcher.close()
+        await asyncio.get_running_loop().run_in_executor(None, zealy_bot.driver_pool.close_idle)
+        zealy_bot.fetch_process_pool.close()
+    print(f"Snapshots in {os.path.abspath(args.dir)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    replay_parser = commands.add_parser("replay", help="re-hash captured snapshots and explain differences")
+    replay_parser.add_argument("directory", help="SNAPSHOT_DIR, or one board's directory inside it")
+    replay_parser.add_argument("--rules", help="JSON file with per-URL rules to try instead of the saved ones")
+    replay_parser.add_argument("--state", help="bot state database to take each board's rules from")
+    replay_parser.add_argument("--lines", type=int, default=6, help="differing lines shown per pair")
+
+    capture_parser = commands.add_parser("capture", help="fetch URLs repeatedly through the bot and save snapshots")
+    capture_parser.add_argument("urls", nargs="+")
+    capture_parser.add_argument("--dir", required=True)
+    capture_parser.add_argument("--count", type=int, default=5)
+    capture_parser.add_argument("--interval", type=float, default=60)
+    capture_parser.add_argument("--artifact", choices=["none", "dom", "mhtml"], default="none")
+
+    args = parser.parse_args()
+    if args.command == "replay":
+        replay(args)
+    else:
+        asyncio.run(capture(args))
+
+
+if __name__ == "__main__":
+    main()
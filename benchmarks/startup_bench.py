@@ -0,0 +1,121 @@
+"""Cold-start benchmark: import cost and time until the bot polls Telegram.
+
+Runs fresh interpreters and reports:
+  * `import zealy_bot` wall time and the heaviest modules it pulls in (-X importtime)
+  * the cost of each lazily imported dependency group (zealy_bot.LAZY_IMPORTS)
+  * seconds from process start until the first Telegram poll is ready and until
+    the browser stack (Selenium, chromedriver) is warm, for the real entry point
+    run against a local fake Bot API
+
+    python benchmarks/startup_bench.py [--runs 3] [--top 8]
+"""
+import argparse
+import asyncio
+import os
+import re
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from aiohttp import web
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ENV = dict(os.environ, TELEGRAM_BOT_TOKEN="123456:benchmark", CHAT_ID="42", IS_RENDER="true", PYTHONUNBUFFERED="1")
+READY_PATTERN = re.compile(r"⏱️ (First poll ready|Browser stack ready) ([\d.]+)s after process start")
+
+
+def python(code: str, *flags: str) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, *flags, "-c", code], cwd=tempfile.gettempdir(), env=dict(ENV, PYTHONPATH=REPO),
+                          capture_output=True, text=True, check=True)
+
+
+def import_breakdown(top: int):
+    code = "import time; t = time.perf_counter(); import zealy_bot; print(time.perf_counter() - t)"
+    wall = float(python(code).stdout.strip().splitlines()[-1])
+    print(f"import zealy_bot: {wall * 1000:.0f}ms")
+
+    # -X importtime lines: "import time: self [us] | cumulative | imported package", nesting shown by indentation
+    modules = []
+    for line in python("import zealy_bot", "-X", "importtime").stderr.splitlines():
+        match = re.match(r"import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)", line)
+        if match and len(match.group(3)) <= 2:  # zealy_bot itself and what it imports directly
+            modules.append((int(match.group(2)), match.group(4)))
+    for cumulative, name in sorted(modules, reverse=True)[:top]:
+        print(f"  {name:<32} {cumulative / 1000:7.1f}ms")
+
+    code = ("import time, zealy_bot\n"
+            "for group in zealy_bot.LAZY_IMPORTS:\n"
+            "    t = time.perf_counter(); zealy_bot.require(group); print(group, time.perf_counter() - t)")
+    print("lazy groups, loaded on first use (in this order; shared dependencies count once):")
+    for line in python(code).stdout.strip().splitlines():
+        group, seconds = line.split()
+        print(f"  {group:<32} {float(seconds) * 1000:7.1f}ms")
+
+
+async def fake_bot_api(request: web.Request) -> web.Response:
+    method = request.match_info["method"]
+    if method == "getMe":
+        return web.json_response({"ok": True, "result": {
+            "id": 123456, "is_bot": True, "first_name": "Fake", "username": "fake_bot"
+        }})
+    if method == "getUpdates":
+        await asyncio.sleep(1)
+        return web.json_response({"ok": True, "result": []})
+    return web.json_response({"ok": True, "result": True})
+
+
+async def time_to_ready(runs: int):
+    app = web.Application()
+    app.router.add_post("/bot{token}/{method}", fake_bot_api)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+
+    results = {"First poll ready": [], "Browser stack ready": []}
+    for _ in range(runs):
+        env = dict(ENV, TELEGRAM_API_BASE_URL=f"http://127.0.0.1:{port}/bot")
+        proc = await asyncio.create_subprocess_exec(
+            sys.executable, os.path.join(REPO, "zealy_bot.py"), cwd=tempfile.mkdtemp(prefix="zealy-startup-"),
+            env=env, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT
+        )
+        seen = {}
+        try:
+            deadline = time.monotonic() + 60
+            while len(seen) < len(results) and time.monotonic() < deadline:
+                line = await asyncio.wait_for(proc.stdout.readline(), timeout=deadline - time.monotonic())
+                if not line:
+                    break
+                match = READY_PATTERN.search(line.decode(errors="replace"))
+                if match:
+                    seen[match.group(1)] = float(match.group(2))
+        finally:
+            proc.send_signal(signal.SIGINT)
+            try:
+                await asyncio.wait_for(proc.communicate(), timeout=30)
+            except asyncio.TimeoutError:
+                proc.kill()
+        for name, seconds in seen.items():
+            results[name].append(seconds)
+    await runner.cleanup()
+
+    print(f"from process start (median of {runs}, interpreter start-up included):")
+    for name, values in results.items():
+        print(f"  {name:<32} {statistics.median(values):6.2f}s" if values else f"  {name:<32} not reached")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=8, help="heaviest direct imports to list")
+    args = parser.parse_args()
+    import_breakdown(args.top)
+    asyncio.run(time_to_ready(args.runs))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+import json
+import os
+import subprocess
+import sys
+
+import zealy_bot
+from zealy_bot import ChromeProcessRegistry
+
+
+def test_registry_file_survives_a_failed_write(tmp_path, monkeypatch):
+    path = str(tmp_path / "chrome_registry.json")
+    child = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"])
+    try:
+        registry = ChromeProcessRegistry(path)
+        registry.register_pid(child.pid)
+        with open(path) as f:
+            saved = json.load(f)
+        assert [group["driver_pid"] for group in saved] == [child.pid]
+        
+        # A write that dies before the swap leaves the last complete registry in place
+        def interrupted(src, dst):
+            raise OSError("killed mid-write")
+        
+        monkeypatch.setattr(zealy_bot.os, "replace", interrupted)
+        registry.refresh(child.pid)
+        with open(path) as f:
+            assert json.load(f) == saved
+        assert sorted(os.listdir(tmp_path)) == ["chrome_registry.json"]
+        
+        monkeypatch.undo()
+        assert registry.reap(child.pid, timeout=5) >= 0
+        assert child.wait(timeout=5) is not None
+    finally:
+        if child.poll() is None:
+            child.kill()
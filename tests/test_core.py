@@ -0,0 +1,173 @@
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+import zealy_bot
+from zealy_bot import URLData, DueQueue, AdaptiveConcurrencyLimiter, canonical_url, classify_error
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def make_url_data(**overrides) -> URLData:
+    fields = dict(hash="", last_notified=0, last_checked=0, failures=0, consecutive_successes=0)
+    fields.update(overrides)
+    return URLData(**fields)
+
+
+def test_import_has_no_side_effects():
+    script = (
+        "import json, os, sys\n"
+        "before = dict(os.environ)\n"
+        "import zealy_bot\n"
+        "heavy = [m for m in ('telegram', 'selenium', 'aiohttp', 'bs4', 'dotenv', 'psutil') if m in sys.modules]\n"
+        "print(json.dumps({'env_changed': dict(os.environ) != before, 'heavy': heavy}))\n"
+    )
+    env = dict(os.environ, TELEGRAM_BOT_TOKEN="123456:test", CHAT_ID="42", IS_RENDER="false")
+    result = subprocess.run([sys.executable, "-c", script], cwd=REPO_ROOT, env=env,
+                            capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    assert report == {"env_changed": False, "heavy": []}
+
+
+def test_type_checking_block_mirrors_lazy_imports():
+    with open(os.path.join(REPO_ROOT, "zealy_bot.py"), encoding="utf-8") as f:
+        source = f.read()
+    block = source.split("if TYPE_CHECKING:", 1)[1].split("\ndef require", 1)[0]
+    for _, names in zealy_bot.LAZY_IMPORTS.values():
+        for name, _, _ in names:
+            assert name in block, f"{name} missing from the TYPE_CHECKING imports"
+
+
+@pytest.mark.parametrize("url, expected", [
+    ("https://zealy.io/cw/Demo/questboard", "https://zealy.io/cw/demo/questboard"),
+    ("http://www.Zealy.io/cw/demo/questboard/", "https://zealy.io/cw/demo/questboard"),
+    ("https://zealy.io:443//cw/demo//questboard#top", "https://zealy.io/cw/demo/questboard"),
+    ("https://zealy.io/cw/demo?b=2&a=1", "https://zealy.io/cw/demo?a=1&b=2"),
+    ("https://zealy.io:8443/cw/demo", "https://zealy.io:8443/cw/demo"),
+    ("  https://zealy.io  ", "https://zealy.io/"),
+])
+def test_canonical_url(url, expected):
+    assert canonical_url(url) == expected
+
+
+@pytest.mark.parametrize("error, expected", [
+    (None, zealy_bot.ERROR_UNKNOWN),
+    ("unknown error: net::ERR_NAME_NOT_RESOLVED", zealy_bot.ERROR_NAVIGATION),
+    ("HTTP error: 404, message='HTTP 404'", zealy_bot.ERROR_NAVIGATION),
+    ("Page not found", zealy_bot.ERROR_PERMANENT),
+    ("invalid argument: 'url' must be a valid url", zealy_bot.ERROR_PERMANENT),
+    ("chrome not reachable", zealy_bot.ERROR_DRIVER_CRASH),
+    ("Timed out receiving message from renderer", zealy_bot.ERROR_TIMEOUT),
+    ("❌ No suitable container found", zealy_bot.ERROR_EMPTY_CONTENT),
+])
+def test_classify_error(error, expected):
+    assert classify_error(error) == expected
+
+
+def test_breaker_opens_after_threshold_and_half_opens_after_cooldown():
+    data = make_url_data()
+    for _ in range(zealy_bot.BREAKER_FAILURE_THRESHOLD - 1):
+        data.record_failure("timeout", zealy_bot.ERROR_TIMEOUT)
+    assert data.breaker_state == zealy_bot.BREAKER_CLOSED
+    
+    data.record_failure("timeout", zealy_bot.ERROR_TIMEOUT)
+    assert data.breaker_state == zealy_bot.BREAKER_OPEN
+    cooldown = data.breaker_open_until - time.time()
+    assert cooldown == pytest.approx(zealy_bot.BREAKER_BASE_COOLDOWN, abs=5)
+    assert not data.breaker_allows(time.time())
+    
+    assert data.breaker_allows(data.breaker_open_until + 1)
+    assert data.breaker_state == zealy_bot.BREAKER_HALF_OPEN
+    
+    # A failed trial re-opens with a doubled cooldown
+    data.record_failure("timeout", zealy_bot.ERROR_TIMEOUT)
+    assert data.breaker_state == zealy_bot.BREAKER_OPEN
+    cooldown = data.breaker_open_until - time.time()
+    assert cooldown == pytest.approx(zealy_bot.BREAKER_BASE_COOLDOWN * 2, abs=5)
+    
+    data.record_success()
+    assert data.breaker_state == zealy_bot.BREAKER_CLOSED
+    assert data.failures == 0 and data.breaker_trips == 0
+
+
+def test_breaker_uses_longest_cooldown_only_for_repeated_permanent_errors():
+    data = make_url_data()
+    data.record_failure("Page not found", zealy_bot.ERROR_PERMANENT)
+    assert data.breaker_state == zealy_bot.BREAKER_OPEN
+    assert data.breaker_open_until - time.time() < zealy_bot.BREAKER_MAX_COOLDOWN - 60
+    
+    data.record_failure("Page not found", zealy_bot.ERROR_PERMANENT)
+    assert data.breaker_open_until - time.time() == pytest.approx(zealy_bot.BREAKER_MAX_COOLDOWN, abs=5)
+
+
+def test_schedule_next_backs_off_and_resets_on_change():
+    data = make_url_data(check_interval=zealy_bot.MIN_CHECK_INTERVAL)
+    now = 1_000_000.0
+    
+    data.schedule_next(changed=False, now=now)
+    assert data.check_interval == pytest.approx(zealy_bot.MIN_CHECK_INTERVAL * zealy_bot.INTERVAL_GROWTH)
+    assert data.next_check_due == pytest.approx(now + data.check_interval)
+    
+    for _ in range(50):
+        data.schedule_next(changed=False, now=now)
+    assert data.check_interval == zealy_bot.MAX_CHECK_INTERVAL
+    
+    data.schedule_next(changed=True, now=now)
+    assert data.check_interval == zealy_bot.MIN_CHECK_INTERVAL
+    assert data.change_count == 1 and data.last_changed == now
+    
+    # Shortly after a change the interval stays at half the time since it
+    later = now + 100
+    data.schedule_next(changed=False, now=later)
+    assert data.check_interval == pytest.approx(max(zealy_bot.MIN_CHECK_INTERVAL,
+                                                    min(zealy_bot.MIN_CHECK_INTERVAL * zealy_bot.INTERVAL_GROWTH, 50)))
+
+
+def test_due_queue_orders_and_skips_rescheduled_entries():
+    queue = DueQueue()
+    queue.schedule("a", 30)
+    queue.schedule("b", 10)
+    queue.schedule("c", 20)
+    queue.schedule("a", 5)  # Rescheduled earlier - the old entry must not fire again
+    queue.remove("c")
+    
+    assert len(queue) == 2 and "c" not in queue
+    assert queue.next_due() == 5
+    assert queue.pop_due(10) == ["a", "b"]
+    assert queue.pop_due(100) == []
+    assert queue.next_due() is None
+
+
+def test_concurrency_limiter_follows_memory(monkeypatch):
+    limiter = AdaptiveConcurrencyLimiter(max_limit=4)
+    low = zealy_bot.MEMORY_WARNING_MB - zealy_bot.CHECK_MEMORY_ESTIMATE_MB - 1
+    
+    assert limiter.adjust(low) == 2
+    assert limiter.adjust(low) == 3
+    for _ in range(5):
+        limiter.adjust(low)
+    assert limiter.limit == 4
+    assert limiter.adjust(zealy_bot.MEMORY_WARNING_MB + 1) == 2
+    assert limiter.adjust(zealy_bot.MEMORY_CRITICAL_MB + 1) == 0
+    
+    async def scenario():
+        monkeypatch.setattr(zealy_bot, "get_memory_usage", lambda: zealy_bot.MEMORY_CRITICAL_MB + 1)
+        assert await limiter.acquire() is False
+        
+        monkeypatch.setattr(zealy_bot, "get_memory_usage", lambda: low)
+        limiter.limit = 1
+        assert await limiter.acquire() is True
+        # The limit grows while memory is low, so a second check gets in too
+        assert await asyncio.wait_for(limiter.acquire(), timeout=1) is True
+        assert limiter.active == 2
+        await limiter.release()
+        await limiter.release()
+        assert limiter.active == 0
+    
+    asyncio.run(scenario())
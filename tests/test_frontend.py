@@ -0,0 +1,38 @@
+import asyncio
+from types import SimpleNamespace
+
+import zealy_bot
+from zealy_bot import URLData
+
+URL = "https://zealy.io/cw/demo/questboard"
+
+
+def test_debug_in_frontend_reports_the_stored_result_without_fetching(monkeypatch):
+    replies = []
+    
+    async def no_fetch(*args, **kwargs):
+        raise AssertionError("the frontend must not fetch")
+    
+    async def no_sync():
+        return {}
+    
+    async def reply_text(text):
+        replies.append(text)
+    
+    monkeypatch.setattr(zealy_bot, "SHARD_ROLE", "frontend")
+    monkeypatch.setattr(zealy_bot, "fetch_url_content", no_fetch)
+    monkeypatch.setattr(zealy_bot, "sync_registry", no_sync)
+    monkeypatch.setattr(zealy_bot.shard_coordinator, "lease_owner", lambda url: "worker-2")
+    monkeypatch.setattr(zealy_bot, "monitored_urls", {URL: URLData(
+        hash="abc", last_notified=0, last_checked=1, failures=0, consecutive_successes=4, check_count=4,
+        source_hashes={"http": "abcdef0123456789ffff"}, phase_summary="⏱️ p50/p95 over 4 checks (0 retried): total 1.0/2.0s"
+    )})
+    monkeypatch.setattr(zealy_bot, "subscriptions", {7: {URL: zealy_bot.Subscription(added_at=1)}})
+    
+    update = SimpleNamespace(effective_chat=SimpleNamespace(id=7), message=SimpleNamespace(reply_text=reply_text))
+    asyncio.run(zealy_bot.debug_url(update, SimpleNamespace(args=["1"])))
+    
+    assert len(replies) == 1
+    assert "worker-2" in replies[0]
+    assert "http abcdef0123456789..." in replies[0]
+    assert "total 1.0/2.0s" in replies[0]
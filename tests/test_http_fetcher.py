@@ -0,0 +1,134 @@
+import asyncio
+import json
+
+import pytest
+from aiohttp import web
+
+import zealy_bot
+from zealy_bot import HttpFetcher
+
+QUESTS = [
+    {"name": "Follow us on X", "xp": 100, "status": "open"},
+    {"name": "Join  the Discord", "xp": 50, "status": "open"},
+]
+
+CONTAINER_PAGE = """<html><body>
+<div class="flex flex-col w-full pt-100">
+  <a href="/cw/demo/quests/1"><span>Follow us on X</span><span>100 XP</span></a>
+  <a href="/cw/demo/quests/2"><span>Join the Discord</span><span>50 XP</span></a>
+</div>
+</body></html>"""
+
+
+def next_data_page(quests) -> str:
+    payload = {"props": {"pageProps": {"quests": quests}}}
+    return (f'<html><body><div id="__next">loading</div>'
+            f'<script id="__NEXT_DATA__" type="application/json">{json.dumps(payload)}</script></body></html>')
+
+
+def run_against_site(pages, scenario):
+    """Serve {path: (status, body)} on localhost and run scenario(fetcher, base_url)"""
+    async def handle(request: web.Request) -> web.Response:
+        status, body = pages.get(request.path, (404, "not found"))
+        content_type = "application/json" if body.lstrip().startswith(("{", "[")) else "text/html"
+        return web.Response(status=status, text=body, content_type=content_type)
+    
+    async def main():
+        app = web.Application()
+        app.router.add_get("/{tail:.*}", handle)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        fetcher = HttpFetcher(timeout=5)
+        try:
+            return await scenario(fetcher, f"http://127.0.0.1:{port}")
+        finally:
+            await fetcher.close()
+            await runner.cleanup()
+    
+    return asyncio.run(main())
+
+
+@pytest.fixture(autouse=True)
+def no_api_template(monkeypatch):
+    monkeypatch.setattr(zealy_bot, "ZEALY_API_URL_TEMPLATE", "")
+
+
+def test_next_data_payload_is_hashed_with_fingerprints():
+    async def scenario(fetcher, base):
+        url = f"{base}/cw/demo/questboard"
+        result = await fetcher.fetch(url, debug_mode=True)
+        return url, result, zealy_bot.pop_fetch_details(url)
+    
+    url, (content_hash, response_time, error, sample), details = run_against_site(
+        {"/cw/demo/questboard": (200, next_data_page(QUESTS))}, scenario
+    )
+    assert error is None and response_time >= 0
+    expected_text = zealy_bot.normalize_quest_records(zealy_bot.quest_records_from_json(QUESTS))
+    assert sample == expected_text[:500]
+    assert content_hash == zealy_bot.hash_page_content(expected_text, url)
+    assert set(details["fingerprints"]) == {"Follow us on X", "Join the Discord"}
+
+
+def test_quest_order_does_not_change_the_hash():
+    async def scenario(fetcher, base):
+        first = await fetcher.fetch(f"{base}/a")
+        second = await fetcher.fetch(f"{base}/b")
+        changed = await fetcher.fetch(f"{base}/c")
+        return first[0], second[0], changed[0]
+    
+    edited = [dict(QUESTS[0], xp=150), QUESTS[1]]
+    first, second, changed = run_against_site({
+        "/a": (200, next_data_page(QUESTS)),
+        "/b": (200, next_data_page(list(reversed(QUESTS)))),
+        "/c": (200, next_data_page(edited)),
+    }, scenario)
+    assert first == second
+    assert changed != first
+
+
+def test_server_rendered_container_is_used_without_next_data():
+    async def scenario(fetcher, base):
+        url = f"{base}/cw/demo/questboard"
+        result = await fetcher.fetch(url, debug_mode=True)
+        return result, zealy_bot.pop_fetch_details(url)
+    
+    (content_hash, _, error, sample), details = run_against_site(
+        {"/cw/demo/questboard": (200, CONTAINER_PAGE)}, scenario
+    )
+    assert error is None and content_hash
+    assert "Follow us on X" in sample
+    assert set(details["fingerprints"]) == {"Follow us on X", "Join the Discord"}
+
+
+def test_page_without_quests_is_not_parseable():
+    async def scenario(fetcher, base):
+        return await fetcher.fetch(f"{base}/empty")
+    
+    content_hash, _, error, _ = run_against_site({"/empty": (200, "<html><body>app shell</body></html>")}, scenario)
+    assert content_hash is None
+    assert zealy_bot.classify_error(error) == zealy_bot.ERROR_EMPTY_CONTENT
+
+
+def test_http_status_errors_stay_retryable():
+    async def scenario(fetcher, base):
+        return await fetcher.fetch(f"{base}/missing")
+    
+    content_hash, _, error, _ = run_against_site({}, scenario)
+    assert content_hash is None and "404" in error
+    assert zealy_bot.classify_error(error) == zealy_bot.ERROR_NAVIGATION
+
+
+def test_api_template_is_tried_first(monkeypatch):
+    async def scenario(fetcher, base):
+        monkeypatch.setattr(zealy_bot, "ZEALY_API_URL_TEMPLATE", base + "/api/{community}/quests")
+        return await fetcher.fetch(f"{base}/cw/demo/questboard", debug_mode=True)
+    
+    content_hash, _, error, sample = run_against_site({
+        "/api/demo/quests": (200, json.dumps({"items": QUESTS})),
+        "/cw/demo/questboard": (200, "<html><body>should not be parsed</body></html>"),
+    }, scenario)
+    assert error is None and content_hash
+    assert sample == zealy_bot.normalize_quest_records(zealy_bot.quest_records_from_json(QUESTS))[:500]
@@ -0,0 +1,81 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import zealy_bot
+from zealy_bot import URLData
+
+URL = "https://zealy.io/cw/demo/questboard"
+
+
+@pytest.fixture
+def scheduler(monkeypatch):
+    """Monitoring loop wired to a fake check that runs until cancelled"""
+    running = []
+    
+    async def slow_check(bot, unit):
+        running.append(unit)
+        try:
+            await asyncio.sleep(3600)
+        finally:
+            running.remove(unit)
+            await zealy_bot.concurrency_limiter.release()
+    
+    async def no_notification(*args, **kwargs):
+        return True
+    
+    monkeypatch.setattr(zealy_bot, "run_check_unit", slow_check)
+    monkeypatch.setattr(zealy_bot, "send_notification", no_notification)
+    monkeypatch.setattr(zealy_bot, "save_bot_state", lambda *args, **kwargs: True)
+    monkeypatch.setattr(zealy_bot, "get_memory_usage", lambda: 100.0)
+    monkeypatch.setattr(zealy_bot, "monitored_urls", {URL: URLData(
+        hash="", last_notified=0, last_checked=0, failures=0, consecutive_successes=0
+    )})
+    monkeypatch.setattr(zealy_bot, "due_queue", zealy_bot.DueQueue())
+    monkeypatch.setattr(zealy_bot, "is_monitoring", False)
+    return running
+
+
+def test_stop_cancels_the_loop_and_waits_for_its_cleanup(scheduler, monkeypatch):
+    application = SimpleNamespace(bot=None, bot_data={})
+    
+    async def scenario():
+        monkeypatch.setattr(zealy_bot, "concurrency_limiter", zealy_bot.AdaptiveConcurrencyLimiter(2))
+        zealy_bot.is_monitoring = True
+        zealy_bot.start_monitor_task(application)
+        first = application.bot_data["monitor_task"]
+        await asyncio.sleep(0.2)
+        assert scheduler == [[URL]]
+        
+        # /stop: the loop is gone, with its checks and schedule, before the reply
+        zealy_bot.is_monitoring = False
+        assert await zealy_bot.wait_for_monitor_task(application, cancel=True)
+        assert first.done() and "monitor_task" not in application.bot_data
+        assert scheduler == [] and len(zealy_bot.due_queue) == 0
+        assert zealy_bot.concurrency_limiter.active == 0
+        
+        # /run straight after dispatches the URL exactly once
+        zealy_bot.is_monitoring = True
+        zealy_bot.start_monitor_task(application)
+        await asyncio.sleep(0.2)
+        assert scheduler == [[URL]]
+        zealy_bot.is_monitoring = False
+        assert await zealy_bot.wait_for_monitor_task(application, cancel=True)
+    
+    asyncio.run(scenario())
+
+
+def test_run_refuses_while_an_old_loop_is_still_stopping():
+    application = SimpleNamespace(bot=None, bot_data={})
+    
+    async def scenario():
+        stuck = asyncio.create_task(asyncio.sleep(3600))
+        application.bot_data["monitor_task"] = stuck
+        assert not await zealy_bot.wait_for_monitor_task(application, timeout=0.05)
+        assert application.bot_data["monitor_task"] is stuck
+        stuck.cancel()
+        assert await zealy_bot.wait_for_monitor_task(application)
+        assert "monitor_task" not in application.bot_data
+    
+    asyncio.run(scenario())
@@ -0,0 +1,157 @@
+import asyncio
+import time
+
+import pytest
+from aiohttp import web
+from telegram import Bot
+
+import zealy_bot
+from zealy_bot import NotificationQueue, split_message
+
+
+@pytest.mark.parametrize("text, limit, expected", [
+    ("short", 10, ["short"]),
+    ("", 10, [""]),
+    ("line one\nline two", 12, ["line one", "line two"]),
+    ("word word word", 10, ["word word", "word"]),
+    ("abcdefghijkl", 5, ["abcde", "fghij", "kl"]),
+])
+def test_split_message(text, limit, expected):
+    assert split_message(text, limit) == expected
+
+
+def test_split_message_keeps_every_line():
+    text = "\n".join(f"quest {i}: " + "x" * 50 for i in range(300))
+    parts = split_message(text)
+    assert all(len(part) <= zealy_bot.TELEGRAM_MAX_MESSAGE_LENGTH for part in parts)
+    assert "\n".join(parts) == text
+
+
+class FakeBotApi:
+    """getMe/sendMessage stand-in; the first `throttle` sends answer 429"""
+    
+    def __init__(self, throttle: int = 0, retry_after: int = 1):
+        self.throttle = throttle
+        self.retry_after = retry_after
+        self.calls = 0
+        self.received = []
+    
+    async def handle(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        if method == "getMe":
+            return web.json_response({"ok": True, "result": {
+                "id": 123456, "is_bot": True, "first_name": "Fake", "username": "fake_bot"
+            }})
+        data = dict(await request.post()) or await request.json()
+        self.calls += 1
+        if self.calls <= self.throttle:
+            return web.json_response({
+                "ok": False, "error_code": 429,
+                "description": f"Too Many Requests: retry after {self.retry_after}",
+                "parameters": {"retry_after": self.retry_after},
+            }, status=429)
+        self.received.append((int(data["chat_id"]), data["text"]))
+        return web.json_response({"ok": True, "result": {
+            "message_id": len(self.received), "date": int(time.time()),
+            "chat": {"id": int(data["chat_id"]), "type": "private"}, "text": data["text"],
+        }})
+
+
+def run_against_fake_api(api: FakeBotApi, scenario):
+    async def main():
+        app = web.Application()
+        app.router.add_post("/bot{token}/{method}", api.handle)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        queue = NotificationQueue()
+        try:
+            async with Bot(zealy_bot.TELEGRAM_BOT_TOKEN, base_url=f"http://127.0.0.1:{port}/bot") as bot:
+                queue.start(bot)
+                await scenario(queue)
+        finally:
+            queue.stop()
+            await runner.cleanup()
+        return queue
+    
+    return asyncio.run(main())
+
+
+@pytest.fixture(autouse=True)
+def fast_pacing(monkeypatch):
+    monkeypatch.setattr(zealy_bot, "CHAT_MESSAGES_PER_SECOND", 100.0)
+    monkeypatch.setattr(zealy_bot, "CHAT_MESSAGE_BURST", 100)
+
+
+def test_digest_is_one_message_and_priority_goes_first():
+    api = FakeBotApi()
+    
+    async def scenario(queue):
+        queue.put("status", chat_id=1)
+        queue.put("change A", chat_id=1, digest=True)
+        queue.put("change B", chat_id=1, digest=True)
+        queue.put("urgent", chat_id=2, priority=True)
+        await queue.drain(timeout=10)
+    
+    queue = run_against_fake_api(api, scenario)
+    # drain() turns the held alerts into a priority digest, so the plain status goes last
+    assert api.received == [
+        (2, "urgent"),
+        (1, "🚨 2 CHANGES DETECTED\n\nchange A\n\nchange B"),
+        (1, "status"),
+    ]
+    assert queue.sent == 3 and queue.failed == 0 and queue.depth() == 0
+
+
+def test_long_message_is_split_not_truncated():
+    api = FakeBotApi()
+    text = "\n".join(f"line {i} " + "y" * 80 for i in range(100))
+    
+    async def scenario(queue):
+        queue.put(text, chat_id=1)
+        await queue.drain(timeout=10)
+    
+    run_against_fake_api(api, scenario)
+    assert len(api.received) > 1
+    assert "\n".join(part for _, part in api.received) == text
+
+
+def test_retry_after_is_waited_out():
+    api = FakeBotApi(throttle=1, retry_after=1)
+    
+    async def scenario(queue):
+        queue.put("hello", chat_id=1)
+        await queue.drain(timeout=10)
+    
+    queue = run_against_fake_api(api, scenario)
+    assert api.received == [(1, "hello")]
+    assert queue.retry_after_count == 1 and queue.sent == 1
+
+
+def test_retry_after_is_capped(monkeypatch):
+    monkeypatch.setattr(zealy_bot, "SEND_RETRY_AFTER_BUDGET", 0.5)
+    api = FakeBotApi(throttle=100, retry_after=1)
+    
+    async def scenario(queue):
+        queue.put("stuck", chat_id=1)
+        queue.put("next", chat_id=2)
+        await queue.drain(timeout=10)
+    
+    started = time.monotonic()
+    queue = run_against_fake_api(api, scenario)
+    assert time.monotonic() - started < 5
+    assert queue.failed == 2 and queue.sent == 0 and queue.depth() == 0
+
+
+def test_drain_flushes_held_digest():
+    api = FakeBotApi()
+    
+    async def scenario(queue):
+        queue.put("held change", chat_id=1, digest=True)
+        await queue.drain(timeout=10)
+    
+    queue = run_against_fake_api(api, scenario)
+    assert api.received == [(1, "held change")]
+    assert queue.depth() == 0
@@ -0,0 +1,141 @@
+import asyncio
+import json
+import time
+from dataclasses import asdict
+
+import pytest
+
+import zealy_bot
+from zealy_bot import StateStore, URLData
+
+URL = "https://zealy.io/cw/demo/questboard"
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    urls = {}
+    monkeypatch.setattr(zealy_bot, "monitored_urls", urls)
+    return urls
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "state.db")
+
+
+def stored_row(store: StateStore) -> dict:
+    urls, _, _ = store.load()
+    return urls[URL]
+
+
+def new_url_data(**overrides) -> URLData:
+    fields = dict(hash="", last_notified=0, last_checked=0, failures=0, consecutive_successes=0)
+    fields.update(overrides)
+    return URLData(**fields)
+
+
+def test_frontend_edits_never_replace_worker_results(registry, db_path):
+    frontend = StateStore(db_path, debounce=5)
+    frontend.owns_registry, frontend.field_updates = True, True
+    worker = StateStore(db_path, debounce=5)
+    worker.owns_registry, worker.field_updates = False, False
+    
+    # The frontend adds the URL, then a worker records its first check
+    registry[URL] = new_url_data()
+    frontend.mark_dirty([URL])
+    frontend.flush()
+    checked = new_url_data(hash="abc", source_hashes={"http": "abc"}, check_count=3)
+    worker._write({URL: json.dumps(asdict(checked))}, {})
+    
+    # An allowlist edit from the frontend's stale copy only touches its own fields
+    registry[URL].resource_allowlist.append("*.svg")
+    registry[URL].config_revision += 1
+    frontend.mark_dirty([URL], fields=("resource_allowlist", "config_revision"))
+    assert frontend.flush() == 1
+    row = stored_row(frontend)
+    assert row["hash"] == "abc" and row["check_count"] == 3
+    assert row["resource_allowlist"] == ["*.svg"] and row["config_revision"] == 1
+    
+    # A whole-row save of an existing URL (e.g. another chat unsubscribed) is ignored
+    frontend.mark_dirty([URL])
+    frontend.flush()
+    assert stored_row(frontend)["hash"] == "abc"
+    
+    # A rules edit resets the baseline the workers compare against
+    registry[URL].normalization_rules.append({"type": "collapse_whitespace"})
+    registry[URL].reset_baseline()
+    registry[URL].config_revision += 1
+    frontend.mark_dirty([URL], fields=("normalization_rules", "config_revision") + zealy_bot.BASELINE_FIELDS)
+    frontend.flush()
+    row = stored_row(frontend)
+    assert row["hash"] == "" and row["source_hashes"] == {} and row["check_count"] == 3
+    assert row["normalization_rules"] == [{"type": "collapse_whitespace"}] and row["config_revision"] == 2
+    
+    # Removing the last subscriber still deletes the row
+    del registry[URL]
+    frontend.mark_dirty([URL])
+    frontend.flush()
+    assert frontend.load()[0] == {}
+
+
+def test_standalone_writes_whole_rows(registry, db_path):
+    store = StateStore(db_path, debounce=5)
+    store.owns_registry, store.field_updates = True, False
+    registry[URL] = new_url_data(hash="old")
+    store.mark_dirty([URL])
+    store.flush()
+    
+    registry[URL].hash = "new"
+    registry[URL].config_revision += 1
+    store.mark_dirty([URL], fields=("config_revision",))
+    store.flush()
+    row = stored_row(store)
+    assert row["hash"] == "new" and row["config_revision"] == 1
+
+
+def test_alert_rate_limit_follows_the_url_to_its_next_worker(monkeypatch, db_path):
+    chat_id = 7
+    sent = []
+    
+    async def record_notification(bot, message, priority=False, digest=False, chat_id=None):
+        sent.append((chat_id, message))
+        return True
+    
+    monkeypatch.setattr(zealy_bot, "send_notification", record_notification)
+    monkeypatch.setattr(zealy_bot, "SHARD_ROLE", "worker")
+    monkeypatch.setattr(zealy_bot.shard_coordinator, "owned", {URL})
+    
+    # The frontend registers the board and the chat watching it
+    frontend = StateStore(db_path, debounce=5)
+    frontend.owns_registry, frontend.field_updates = True, True
+    monkeypatch.setattr(zealy_bot, "monitored_urls", {URL: new_url_data()})
+    monkeypatch.setattr(zealy_bot, "subscriptions", {chat_id: {URL: zealy_bot.Subscription(added_at=1)}})
+    monkeypatch.setattr(zealy_bot, "chat_settings", {chat_id: zealy_bot.ChatSettings()})
+    frontend.mark_dirty([URL], chats=[chat_id])
+    frontend.flush()
+    
+    async def check_on_fresh_worker(now: float):
+        worker = StateStore(db_path, debounce=5)
+        worker.owns_registry, worker.field_updates = False, False
+        monkeypatch.setattr(zealy_bot, "state_store", worker)
+        monkeypatch.setattr(zealy_bot, "monitored_urls", {})
+        monkeypatch.setattr(zealy_bot, "subscriptions", {})
+        monkeypatch.setattr(zealy_bot, "chat_settings", {})
+        await zealy_bot.sync_registry()
+        await zealy_bot.handle_check_result(None, (URL, True, None), now, zealy_bot.BREAKER_CLOSED)
+        await worker.flush_async()
+    
+    async def scenario():
+        now = time.time()
+        await check_on_fresh_worker(now)
+        # The lease moves before min_notify_interval has passed
+        await check_on_fresh_worker(now + 10)
+    
+    asyncio.run(scenario())
+    assert [chat for chat, _ in sent] == [chat_id]
+    
+    # A later frontend save of the chat keeps the worker's timestamp
+    zealy_bot.subscriptions[chat_id][URL].last_notified = 0
+    frontend.mark_dirty([], chats=[chat_id])
+    frontend.flush()
+    assert frontend.load()[2][chat_id]["subscriptions"][URL]["last_notified"] > 0
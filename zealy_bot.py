@@ -1,156 +1,350 @@
+from __future__ import annotations
+
 import hashlib
+import importlib
+import bisect
+import socket
 import asyncio
 import re
 import shutil
+import tempfile
 import time
 import os
 import traceback
 import sys
 import gc
 import json
+import multiprocessing
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+import heapq
+import random
+import fnmatch
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
 from datetime import datetime
 import platform
-from dataclasses import dataclass, asdict
-from typing import Dict, Optional, Tuple, List
+from dataclasses import dataclass, asdict, field
+from typing import TYPE_CHECKING, Dict, Optional, Tuple, List
 import threading
-from queue import Queue, Empty
+import signal
+import select
+from collections import deque
+
+# Heavy dependencies are imported on first use by require(), which binds the
+# names below as module globals. Importing this module (tests, benchmarks,
+# fetch workers, ZEALY_ROLE=worker) only pays for what it actually runs:
+# Telegram for the bot frontend, Selenium for browser fetches, aiohttp and
+# BeautifulSoup for the HTTP fast path and /metrics.
+LAZY_IMPORTS = {
+    "telegram": ("python-telegram-bot", [
+        ("Update", "telegram", "Update"),
+        ("Application", "telegram.ext", "Application"),
+        ("CommandHandler", "telegram.ext", "CommandHandler"),
+        ("ContextTypes", "telegram.ext", "ContextTypes"),
+        ("ApplicationHandlerStop", "telegram.ext", "ApplicationHandlerStop"),
+        ("MessageHandler", "telegram.ext", "MessageHandler"),
+        ("filters", "telegram.ext", "filters"),
+        ("TelegramError", "telegram.error", "TelegramError"),
+        ("NetworkError", "telegram.error", "NetworkError"),
+        ("RetryAfter", "telegram.error", "RetryAfter"),
+        ("BadRequest", "telegram.error", "BadRequest"),
+    ]),
+    "selenium": ("selenium", [
+        ("webdriver", "selenium.webdriver", None),
+        ("Options", "selenium.webdriver.chrome.options", "Options"),
+        ("Service", "selenium.webdriver.chrome.service", "Service"),
+        ("By", "selenium.webdriver.common.by", "By"),
+        ("WebDriverWait", "selenium.webdriver.support.ui", "WebDriverWait"),
+        ("WebDriverException", "selenium.common.exceptions", "WebDriverException"),
+        ("TimeoutException", "selenium.common.exceptions", "TimeoutException"),
+    ]),
+    "http": ("aiohttp beautifulsoup4", [
+        ("aiohttp", "aiohttp", None),
+        ("web", "aiohttp.web", None),
+        ("BeautifulSoup", "bs4", "BeautifulSoup"),
+    ]),
+    "chromedriver": ("chromedriver-autoinstaller", [
+        ("chromedriver_autoinstaller", "chromedriver_autoinstaller", None),
+    ]),
+    "dotenv": ("python-dotenv", [
+        ("load_dotenv", "dotenv", "load_dotenv"),
+    ]),
+    "psutil": ("psutil", [
+        ("psutil", "psutil", None),
+    ]),
+}
+_loaded_imports = set()
+_import_lock = threading.RLock()
 
-# First check if required packages are installed
-try:
+if TYPE_CHECKING:
+    # The same names, for type checkers and linters - require() binds them at run time
+    import aiohttp
+    import chromedriver_autoinstaller
     import psutil
+    from aiohttp import web
+    from bs4 import BeautifulSoup
     from dotenv import load_dotenv
-    import chromedriver_autoinstaller
-    from telegram import Update
-    from telegram.ext import (
-        Application,
-        CommandHandler,
-        ContextTypes,
-        ApplicationHandlerStop,
-        MessageHandler,
-        filters
-    )
-    from telegram.error import TelegramError, NetworkError
     from selenium import webdriver
+    from selenium.common.exceptions import TimeoutException, WebDriverException
     from selenium.webdriver.chrome.options import Options
+    from selenium.webdriver.chrome.service import Service
     from selenium.webdriver.common.by import By
     from selenium.webdriver.support.ui import WebDriverWait
-    from selenium.webdriver.support import expected_conditions as EC
-    from selenium.common.exceptions import (
-        StaleElementReferenceException,
-        WebDriverException,
-        TimeoutException,
-        NoSuchElementException
-    )
-    from selenium.webdriver.chrome.service import Service
-except ImportError as e:
-    print(f"ERROR: Missing required package: {str(e)}")
-    print("Please install required packages using:")
-    print("pip install python-telegram-bot selenium python-dotenv psutil chromedriver-autoinstaller")
-    if not os.getenv('IS_RENDER', 'false').lower() == 'true':
-        input("Press Enter to exit...")
-    sys.exit(1)
+    from telegram import Update
+    from telegram.error import BadRequest, NetworkError, RetryAfter, TelegramError
+    from telegram.ext import (Application, ApplicationHandlerStop, CommandHandler, ContextTypes,
+                              MessageHandler, filters)
+
+def require(*groups: str):
+    """Import LAZY_IMPORTS groups that are not loaded yet (safe from any thread)"""
+    for group in groups:
+        if group in _loaded_imports:
+            continue
+        with _import_lock:
+            if group in _loaded_imports:
+                continue
+            package, names = LAZY_IMPORTS[group]
+            try:
+                for name, module, attribute in names:
+                    imported = importlib.import_module(module)
+                    globals()[name] = getattr(imported, attribute) if attribute else imported
+            except ImportError as e:
+                raise ImportError(f"Missing required package: {e}. Install it with: pip install {package}") from e
+            _loaded_imports.add(group)
+
+def preload_in_background(*groups: str) -> threading.Thread:
+    """Warm groups on a daemon thread so the first call that needs them does not wait"""
+    def run():
+        try:
+            require(*groups)
+        except ImportError as e:
+            print(f"❌ {e}")
+    thread = threading.Thread(target=run, name=f"preload-{'-'.join(groups)}", daemon=True)
+    thread.start()
+    return thread
+
+def startup_elapsed() -> float:
+    """Seconds since this process started, interpreter start-up included"""
+    require("psutil")
+    return time.time() - psutil.Process().create_time()
 
 # DEFINE IS_RENDER FIRST
 IS_RENDER = os.getenv('IS_RENDER', 'false').lower() == 'true'
 
-print(f"🚀 Starting Zealy Bot - {'Render' if IS_RENDER else 'Local'} Mode")
-print(f"📍 Working directory: {os.getcwd()}")
-print(f"🐍 Python version: {sys.version}")
-
-# Load environment variables
-if not IS_RENDER:
-    print("Loading .env file...")
+# Local runs of the bot read a .env file; it only fills in variables that are not
+# already set. Importing the module (tests, benchmarks) leaves os.environ alone, and
+# spawned fetch workers inherit the environment of the bot that loaded it
+if __name__ == "__main__" and not IS_RENDER:
+    require("dotenv")
     load_dotenv()
 
-print("🔍 Loading environment variables...")
-
 TELEGRAM_BOT_TOKEN = os.getenv('TELEGRAM_BOT_TOKEN')
 CHAT_ID_STR = os.getenv('CHAT_ID')
+CHAT_ID = int(CHAT_ID_STR) if CHAT_ID_STR and CHAT_ID_STR.lstrip('-').isdigit() else 0  # Checked by validate_environment()
 
-print(f"✅ Environment Check:")
-print(f"   IS_RENDER: {IS_RENDER}")
-print(f"   BOT_TOKEN exists: {bool(TELEGRAM_BOT_TOKEN)}")
-print(f"   CHAT_ID exists: {bool(CHAT_ID_STR)}")
-
-if TELEGRAM_BOT_TOKEN:
-    print(f"   Bot token length: {len(TELEGRAM_BOT_TOKEN)}")
-    print(f"   Bot token preview: {TELEGRAM_BOT_TOKEN[:10]}...")
-
-if CHAT_ID_STR:
-    print(f"   Chat ID value: '{CHAT_ID_STR}'")
-
-# Check for missing variables
-missing_vars = []
-if not TELEGRAM_BOT_TOKEN:
-    missing_vars.append("TELEGRAM_BOT_TOKEN")
-if not CHAT_ID_STR:
-    missing_vars.append("CHAT_ID")
-
-if missing_vars:
-    print(f"\n❌ Missing environment variables: {', '.join(missing_vars)}")
-    if IS_RENDER:
-        print("\n🔧 Render Setup Instructions:")
-        print("1. Go to your Render dashboard")
-        print("2. Click on your service")
-        print("3. Go to Environment tab")
-        print("4. Add these variables:")
-        for var in missing_vars:
-            if var == "TELEGRAM_BOT_TOKEN":
-                print(f"   {var} = your_bot_token_from_@BotFather")
-            elif var == "CHAT_ID":
-                print(f"   {var} = your_chat_id_number")
-        print("5. Save and redeploy")
-    else:
-        print("\n🔧 Local Setup Instructions:")
-        print("Create a .env file with:")
-        for var in missing_vars:
-            if var == "TELEGRAM_BOT_TOKEN":
-                print(f"{var}=your_bot_token")
-            elif var == "CHAT_ID":
-                print(f"{var}=your_chat_id")
-    
-    print(f"\n💡 After adding variables, restart the bot")
-    if not IS_RENDER:
-        input("Press Enter to exit...")
-    sys.exit(1)
-
-# Parse CHAT_ID
-try:
-    CHAT_ID = int(CHAT_ID_STR)
+def validate_environment() -> bool:
+    """Print the start-up banner and check the required variables - called by the entry points, not on import"""
+    print(f"🚀 Starting Zealy Bot - {'Render' if IS_RENDER else 'Local'} Mode")
+    print(f"📍 Working directory: {os.getcwd()}")
+    print(f"🐍 Python version: {sys.version}")
+    print("🔍 Loading environment variables...")
+    
+    print(f"✅ Environment Check:")
+    print(f"   IS_RENDER: {IS_RENDER}")
+    print(f"   BOT_TOKEN exists: {bool(TELEGRAM_BOT_TOKEN)}")
+    print(f"   CHAT_ID exists: {bool(CHAT_ID_STR)}")
+    
+    if TELEGRAM_BOT_TOKEN:
+        print(f"   Bot token length: {len(TELEGRAM_BOT_TOKEN)}")
+        print(f"   Bot token preview: {TELEGRAM_BOT_TOKEN[:10]}...")
+    
+    if CHAT_ID_STR:
+        print(f"   Chat ID value: '{CHAT_ID_STR}'")
+    
+    # Check for missing variables
+    missing_vars = []
+    if not TELEGRAM_BOT_TOKEN:
+        missing_vars.append("TELEGRAM_BOT_TOKEN")
+    if not CHAT_ID_STR:
+        missing_vars.append("CHAT_ID")
+    
+    if missing_vars:
+        print(f"\n❌ Missing environment variables: {', '.join(missing_vars)}")
+        if IS_RENDER:
+            print("\n🔧 Render Setup Instructions:")
+            print("1. Go to your Render dashboard")
+            print("2. Click on your service")
+            print("3. Go to Environment tab")
+            print("4. Add these variables:")
+            for var in missing_vars:
+                if var == "TELEGRAM_BOT_TOKEN":
+                    print(f"   {var} = your_bot_token_from_@BotFather")
+                elif var == "CHAT_ID":
+                    print(f"   {var} = your_chat_id_number")
+            print("5. Save and redeploy")
+        else:
+            print("\n🔧 Local Setup Instructions:")
+            print("Create a .env file with:")
+            for var in missing_vars:
+                if var == "TELEGRAM_BOT_TOKEN":
+                    print(f"{var}=your_bot_token")
+                elif var == "CHAT_ID":
+                    print(f"{var}=your_chat_id")
+        
+        print(f"\n💡 After adding variables, restart the bot")
+        return False
+    
+    # Parse CHAT_ID
+    if not CHAT_ID_STR.lstrip('-').isdigit():
+        print(f"❌ CHAT_ID must be a number, got: '{CHAT_ID_STR}'")
+        return False
     print(f"✅ Chat ID parsed: {CHAT_ID}")
-except ValueError:
-    print(f"❌ CHAT_ID must be a number, got: '{CHAT_ID_STR}'")
+    return True
+
+def exit_with_error():
     if not IS_RENDER:
         input("Press Enter to exit...")
     sys.exit(1)
 
-# Chrome setup
-print("🔧 Setting up Chrome...")
-try:
-    if not IS_RENDER:
-        chromedriver_autoinstaller.install()
-        print("✅ ChromeDriver installed")
-except Exception as e:
-    print(f"⚠️ ChromeDriver auto-install warning: {e}")
-
 # Configuration - GENEROUS timeouts for reliability
 CHECK_INTERVAL = 30
-MAX_URLS = 10
+MAX_URLS = 10  # Default per-chat quota
+MAX_TOTAL_URLS = int(os.getenv('MAX_TOTAL_URLS', '50'))  # Distinct boards fetched across all chats
+# Chats besides CHAT_ID (the admin) that may use the bot; OPEN_REGISTRATION lets anyone in
+ALLOWED_CHAT_IDS = {int(x) for x in os.getenv('ALLOWED_CHAT_IDS', '').replace(' ', '').split(',') if x.lstrip('-').isdigit()}
+OPEN_REGISTRATION = os.getenv('OPEN_REGISTRATION', 'false').lower() == 'true'
 ZEALY_CONTAINER_SELECTOR = "div.flex.flex-col.w-full.pt-100"
 REQUEST_TIMEOUT = 60  # Generous timeout
-MAX_RETRIES = 3  # More retries
-RETRY_DELAY_BASE = 5  # Longer delays
-FAILURE_THRESHOLD = 5
+MAX_RETRIES = 3  # Attempts per check, including the first
+RETRY_DELAY_BASE = 5  # First back-off delay, doubled per retry with jitter
+RETRY_DELAY_MAX = 30  # Cap on a single back-off delay
+CHECK_TIME_BUDGET = 180  # Max seconds one check may spend across all attempts
+
+# Circuit breaker - park URLs that keep failing instead of removing them
+BREAKER_FAILURE_THRESHOLD = 3  # Consecutive failed checks before a URL is parked
+BREAKER_BASE_COOLDOWN = 300  # First park lasts 5 minutes, doubling per trip
+BREAKER_MAX_COOLDOWN = 3600  # Longest park, also used for permanent errors
 PAGE_LOAD_TIMEOUT = 120  # 2 minutes for page load
 ELEMENT_WAIT_TIMEOUT = 30  # 30 seconds for elements
-REACT_WAIT_TIME = 8  # 8 seconds for React to load
+SELECTOR_FALLBACK_GRACE = 10  # Seconds before generic fallback selectors are accepted
+DOM_QUIET_WINDOW_MS = 1500  # Container counts as rendered after this long without DOM mutations
+DOM_STABLE_DEADLINE = 20  # Stop waiting for a quiet DOM after this many seconds
+PHASE_TIMING_HISTORY = 50  # Recent per-check timing records kept per URL for /status and /debug
+
+# Snapshot capture - save each fetch's extracted text (plus the page as "dom" or
+# "mhtml") for offline replay with benchmarks/snapshot_replay.py. Empty = off
+SNAPSHOT_DIR = os.getenv('SNAPSHOT_DIR', '')
+SNAPSHOT_ARTIFACT = os.getenv('SNAPSHOT_ARTIFACT', 'none').lower()
+SNAPSHOT_MAX_PER_URL = 200
+
+# Driver pool - keep warm Chrome sessions instead of launching one per check
+DRIVER_POOL_SIZE = 2  # Max Chrome sessions alive at once
+DRIVER_MAX_USES = 25  # Recycle a session after this many checks
+DRIVER_MAX_MEMORY_MB = 300  # Recycle a session whose browser tree grows past this
+DRIVER_ACQUIRE_TIMEOUT = 120  # Max seconds to wait for a free session
+
+# Fetch mode - "single" loads one page per browser check, "multitab" loads
+# up to MAX_TABS_PER_BROWSER URLs as tabs of one browser process
+FETCH_MODE = os.getenv('FETCH_MODE', 'single').lower()
+MAX_TABS_PER_BROWSER = 4
+
+# Fetch backend - "thread" runs Selenium in this process's executor, "process"
+# in a pool of isolated fetch worker processes, "cdp" drives one headless
+# Chrome over its DevTools WebSocket straight from the event loop
+FETCH_BACKEND = os.getenv('FETCH_BACKEND', 'thread').lower()
+FETCH_WORKERS = DRIVER_POOL_SIZE
+FETCH_WORKER_MAX_FETCHES = 50  # Recycle a fetch worker after this many fetches
+FETCH_WORKER_RECYCLE_MB = 350  # ... or when its process tree grows past this between fetches
+FETCH_WORKER_MEMORY_MB = 450  # Hard ceiling - cgroup memory.max where allowed, else killed by the watchdog
+FETCH_WORKER_START_TIMEOUT = 60
+# "cdp" needs asyncio subprocess support, so not the selector loop used on Windows
+CDP_MAX_TARGETS = int(os.getenv('CDP_MAX_TARGETS', '4'))  # Pages loading at once in the CDP browser
+CDP_MAX_FETCHES = 200  # Restart the CDP browser after this many page loads
+CDP_RECYCLE_MB = 400  # ... or once its process tree grows past this
+CDP_LAUNCH_TIMEOUT = 30  # Seconds for Chrome to open its DevTools endpoint
+if FETCH_BACKEND == "cdp":
+    FETCH_MODE = "single"  # CDP checks already share one browser as pages; multitab batching is Selenium-only
+
+# HTTP fast path - try plain HTTP before paying for a Chrome render
+HTTP_FIRST_ENABLED = os.getenv('HTTP_FIRST', 'true').lower() == 'true'
+HTTP_TIMEOUT = 15  # Seconds for one HTTP fetch
+HTTP_MAX_CONNECTIONS = 10  # Pooled keep-alive connections
+# Optional JSON endpoint the Zealy web app reads quests from, e.g.
+# "https://api.example/communities/{community}/quests". Empty = HTML only.
+ZEALY_API_URL_TEMPLATE = os.getenv('ZEALY_API_URL_TEMPLATE', '')
+FETCH_SOURCE_HTTP = "http"
+FETCH_SOURCE_BROWSER = "browser"
+
+# Adaptive per-URL intervals - CHECK_INTERVAL is where new URLs start
+MIN_CHECK_INTERVAL = 30  # Interval right after a detected change
+MAX_CHECK_INTERVAL = 900  # Ceiling for boards that have not changed in a long time
+INTERVAL_GROWTH = 1.5  # Interval multiplier after each check without a change
+SCHEDULER_TICK = 5  # Longest the scheduler sleeps between due-queue scans
+MONITOR_STOP_TIMEOUT = 30  # Seconds /stop and /run wait for a cancelled monitoring loop to clean up
+STATE_SAVE_DEBOUNCE = 5  # Seconds to coalesce state changes before writing them
+
+# Outbound Telegram queue
+TELEGRAM_API_BASE_URL = os.getenv('TELEGRAM_API_BASE_URL', 'https://api.telegram.org/bot')  # Point at a fake Bot API for testing
+TELEGRAM_MAX_MESSAGE_LENGTH = 4096
+CHAT_MESSAGES_PER_SECOND = 1.0  # Telegram's sustained per-chat limit
+CHAT_MESSAGE_BURST = 3
+DIGEST_WINDOW = 10  # Longest a change alert waits for the rest of its cycle
+SEND_MAX_ATTEMPTS = 3
+SEND_MAX_RETRY_AFTER = 5  # RetryAfter waits per message before it counts as failed
+SEND_RETRY_AFTER_BUDGET = 120  # Total seconds one message may spend waiting out RetryAfter
+SHUTDOWN_DRAIN_TIMEOUT = 15  # Seconds to deliver queued alerts before the bot exits
+
+# Network resource blocking - skip downloads the quest text does not need
+RESOURCE_BLOCKING_ENABLED = os.getenv('BLOCK_RESOURCES', 'true').lower() == 'true'
+DEFAULT_BLOCKED_URL_PATTERNS = [
+    # Images and media
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.avif", "*.svg", "*.ico",
+    "*.mp4", "*.webm", "*.mp3", "*.m3u8",
+    # Fonts
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*fonts.googleapis.com*", "*fonts.gstatic.com*",
+    # Analytics and trackers
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*", "*facebook.net*",
+    "*hotjar.com*", "*segment.io*", "*segment.com*", "*mixpanel.com*", "*amplitude.com*",
+    "*intercom.io*", "*clarity.ms*", "*sentry.io*", "*posthog.com*", "*datadoghq.com*"
+]
+
+# Concurrent checks - the live limit shrinks and grows with memory headroom
+MAX_CONCURRENT_CHECKS = CDP_MAX_TARGETS if FETCH_BACKEND == "cdp" else DRIVER_POOL_SIZE  # One pooled browser (or CDP page) per check in flight
+CHECK_MEMORY_ESTIMATE_MB = 120  # Headroom needed before admitting another check
 
 # Memory Management Configuration - FIXED FOR RENDER
 MEMORY_LIMIT_MB = 500  # Alert at 500MB (close to 512MB Render limit)
 MEMORY_WARNING_MB = 450  # Warning at 450MB
 MEMORY_CRITICAL_MB = 480  # Critical at 480MB
-MEMORY_CHECK_INTERVAL = 10  # Check memory every 10 seconds
-STATE_FILE = "bot_state.json"  # File to persist bot state
+MEMORY_CHECK_INTERVAL = 10  # Check memory every 10 seconds (polling fallback)
+PSI_TRIGGER = "some 150000 1000000"  # Wake on 150ms of memory stall within 1s
+PRESSURE_IDLE_INTERVAL = 30  # Re-sample interval when kernel events are available
+PRESSURE_ELEVATED_INTERVAL = 5  # Re-sample interval while above the warning level
+STATE_FILE = "bot_state.json"  # Legacy JSON state, migrated into STATE_DB_FILE on first load
+STATE_DB_FILE = "bot_state.db"  # SQLite (WAL) file to persist bot state
+MEMORY_SAMPLE_TTL = 1.0  # Seconds a whole-tree memory sample is reused
+CGROUP_ROOT = "/sys/fs/cgroup"  # cgroup v2 mount point
+
+# Metrics - Prometheus text format on http://METRICS_HOST:METRICS_PORT/metrics (unset = off)
+METRICS_PORT = int(os.getenv('METRICS_PORT', '0') or 0)
+METRICS_HOST = os.getenv('METRICS_HOST', '0.0.0.0')
+METRICS_LATENCY_BUCKETS = (0.25, 0.5, 1, 2, 3, 5, 7.5, 10, 15, 20, 30, 45, 60, 90, 120, 180)
+EVENT_LOOP_LAG_INTERVAL = 1.0  # Seconds between event loop lag probes
+
+# Sharding: one "frontend" runs the Telegram handlers, "worker"s split the checks.
+# "standalone" (default) does both in one process.
+SHARD_ROLE = os.getenv('ZEALY_ROLE', 'standalone').lower()
+WORKER_ID = os.getenv('WORKER_ID') or f"{socket.gethostname()}-{os.getpid()}"  # Set it to reap Chrome across restarts
+SHARD_HEARTBEAT_INTERVAL = 5  # Seconds between worker heartbeats / lease renewals
+SHARD_LEASE_TTL = 20  # A worker silent for this long is dead and its URLs move
+SHARD_VNODES = 64  # Points per worker on the consistent-hash ring
+SHARD_SYNC_INTERVAL = 10  # Seconds between re-reads of the shared URL registry
+OUTBOX_POLL_INTERVAL = 2  # Seconds between frontend polls for worker notifications
+
+_instance_suffix = f"-{WORKER_ID}" if SHARD_ROLE == "worker" else ""
+CHROME_REGISTRY_FILE = f"chrome_processes{_instance_suffix}.json"  # Chrome PIDs we spawned, for reaping after a crash
+PID_FILE = f"zealy_bot{_instance_suffix}.pid"  # PID of the running bot instance
+REAP_TIMEOUT = 5  # Seconds to wait for SIGTERM before SIGKILL
 
 # Set Chrome paths
 if IS_RENDER:
@@ -163,59 +357,477 @@ else:
     CHROME_PATH = '/usr/bin/google-chrome'
     CHROMEDRIVER_PATH = shutil.which('chromedriver') or '/usr/bin/chromedriver'
 
-def get_memory_usage():
-    """Get current memory usage in MB"""
+_browser_setup: Optional[threading.Thread] = None
+
+def setup_chromedriver():
+    """Local runs: install a chromedriver matching Chrome, then look for it on PATH"""
+    global CHROMEDRIVER_PATH
+    print("🔧 Setting up Chrome...")
+    try:
+        require("chromedriver")
+        chromedriver_autoinstaller.install()
+        print("✅ ChromeDriver installed")
+    except Exception as e:
+        print(f"⚠️ ChromeDriver auto-install warning: {e}")
+    
+    if not os.path.exists(CHROMEDRIVER_PATH):
+        chromedriver_in_path = shutil.which('chromedriver')
+        if chromedriver_in_path:
+            print(f"✅ Found Chromedriver in PATH: {chromedriver_in_path}")
+            CHROMEDRIVER_PATH = chromedriver_in_path
+
+def start_browser_setup():
+    """Import Selenium and install chromedriver on a background thread, off the start-up path"""
+    global _browser_setup
+    if _browser_setup is not None:
+        return
+    
+    def run():
+        try:
+            require("selenium")
+        except ImportError as e:
+            print(f"❌ {e}")
+        if not IS_RENDER:
+            setup_chromedriver()
+        print(f"⏱️ Browser stack ready {startup_elapsed():.2f}s after process start")
+    
+    _browser_setup = threading.Thread(target=run, name="browser-setup", daemon=True)
+    _browser_setup.start()
+
+def wait_for_browser_setup():
+    """Block until start_browser_setup() has finished (no-op if it was never started)"""
+    if _browser_setup is not None:
+        _browser_setup.join()
+
+@dataclass
+class MemorySnapshot:
+    python_mb: float  # The bot process alone (RSS)
+    tree_mb: float  # Bot process plus every descendant (chromedriver, Chrome)
+    process_count: int
+    metric: str  # pss / uss / rss - best figure psutil could read
+    cgroup_current_mb: Optional[float] = None  # Container memory.current
+    cgroup_working_set_mb: Optional[float] = None  # memory.current minus inactive file cache
+    cgroup_max_mb: Optional[float] = None  # Container memory.max (None = unlimited/unknown)
+    effective_mb: float = 0.0  # The figure thresholds act on
+    timestamp: float = 0.0
+
+_memory_snapshot: Optional[MemorySnapshot] = None
+_memory_snapshot_lock = threading.Lock()
+_memory_refresh_thread: Optional[threading.Thread] = None
+_memory_refresh_lock = threading.Lock()  # Not the sampling lock - taking that would wait for a sample
+_cgroup_dir: Optional[str] = None
+
+def find_cgroup_dir() -> Optional[str]:
+    """Locate this process's cgroup v2 directory, if the memory controller is visible"""
+    global _cgroup_dir
+    if _cgroup_dir is not None:
+        return _cgroup_dir or None
+    _cgroup_dir = ""
+    try:
+        with open("/proc/self/cgroup") as f:
+            for line in f:
+                if line.startswith("0::"):
+                    path = os.path.join(CGROUP_ROOT, line.strip()[3:].lstrip("/"))
+                    for candidate in (path, CGROUP_ROOT):
+                        if os.path.exists(os.path.join(candidate, "memory.current")):
+                            _cgroup_dir = candidate
+                            break
+                    break
+    except OSError:
+        pass
+    return _cgroup_dir or None
+
+def read_cgroup_memory() -> Tuple[Optional[float], Optional[float], Optional[float]]:
+    """Return (memory.current, working set, memory.max) in MB for our cgroup v2, or Nones"""
+    cgroup_dir = find_cgroup_dir()
+    if not cgroup_dir:
+        return None, None, None
+    try:
+        with open(os.path.join(cgroup_dir, "memory.current")) as f:
+            current = int(f.read().strip())
+        limit = None
+        max_path = os.path.join(cgroup_dir, "memory.max")
+        if os.path.exists(max_path):
+            with open(max_path) as f:
+                value = f.read().strip()
+                limit = None if value == "max" else int(value) / 1024 / 1024
+        inactive_file = 0
+        stat_path = os.path.join(cgroup_dir, "memory.stat")
+        if os.path.exists(stat_path):
+            with open(stat_path) as f:
+                for line in f:
+                    if line.startswith("inactive_file "):
+                        inactive_file = int(line.split()[1])
+                        break
+        return current / 1024 / 1024, max(current - inactive_file, 0) / 1024 / 1024, limit
+    except (OSError, ValueError) as e:
+        print(f"⚠️ Error reading cgroup memory: {e}")
+        return None, None, None
+
+def process_memory_mb(proc) -> Tuple[float, str]:
+    """PSS of one process in MB, falling back to USS and then RSS"""
     try:
+        info = proc.memory_full_info()
+        if getattr(info, "pss", None):
+            return info.pss / 1024 / 1024, "pss"
+        return info.uss / 1024 / 1024, "uss"
+    except (psutil.AccessDenied, AttributeError, NotImplementedError):
+        return proc.memory_info().rss / 1024 / 1024, "rss"
+
+def process_tree_memory_mb(root) -> Tuple[float, int, str]:
+    """Sum memory over a process and all of its descendants: (MB, process count, metric)"""
+    total, metric = process_memory_mb(root)
+    count = 1
+    for child in root.children(recursive=True):
+        try:
+            child_mb, child_metric = process_memory_mb(child)
+            total += child_mb
+            count += 1
+            if child_metric != metric:
+                metric = "mixed"
+        except (psutil.NoSuchProcess, psutil.ZombieProcess):
+            continue
+    return total, count, metric
+
+def get_memory_snapshot(max_age: float = MEMORY_SAMPLE_TTL) -> MemorySnapshot:
+    """Whole-tree memory picture, reused for max_age seconds since PSS reads walk smaps"""
+    require("psutil")
+    global _memory_snapshot
+    with _memory_snapshot_lock:
+        if _memory_snapshot and time.time() - _memory_snapshot.timestamp < max_age:
+            return _memory_snapshot
         process = psutil.Process(os.getpid())
-        memory_mb = process.memory_info().rss / 1024 / 1024
-        return memory_mb
+        python_mb = process.memory_info().rss / 1024 / 1024
+        tree_mb, process_count, metric = process_tree_memory_mb(process)
+        current_mb, working_set_mb, max_mb = read_cgroup_memory()
+        effective_mb = tree_mb if working_set_mb is None else max(tree_mb, working_set_mb)
+        _memory_snapshot = MemorySnapshot(
+            python_mb=python_mb,
+            tree_mb=tree_mb,
+            process_count=process_count,
+            metric=metric,
+            cgroup_current_mb=current_mb,
+            cgroup_working_set_mb=working_set_mb,
+            cgroup_max_mb=max_mb,
+            effective_mb=effective_mb,
+            timestamp=time.time()
+        )
+        return _memory_snapshot
+
+def latest_memory_snapshot() -> MemorySnapshot:
+    """The last sample without blocking - what event-loop code reads.
+    
+    Sampling walks /proc (smaps for PSS) for every Chrome process, so a sample
+    older than MEMORY_SAMPLE_TTL is retaken on a background thread for the
+    next reader instead of on the caller's thread.
+    """
+    global _memory_refresh_thread
+    snapshot = _memory_snapshot
+    if snapshot is None:
+        return get_memory_snapshot()  # The very first reading, taken at start-up
+    if time.time() - snapshot.timestamp >= MEMORY_SAMPLE_TTL:
+        with _memory_refresh_lock:
+            if _memory_refresh_thread is None or not _memory_refresh_thread.is_alive():
+                _memory_refresh_thread = threading.Thread(
+                    target=get_memory_snapshot, args=(0,), name="memory-sample", daemon=True
+                )
+                _memory_refresh_thread.start()
+    return snapshot
+
+def get_memory_usage():
+    """Get current memory usage in MB - the bot's whole process tree, or the container's
+    working set when cgroup v2 accounting is available, whichever is higher.
+    Never blocks on a fresh sample; see latest_memory_snapshot()"""
+    try:
+        return latest_memory_snapshot().effective_mb
     except Exception as e:
         print(f"⚠️ Error getting memory usage: {e}")
         return 0
 
-def save_bot_state():
-    """Save current bot state to file with auto-restart flag"""
-    try:
-        state = {
-            "monitored_urls": {},
-            "is_monitoring": is_monitoring,
-            "timestamp": time.time(),
-            "auto_restart": is_monitoring  # Save monitoring state for auto-restart
+class StateStore:
+    """Incremental bot state persistence in SQLite (WAL mode).
+    
+    Callers mark the URLs they changed; only those rows are written, in one
+    transaction, after STATE_SAVE_DEBOUNCE seconds of coalescing. A sharded
+    frontend only ever inserts new rows and updates the fields its edits
+    name, so its stale copy of check results never replaces the workers'. Rows are
+    serialized on the caller's thread and written by a single writer thread,
+    so writes land in the order they were collected and never block the loop.
+    A crash leaves the last committed transaction intact.
+    """
+    
+    def __init__(self, path: str, debounce: float):
+        self.path = path
+        self.debounce = debounce
+        self._conn: Optional[sqlite3.Connection] = None
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="state-writer")
+        self._dirty: Dict[str, Optional[set]] = {}  # url -> changed fields, None = whole row
+        self._dirty_chats: set = set()
+        self._dirty_lock = threading.Lock()
+        self._flush_handle = None
+        self.writes = 0
+        self.rows_written = 0
+        # Workers only update check results of existing URLs; the frontend owns the registry
+        self.owns_registry = SHARD_ROLE != "worker"
+        self.field_updates = SHARD_ROLE == "frontend"
+    
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=10)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS urls (url TEXT PRIMARY KEY, data TEXT NOT NULL)")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS chats (chat_id INTEGER PRIMARY KEY, data TEXT NOT NULL)")
+            self._conn.commit()
+        return self._conn
+    
+    def mark_dirty(self, urls, chats=(), fields=None):
+        """Queue URLs (all fields, or only `fields`) and chats for the next write"""
+        with self._dirty_lock:
+            for url in urls:
+                if fields is None:
+                    self._dirty[url] = None
+                elif url not in self._dirty:
+                    self._dirty[url] = set(fields)
+                elif self._dirty[url] is not None:
+                    self._dirty[url].update(fields)
+            self._dirty_chats.update(chats)
+    
+    def _collect(self) -> Tuple[Dict[str, Optional[str]], Dict[str, str], Dict[int, Optional[str]], Dict[str, Dict[str, str]]]:
+        """Serialize dirty URLs and chats now; None marks one that was removed.
+        Field-level changes come back separately as url -> {field: JSON value}"""
+        with self._dirty_lock:
+            dirty, self._dirty = self._dirty, {}
+            dirty_chats, self._dirty_chats = self._dirty_chats, set()
+        rows, patches = {}, {}
+        for url, fields in dirty.items():
+            url_data = monitored_urls.get(url)
+            if url_data is None:
+                rows[url] = None
+            elif fields is not None and self.field_updates:
+                patches[url] = {field: json.dumps(getattr(url_data, field)) for field in fields}
+            else:
+                rows[url] = json.dumps(asdict(url_data))
+        chat_rows = {}
+        for chat_id in dirty_chats:
+            if chat_id in chat_settings:
+                chat_rows[chat_id] = json.dumps({
+                    "settings": asdict(chat_settings[chat_id]),
+                    "subscriptions": {url: asdict(sub) for url, sub in subscriptions.get(chat_id, {}).items()},
+                })
+            else:
+                chat_rows[chat_id] = None
+        meta = {
+            "is_monitoring": json.dumps(is_monitoring),
+            "auto_restart": json.dumps(is_monitoring),  # Save monitoring state for auto-restart
+            "timestamp": json.dumps(time.time()),
         }
+        return rows, meta, chat_rows, patches
+    
+    def _write(self, rows: Dict[str, Optional[str]], meta: Dict[str, str], chat_rows: Dict[int, Optional[str]] = None,
+               patches: Dict[str, Dict[str, str]] = None):
+        conn = self._connect()
+        chat_rows = chat_rows or {}
+        patches = patches or {}
+        if not self.owns_registry:
+            with conn:
+                # Never resurrect a removed URL or undo a newer edit made by the frontend
+                conn.executemany(
+                    "UPDATE urls SET data = ? WHERE url = ? AND COALESCE(json_extract(data, '$.config_revision'), 0) <= ?",
+                    [(data, url, json.loads(data).get("config_revision", 0)) for url, data in rows.items() if data is not None]
+                )
+                # Alert rate limits are the one chat field a worker changes - merge just
+                # last_notified, so whoever owns the URL next sees when it last alerted
+                conn.executemany(
+                    "UPDATE chats SET data = json_set(data, ?, MAX(COALESCE(json_extract(data, ?), 0), ?)) "
+                    "WHERE chat_id = ? AND json_extract(data, ?) IS NOT NULL",
+                    [(f"{path}.last_notified", f"{path}.last_notified", sub["last_notified"], chat_id, path)
+                     for chat_id, data in chat_rows.items() if data is not None
+                     for url, sub in json.loads(data)["subscriptions"].items() if sub.get("last_notified")
+                     for path in [f'$.subscriptions."{url}"']]
+                )
+            self.writes += 1
+            self.rows_written += len(rows) + len(chat_rows)
+            return
+        with conn:
+            # The frontend's rows go stale between registry syncs: it adds URLs but
+            # changes existing ones field by field
+            conn.executemany(
+                f"INSERT OR {'IGNORE' if self.field_updates else 'REPLACE'} INTO urls (url, data) VALUES (?, ?)",
+                [(url, data) for url, data in rows.items() if data is not None]
+            )
+            conn.executemany(
+                "UPDATE urls SET data = json_set(data, ?, json(?)) WHERE url = ?",
+                [(f"$.{field}", value, url) for url, fields in patches.items() for field, value in fields.items()]
+            )
+            conn.executemany("DELETE FROM urls WHERE url = ?", [(url,) for url, data in rows.items() if data is None])
+            conn.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", list(meta.items()))
+            conn.executemany(
+                "INSERT OR REPLACE INTO chats (chat_id, data) VALUES (?, ?)",
+                [(chat_id, self._keep_last_notified(conn, chat_id, data)) for chat_id, data in chat_rows.items() if data is not None]
+            )
+            conn.executemany("DELETE FROM chats WHERE chat_id = ?", [(c,) for c, data in chat_rows.items() if data is None])
+        self.writes += 1
+        self.rows_written += len(rows) + len(patches) + len(chat_rows)
+    
+    @staticmethod
+    def _keep_last_notified(conn: sqlite3.Connection, chat_id: int, data: str) -> str:
+        """Chat row to store, keeping any later last_notified a worker already wrote"""
+        stored = conn.execute("SELECT data FROM chats WHERE chat_id = ?", (chat_id,)).fetchone()
+        if stored is None:
+            return data
+        stored_subs = json.loads(stored[0]).get("subscriptions", {})
+        chat = json.loads(data)
+        for url, sub in chat.get("subscriptions", {}).items():
+            if url in stored_subs:
+                sub["last_notified"] = max(sub.get("last_notified", 0), stored_subs[url].get("last_notified", 0))
+        return json.dumps(chat)
+    
+    def flush(self):
+        """Write pending changes now and wait for them to be committed"""
+        self._cancel_pending()
+        rows, meta, chat_rows, patches = self._collect()
+        self._writer.submit(self._write, rows, meta, chat_rows, patches).result()
+        return len(rows) + len(patches)
+    
+    async def flush_async(self):
+        """Write pending changes from inside the loop - the commit waits on the writer thread, not the loop"""
+        self._cancel_pending()
+        rows, meta, chat_rows, patches = self._collect()
+        await asyncio.get_running_loop().run_in_executor(self._writer, self._write, rows, meta, chat_rows, patches)
+        return len(rows) + len(patches)
+    
+    def schedule_flush(self, loop: asyncio.AbstractEventLoop):
+        """Coalesce changes for STATE_SAVE_DEBOUNCE seconds, then write them off the loop"""
+        if self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.debounce, self._start_flush, loop)
+    
+    def flush_soon(self, loop: asyncio.AbstractEventLoop):
+        """Skip the debounce window and start writing now, still off the loop"""
+        self._cancel_pending()
+        self._start_flush(loop, announce=True)
+    
+    def _start_flush(self, loop: asyncio.AbstractEventLoop, announce: bool = False):
+        self._flush_handle = None
+        task = loop.create_task(self.flush_async())
         
-        # Convert URLData objects to dictionaries
-        for url, url_data in monitored_urls.items():
-            state["monitored_urls"][url] = asdict(url_data)
+        def done(t: asyncio.Task):
+            if t.cancelled():
+                return
+            if t.exception() is not None:
+                print(f"❌ Error saving bot state: {t.exception()}")
+            elif announce:
+                print(f"💾 Bot state saved - {t.result()} changed of {len(monitored_urls)} URLs, monitoring: {is_monitoring}")
+        task.add_done_callback(done)
+    
+    def _cancel_pending(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+    
+    def load(self) -> Tuple[Dict[str, dict], Dict[str, object], Dict[int, dict]]:
+        """Read every URL row, the meta table and every chat"""
+        conn = self._connect()
+        urls = {url: json.loads(data) for url, data in conn.execute("SELECT url, data FROM urls")}
+        meta = {key: json.loads(value) for key, value in conn.execute("SELECT key, value FROM meta")}
+        chats = {chat_id: json.loads(data) for chat_id, data in conn.execute("SELECT chat_id, data FROM chats")}
+        return urls, meta, chats
+    
+    def import_legacy(self, state: dict):
+        """One-off import of a bot_state.json snapshot"""
+        rows = {url: json.dumps(data) for url, data in state.get("monitored_urls", {}).items()}
+        meta = {key: json.dumps(state.get(key, False)) for key in ("is_monitoring", "auto_restart")}
+        meta["timestamp"] = json.dumps(state.get("timestamp", time.time()))
+        self._writer.submit(self._write, rows, meta).result()
+
+state_store = StateStore(STATE_DB_FILE, STATE_SAVE_DEBOUNCE)
+
+def save_bot_state(urls=(), immediate: bool = False, chats=(), fields=None):
+    """Persist the given changed URLs and chats (plus the monitoring flags).
+    
+    Writes are debounced and done off the event loop. immediate=True skips
+    the debounce (user edits, or the process may be about to die); the write
+    still runs on the writer thread. Without a running loop (shutdown) the
+    changes are written synchronously. Edits that touch only some URLData
+    fields name them in `fields`, so a frontend writes nothing else.
+    """
+    try:
+        state_store.mark_dirty(urls, chats, fields)
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
         
-        with open(STATE_FILE, 'w') as f:
-            json.dump(state, f, indent=2)
-        print(f"💾 Bot state saved - {len(monitored_urls)} URLs, monitoring: {is_monitoring}")
+        if loop is None:
+            written = state_store.flush()
+            print(f"💾 Bot state saved - {written} changed of {len(monitored_urls)} URLs, monitoring: {is_monitoring}")
+        elif immediate:
+            state_store.flush_soon(loop)
+        else:
+            state_store.schedule_flush(loop)
         return True
     except Exception as e:
         print(f"❌ Error saving bot state: {e}")
         return False
 
 def load_bot_state():
-    """Load bot state from file and return auto-restart flag"""
+    """Load bot state from the store and return auto-restart flag"""
     global monitored_urls, is_monitoring
     try:
-        if not os.path.exists(STATE_FILE):
+        if not os.path.exists(STATE_DB_FILE) and os.path.exists(STATE_FILE):
+            with open(STATE_FILE, 'r') as f:
+                state_store.import_legacy(json.load(f))
+            os.replace(STATE_FILE, STATE_FILE + ".migrated")
+            print(f"📦 Migrated {STATE_FILE} into {STATE_DB_FILE}")
+        
+        if not os.path.exists(STATE_DB_FILE):
             print("📁 No previous state file found, starting fresh")
             return False
         
-        with open(STATE_FILE, 'r') as f:
-            state = json.load(f)
+        started = time.perf_counter()
+        urls, meta, chats = state_store.load()
         
-        # Restore monitored URLs
+        # Restore monitored URLs under their canonical key, ignoring fields dropped since the row was written
+        known_fields = set(URLData.__dataclass_fields__)
         monitored_urls.clear()
-        for url, url_data_dict in state.get("monitored_urls", {}).items():
-            monitored_urls[url] = URLData(**url_data_dict)
+        rekeyed = set()
+        for url, url_data_dict in urls.items():
+            key = canonical_url(url)
+            url_data = URLData(**{k: v for k, v in url_data_dict.items() if k in known_fields})
+            if key != url:
+                rekeyed.update((url, key))
+            if key in monitored_urls and monitored_urls[key].check_count >= url_data.check_count:
+                continue
+            monitored_urls[key] = url_data
+            selector_resolver.remember(key, url_data.preferred_selector)
+        
+        chat_settings.clear()
+        subscriptions.clear()
+        for chat_id, chat in chats.items():
+            chat_settings[chat_id] = ChatSettings(**chat.get("settings", {}))
+            subscriptions[chat_id] = {
+                canonical_url(url): Subscription(**sub) for url, sub in chat.get("subscriptions", {}).items()
+            }
+        
+        pruned = prune_orphan_subscriptions()
+        
+        # State from the single-chat bot: everything belonged to CHAT_ID
+        if not chats and monitored_urls:
+            for idx, url in enumerate(monitored_urls):
+                subscriptions.setdefault(CHAT_ID, {})[url] = Subscription(added_at=idx)
+            get_chat_settings(CHAT_ID)
+            print(f"👥 Subscribed chat {CHAT_ID} to {len(monitored_urls)} existing URLs")
+        if rekeyed or pruned or (not chats and monitored_urls):
+            state_store.mark_dirty(rekeyed, chat_settings.keys())
+            state_store.flush()
         
         # Check if we should auto-restart monitoring
-        should_auto_restart = state.get("auto_restart", False)
+        should_auto_restart = meta.get("auto_restart", False)
         is_monitoring = False  # Always start as stopped, will be restarted if needed
         
-        print(f"📁 Restored {len(monitored_urls)} URLs from previous session")
+        print(f"📁 Restored {len(monitored_urls)} URLs for {len(chat_settings)} chats from previous session "
+              f"in {(time.perf_counter() - started) * 1000:.0f}ms")
         if should_auto_restart and len(monitored_urls) > 0:
             print("🔄 Auto-restart monitoring will be scheduled")
         elif len(monitored_urls) > 0:
@@ -231,93 +843,271 @@ def cleanup_memory():
     try:
         print("🧹 Performing memory cleanup...")
         
+        # Drop warm Chrome sessions first - they are the bulk of our memory
+        driver_pool.close_idle()
+        
         # Force garbage collection
         collected = gc.collect()
         print(f"🗑️ Garbage collected: {collected} objects")
         
-        # Clear any Chrome processes that might be hanging
+        # Reap Chrome processes we spawned whose driver is gone - never other sessions
         try:
-            for proc in psutil.process_iter(['pid', 'name']):
-                if 'chrome' in proc.info['name'].lower() or 'chromium' in proc.info['name'].lower():
-                    try:
-                        proc.kill()
-                        print(f"🔪 Killed hanging Chrome process: {proc.info['pid']}")
-                    except (psutil.NoSuchProcess, psutil.AccessDenied):
-                        pass
+            chrome_registry.reap_orphans()
         except Exception as e:
             print(f"⚠️ Error cleaning Chrome processes: {e}")
         
-        memory_after = get_memory_usage()
+        memory_after = get_memory_snapshot(max_age=0).effective_mb
         print(f"📊 Memory after cleanup: {memory_after:.1f}MB")
         
     except Exception as e:
         print(f"❌ Error during memory cleanup: {e}")
 
-async def memory_monitor():
-    """Background task to monitor memory usage - ALERT ONLY (no restart)"""
-    global is_monitoring
+PRESSURE_NORMAL = "normal"
+PRESSURE_WARNING = "warning"
+PRESSURE_CRITICAL = "critical"
+PRESSURE_ALERT = "alert"
+PRESSURE_LEVELS = [PRESSURE_NORMAL, PRESSURE_WARNING, PRESSURE_CRITICAL, PRESSURE_ALERT]
+
+def classify_memory_pressure(memory_mb: float) -> str:
+    """Map a memory figure onto the warning/critical/alert thresholds"""
+    if memory_mb > MEMORY_LIMIT_MB:
+        return PRESSURE_ALERT
+    if memory_mb > MEMORY_CRITICAL_MB:
+        return PRESSURE_CRITICAL
+    if memory_mb > MEMORY_WARNING_MB:
+        return PRESSURE_WARNING
+    return PRESSURE_NORMAL
+
+class MemoryPressureWatcher:
+    """Publishes memory pressure level transitions to subscribers.
     
-    while True:
-        try:
-            memory_mb = get_memory_usage()
-            
-            # ALERT at 500MB (close to 512MB Render limit)
-            if memory_mb > MEMORY_LIMIT_MB:
-                print(f"🚨 MEMORY ALERT: {memory_mb:.1f}MB > {MEMORY_LIMIT_MB}MB")
-                print("⚠️ Render will restart soon! Saving state...")
-                
-                # Save current state immediately
-                save_bot_state()
-                
-                # Send alert notification
+    Where the kernel allows it, a thread blocks in poll() on a cgroup v2 PSI
+    trigger (memory.pressure) and on memory.events, and wakes the watcher as
+    soon as either fires. Otherwise it falls back to polling. Either way the
+    level is re-sampled every PRESSURE_IDLE_INTERVAL (or
+    PRESSURE_ELEVATED_INTERVAL above normal), since the thresholds sit below
+    the point where the kernel reports anything.
+    Subscribers are called as callback(old_level, new_level, memory_mb) and
+    may be coroutines.
+    """
+    
+    def __init__(self):
+        self.level = PRESSURE_NORMAL
+        self.backend = "polling"
+        self.transitions = 0
+        self.events = 0
+        self._subscribers = []
+        self._task: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop_thread = threading.Event()
+        self._files = []
+        self._files_lock = threading.Lock()  # stop() closes the files the poll thread reads
+    
+    def subscribe(self, callback):
+        if callback not in self._subscribers:
+            self._subscribers.append(callback)
+    
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+    
+    def start(self):
+        """Start the watcher once - repeated calls are no-ops"""
+        if self.running:
+            return
+        self._wake = asyncio.Event()
+        self._stop_thread = threading.Event()
+        self._open_event_sources(asyncio.get_running_loop())
+        self._task = asyncio.create_task(self._run())
+        print(f"📟 Memory pressure watcher started ({self.backend})")
+    
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        self._stop_thread.set()
+        with self._files_lock:
+            for f in self._files:
                 try:
-                    from telegram import Bot
-                    bot = Bot(token=TELEGRAM_BOT_TOKEN)
-                    await bot.send_message(
-                        chat_id=CHAT_ID, 
-                        text=f"🚨 MEMORY ALERT!\nMemory: {memory_mb:.1f}MB (Render limit: 512MB)\nRender will restart bot soon.\nState saved - URLs will be restored automatically!"
-                    )
-                except Exception as e:
-                    print(f"⚠️ Could not send memory alert: {e}")
-            
-            # CRITICAL WARNING at 480MB
-            elif memory_mb > MEMORY_CRITICAL_MB:
-                print(f"🔴 CRITICAL: {memory_mb:.1f}MB > {MEMORY_CRITICAL_MB}MB - Render restart imminent!")
-                # Save state frequently when critical
-                save_bot_state()
-                await asyncio.sleep(5)  # Check every 5 seconds when critical
-                continue
-            
-            # WARNING at 450MB  
-            elif memory_mb > MEMORY_WARNING_MB:
-                print(f"🟡 WARNING: {memory_mb:.1f}MB > {MEMORY_WARNING_MB}MB")
-                # Perform light cleanup
-                gc.collect()
-                await asyncio.sleep(8)  # Check more frequently
+                    f.close()
+                except OSError:
+                    pass
+            self._files = []
+        self._thread = None
+    
+    def _open_event_sources(self, loop):
+        """Register a PSI trigger and memory.events with poll(), if the kernel lets us"""
+        cgroup_dir = find_cgroup_dir()
+        if not cgroup_dir or not hasattr(select, "poll"):
+            self.backend = "polling"
+            return
+        
+        poller = select.poll()
+        sources = []
+        try:
+            psi = open(os.path.join(cgroup_dir, "memory.pressure"), "r+b", buffering=0)
+            psi.write(PSI_TRIGGER.encode() + b"\0")
+            poller.register(psi, select.POLLPRI)
+            self._files.append(psi)
+            sources.append("psi")
+        except OSError as e:
+            print(f"⚠️ PSI trigger unavailable: {e}")
+        try:
+            events = open(os.path.join(cgroup_dir, "memory.events"), "rb", buffering=0)
+            events.read()
+            poller.register(events, select.POLLPRI | select.POLLERR)
+            self._files.append(events)
+            sources.append("memory.events")
+        except OSError as e:
+            print(f"⚠️ memory.events unavailable: {e}")
+        
+        if not sources:
+            self.backend = "polling"
+            return
+        
+        self.backend = "+".join(sources)
+        self._thread = threading.Thread(
+            target=self._poll_events, args=(poller, loop, self._stop_thread, self._wake), daemon=True
+        )
+        self._thread.start()
+    
+    def _poll_events(self, poller, loop, stop: threading.Event, wake: asyncio.Event):
+        while not stop.is_set():
+            try:
+                ready = poller.poll(1000)
+            except (OSError, ValueError):
+                break
+            if not ready or stop.is_set():
                 continue
-            
-            # Normal check interval
-            await asyncio.sleep(MEMORY_CHECK_INTERVAL)
-            
-        except Exception as e:
-            print(f"❌ Error in memory monitor: {e}")
-            await asyncio.sleep(10)
+            if any(mask & select.POLLNVAL for _, mask in ready):
+                break
+            with self._files_lock:
+                if stop.is_set():
+                    break
+                try:
+                    for fd, _ in ready:
+                        # memory.events must be re-read to re-arm the notification
+                        for f in self._files:
+                            if f.fileno() == fd and f.name.endswith("memory.events"):
+                                f.seek(0)
+                                f.read()
+                except (OSError, ValueError):
+                    break
+            self.events += 1
+            try:
+                loop.call_soon_threadsafe(wake.set)
+            except RuntimeError:
+                break  # Loop closed under us
+    
+    async def _run(self):
+        while True:
+            try:
+                interval = PRESSURE_IDLE_INTERVAL if self.backend != "polling" else MEMORY_CHECK_INTERVAL
+                if self.level != PRESSURE_NORMAL:
+                    interval = PRESSURE_ELEVATED_INTERVAL
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wake.clear()
+                
+                snapshot = await asyncio.get_running_loop().run_in_executor(None, get_memory_snapshot, 0)
+                memory_mb = snapshot.effective_mb
+                await self._publish(classify_memory_pressure(memory_mb), memory_mb)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"❌ Error in memory pressure watcher: {e}")
+                await asyncio.sleep(10)
+    
+    async def _publish(self, new_level: str, memory_mb: float):
+        if new_level == self.level:
+            return
+        old_level, self.level = self.level, new_level
+        self.transitions += 1
+        print(f"📟 Memory pressure {old_level} -> {new_level} ({memory_mb:.1f}MB)")
+        for callback in list(self._subscribers):
+            try:
+                result = callback(old_level, new_level, memory_mb)
+                if asyncio.iscoroutine(result):
+                    await result
+            except Exception as e:
+                print(f"⚠️ Memory pressure subscriber failed: {e}")
+
+memory_pressure_watcher = MemoryPressureWatcher()
+
+def on_pressure_save_state(old_level: str, new_level: str, memory_mb: float):
+    """State saver: persist as soon as memory goes critical"""
+    if PRESSURE_LEVELS.index(new_level) >= PRESSURE_LEVELS.index(PRESSURE_CRITICAL):
+        print(f"🔴 {new_level.upper()}: {memory_mb:.1f}MB - Render restart may be imminent, saving state")
+        save_bot_state(immediate=True)
+
+def light_cleanup():
+    """Quit idle Chrome sessions and collect garbage - blocking (driver.quit, reaping), so run it in an executor"""
+    driver_pool.close_idle()
+    gc.collect()
+
+async def on_pressure_cleanup(old_level: str, new_level: str, memory_mb: float):
+    """Drop idle Chrome sessions once memory passes the warning threshold"""
+    if new_level != PRESSURE_NORMAL:
+        print(f"🟡 {new_level.upper()}: {memory_mb:.1f}MB > {MEMORY_WARNING_MB}MB - light cleanup")
+        await asyncio.get_running_loop().run_in_executor(None, light_cleanup)
+
+def make_pressure_alert_subscriber(bot):
+    """Telegram alert when memory crosses MEMORY_LIMIT_MB - ALERT ONLY (no restart)"""
+    async def on_pressure_alert(old_level: str, new_level: str, memory_mb: float):
+        if new_level != PRESSURE_ALERT:
+            return
+        print(f"🚨 MEMORY ALERT: {memory_mb:.1f}MB > {MEMORY_LIMIT_MB}MB")
+        print("⚠️ Render will restart soon! State saved.")
+        await send_notification(
+            bot,
+            f"🚨 MEMORY ALERT!\nMemory: {memory_mb:.1f}MB (Render limit: 512MB)\nRender will restart bot soon.\nState saved - URLs will be restored automatically!",
+            priority=True
+        )
+    return on_pressure_alert
+
+async def on_pressure_scheduler(old_level: str, new_level: str, memory_mb: float):
+    """Scheduler: resize check concurrency right away and wake waiting checks"""
+    await concurrency_limiter.refresh(memory_mb)
+
+def start_memory_watcher(bot):
+    """Start the single memory pressure watcher with the default subscribers"""
+    memory_pressure_watcher.subscribe(on_pressure_save_state)
+    memory_pressure_watcher.subscribe(on_pressure_cleanup)
+    memory_pressure_watcher.subscribe(on_pressure_scheduler)
+    if not any(getattr(callback, "__name__", "") == "on_pressure_alert" for callback in memory_pressure_watcher._subscribers):
+        memory_pressure_watcher.subscribe(make_pressure_alert_subscriber(bot))
+    memory_pressure_watcher.start()
 
 async def auto_start_monitoring(application):
     """Auto-start monitoring if there are URLs and it was previously running"""
     global is_monitoring
     
+    if SHARD_ROLE == "frontend":
+        is_monitoring = True
+        save_bot_state(immediate=True)
+        print("🔄 Workers will resume monitoring")
+        await send_notification(
+            application.bot,
+            f"🔄 BOT AUTO-RESTARTED\n"
+            f"Restored {len(monitored_urls)} URLs\n"
+            f"Monitoring resumed on the workers"
+        )
+        return
+    
     if len(monitored_urls) > 0 and not is_monitoring:
         print(f"🔄 Auto-starting monitoring for {len(monitored_urls)} URLs...")
         
         try:
             is_monitoring = True
             
-            # Start memory monitor task
-            memory_task = asyncio.create_task(memory_monitor())
+            # Start the (single) memory pressure watcher
+            start_memory_watcher(application.bot)
             
-            # Start monitoring task  
-            monitor_task = asyncio.create_task(start_monitoring(application.bot))
+            # Start monitoring task
+            start_monitor_task(application)
             
             # Send notification about auto-restart
             await send_notification(
@@ -347,69 +1137,91 @@ async def auto_start_monitoring(application):
                 pass
 
 def kill_previous_instances():
-    """Kill any previous bot instances"""
+    """Kill the previous bot instance recorded in PID_FILE and reap the Chrome it left behind"""
+    require("psutil")
     current_pid = os.getpid()
     try:
-        for proc in psutil.process_iter(['pid', 'name', 'cmdline']):
-            try:
-                if 'python' in proc.info['name'].lower():
-                    cmdline = ' '.join(proc.info['cmdline'])
-                    if 'zealy' in cmdline.lower() and proc.info['pid'] != current_pid:
-                        print(f"🚨 Killing previous instance (PID: {proc.info['pid']})")
-                        proc.kill()
-            except (psutil.NoSuchProcess, psutil.AccessDenied, AttributeError):
-                continue
+        if os.path.exists(PID_FILE):
+            with open(PID_FILE, 'r') as f:
+                previous = json.load(f)
+            pid = previous.get('pid')
+            if pid and pid != current_pid:
+                try:
+                    proc = psutil.Process(pid)
+                    if abs(proc.create_time() - previous.get('create_time', 0)) < 1:
+                        print(f"🚨 Killing previous instance (PID: {pid})")
+                        proc.terminate()
+                        _, alive = psutil.wait_procs([proc], timeout=REAP_TIMEOUT)
+                        for leftover in alive:
+                            leftover.kill()
+                except (psutil.NoSuchProcess, psutil.AccessDenied):
+                    pass
     except Exception as e:
         print(f"Warning: Error checking previous instances: {e}")
+    
+    try:
+        chrome_registry.load_previous()
+        chrome_registry.reap_orphans()
+    except Exception as e:
+        print(f"Warning: Error reaping previous Chrome processes: {e}")
+    
+    try:
+        with open(PID_FILE, 'w') as f:
+            json.dump({'pid': current_pid, 'create_time': psutil.Process(current_pid).create_time()}, f)
+    except Exception as e:
+        print(f"Warning: Could not write {PID_FILE}: {e}")
 
-def get_chrome_options():
-    """Get Chrome options optimized for RELIABILITY, not speed"""
-    options = Options()
-    options.add_argument("--headless=new")
-    options.add_argument("--no-sandbox")
-    options.add_argument("--disable-dev-shm-usage")
-    options.add_argument("--disable-gpu")
-    options.add_argument("--window-size=1920,1080")  # Larger window for better rendering
-    options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
+def chrome_arguments() -> List[str]:
+    """Chrome command-line flags shared by the Selenium and DevTools-protocol backends"""
+    args = []
+    args.append("--headless=new")
+    args.append("--no-sandbox")
+    args.append("--disable-dev-shm-usage")
+    args.append("--disable-gpu")
+    args.append("--window-size=1920,1080")  # Larger window for better rendering
+    args.append("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
     
     # KEEP JAVASCRIPT ENABLED - Zealy needs it!
     # Only disable non-essential features
-    options.add_argument("--disable-extensions")
-    options.add_argument("--disable-plugins")
-    options.add_argument("--disable-default-apps")
-    options.add_argument("--disable-sync")
-    options.add_argument("--disable-translate")
+    args.append("--disable-extensions")
+    args.append("--disable-plugins")
+    args.append("--disable-default-apps")
+    args.append("--disable-sync")
+    args.append("--disable-translate")
     
     # Memory management without breaking functionality
-    options.add_argument("--memory-pressure-off")
-    options.add_argument("--disable-background-timer-throttling")
-    options.add_argument("--disable-backgrounding-occluded-windows")
-    options.add_argument("--disable-renderer-backgrounding")
+    args.append("--memory-pressure-off")
+    args.append("--disable-background-timer-throttling")
+    args.append("--disable-backgrounding-occluded-windows")
+    args.append("--disable-renderer-backgrounding")
     
     # Additional memory optimization for 512MB limit
-    options.add_argument("--max-old-space-size=256")  # Reduced heap size
-    options.add_argument("--aggressive-cache-discard")
-    options.add_argument("--disable-background-mode")
-    options.add_argument("--disable-features=TranslateUI,BlinkGenPropertyTrees")
+    args.append("--max-old-space-size=256")  # Reduced heap size
+    args.append("--aggressive-cache-discard")
+    args.append("--disable-background-mode")
+    args.append("--disable-features=TranslateUI,BlinkGenPropertyTrees")
     
     if IS_RENDER:
         # Render-specific settings - minimal but necessary
-        options.add_argument("--disable-setuid-sandbox")
-        options.add_argument("--no-first-run")
-        options.add_argument("--disable-infobars")
-        options.add_argument("--single-process")
-        options.add_argument("--no-zygote")
-        options.add_argument("--disable-dev-tools")
+        args.append("--disable-setuid-sandbox")
+        args.append("--no-first-run")
+        args.append("--disable-infobars")
+        args.append("--single-process")
+        args.append("--no-zygote")
+        args.append("--disable-dev-tools")
         # Conservative memory limits for Render
-        options.add_argument("--js-flags=--max-old-space-size=256")
+        args.append("--js-flags=--max-old-space-size=256")
     else:
         # Local development - still conservative
-        options.add_argument("--js-flags=--max-old-space-size=512")
+        args.append("--js-flags=--max-old-space-size=512")
     
-    # Set Chrome binary path
+    return args
+
+def find_chrome_binary() -> Optional[str]:
+    """CHROME_PATH if it exists, else a common Windows install location (None lets the caller search PATH)"""
     if os.path.exists(CHROME_PATH):
-        options.binary_location = CHROME_PATH
-    elif not IS_RENDER and platform.system() == "Windows":
+        return CHROME_PATH
+    if not IS_RENDER and platform.system() == "Windows":
         # Try common Windows Chrome paths
         possible_paths = [
             r"C:\Program Files\Google\Chrome\Application\chrome.exe",
@@ -417,11 +1229,30 @@ def get_chrome_options():
         ]
         for path in possible_paths:
             if os.path.exists(path):
-                options.binary_location = path
-                break
+                return path
+    return None
+
+def get_chrome_options():
+    """Get Chrome options optimized for RELIABILITY, not speed"""
+    options = Options()
+    for argument in chrome_arguments():
+        options.add_argument(argument)
+    
+    # Performance log carries the Network.* events used for per-check byte counts
+    options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+    
+    # Set Chrome binary path
+    binary = find_chrome_binary()
+    if binary:
+        options.binary_location = binary
     
     return options
 
+BREAKER_CLOSED = "closed"
+BREAKER_OPEN = "open"
+BREAKER_HALF_OPEN = "half_open"
+BASELINE_FIELDS = ("hash", "source_hashes", "source_fingerprints")  # What reset_baseline() clears
+
 @dataclass
 class URLData:
     hash: str
@@ -432,6 +1263,102 @@ class URLData:
     last_error: Optional[str] = None
     check_count: int = 0
     avg_response_time: float = 0.0
+    # Last hash per fetch source - HTTP and browser text differ, so only
+    # hashes from the same source are compared
+    source_hashes: Dict[str, str] = field(default_factory=dict)
+    # Quest title -> record hash per fetch source, and what the last change touched
+    source_fingerprints: Dict[str, Dict[str, str]] = field(default_factory=dict)
+    last_diff: Dict[str, List[str]] = field(default_factory=dict)
+    # Extra normalization stages for this URL, e.g. {"type": "drop_lines", "pattern": "Ends in"}
+    normalization_rules: List[Dict[str, str]] = field(default_factory=list)
+    # Blocked-resource patterns to let through for this URL, e.g. "*.svg"
+    resource_allowlist: List[str] = field(default_factory=list)
+    # Bumped on every user edit, so workers never overwrite a newer configuration
+    config_revision: int = 0
+    last_bytes_transferred: int = 0
+    last_request_count: int = 0
+    last_blocked_requests: int = 0
+    last_browser_memory_mb: float = 0.0  # Browser memory attributed to the last fetch
+    peak_browser_memory_mb: float = 0.0
+    preferred_selector: Optional[str] = None  # Container selector that last matched
+    last_stable_time: float = 0.0  # Seconds from navigation until the DOM went quiet
+    avg_stable_time: float = 0.0
+    last_error_class: Optional[str] = None
+    phase_summary: str = ""  # Checking process's p50/p95 line, for a frontend that keeps no timings
+    breaker_state: str = "closed"  # closed / open / half_open
+    breaker_open_until: float = 0.0
+    breaker_trips: int = 0
+    check_interval: float = CHECK_INTERVAL  # Current adaptive interval in seconds
+    next_check_due: float = 0.0
+    last_changed: float = 0.0
+    change_count: int = 0
+    
+    def schedule_next(self, changed: bool, now: float):
+        """Adapt the interval to the board's change history and set the next due time"""
+        if changed:
+            self.last_changed = now
+            self.change_count += 1
+            self.check_interval = MIN_CHECK_INTERVAL
+        else:
+            self.check_interval = self.check_interval * INTERVAL_GROWTH
+            # A board that changed recently stays on a short leash
+            if self.last_changed and now - self.last_changed < MAX_CHECK_INTERVAL:
+                self.check_interval = min(self.check_interval, max(MIN_CHECK_INTERVAL, (now - self.last_changed) / 2))
+        self.check_interval = max(MIN_CHECK_INTERVAL, min(MAX_CHECK_INTERVAL, self.check_interval))
+        self.next_check_due = now + self.check_interval
+    
+    def breaker_allows(self, now: float) -> bool:
+        """Whether the circuit breaker lets a check run now"""
+        if self.breaker_state == BREAKER_OPEN:
+            if now < self.breaker_open_until:
+                return False
+            self.breaker_state = BREAKER_HALF_OPEN
+            print("🔌 Breaker half-open, trial check allowed")
+        return True
+    
+    def record_success(self):
+        self.failures = 0
+        self.consecutive_successes += 1
+        self.last_error = None
+        self.last_error_class = None
+        self.breaker_state = BREAKER_CLOSED
+        self.breaker_trips = 0
+    
+    def record_failure(self, error: str, error_class: str):
+        """Count a failed check and open the breaker if the URL keeps failing.
+        
+        A permanent error parks the URL right away, but only for the longest
+        cooldown when the previous failure was permanent too.
+        """
+        confirmed_permanent = error_class == ERROR_PERMANENT and self.last_error_class == ERROR_PERMANENT
+        self.failures += 1
+        self.consecutive_successes = 0
+        self.last_error = error
+        self.last_error_class = error_class
+        
+        if (error_class == ERROR_PERMANENT or self.breaker_state == BREAKER_HALF_OPEN
+                or self.failures >= BREAKER_FAILURE_THRESHOLD):
+            self.breaker_trips += 1
+            if confirmed_permanent:
+                cooldown = BREAKER_MAX_COOLDOWN
+            else:
+                cooldown = min(BREAKER_MAX_COOLDOWN, BREAKER_BASE_COOLDOWN * 2 ** (self.breaker_trips - 1))
+            self.breaker_state = BREAKER_OPEN
+            self.breaker_open_until = time.time() + cooldown
+    
+    def previous_hash(self, source: str) -> Optional[str]:
+        """Hash to compare a new result from this source against"""
+        if source in self.source_hashes:
+            return self.source_hashes[source]
+        if source == FETCH_SOURCE_BROWSER and not self.source_hashes and self.hash:
+            return self.hash  # State saved before source tracking was added
+        return None
+    
+    def reset_baseline(self):
+        """Forget stored hashes so the next check records a fresh baseline"""
+        self.hash = ""
+        self.source_hashes = {}
+        self.source_fingerprints = {}
     
     def update_response_time(self, response_time: float):
         """Update average response time"""
@@ -439,336 +1366,3021 @@ class URLData:
             self.avg_response_time = response_time
         else:
             self.avg_response_time = 0.7 * self.avg_response_time + 0.3 * response_time
+    
+    def update_stable_time(self, stable_time: float):
+        """Update time-until-stable, same smoothing as response time"""
+        self.last_stable_time = stable_time
+        if self.avg_stable_time == 0:
+            self.avg_stable_time = stable_time
+        else:
+            self.avg_stable_time = 0.7 * self.avg_stable_time + 0.3 * stable_time
+
+@dataclass
+class ChatSettings:
+    max_urls: int = MAX_URLS
+    notify_changes: bool = True
+    notify_status: bool = True  # Paused / recovered notices
+    min_notify_interval: int = 60  # Seconds between change alerts for one URL
+
+@dataclass
+class Subscription:
+    added_at: float
+    last_notified: float = 0
+
+def canonical_url(url: str) -> str:
+    """Registry key for a board: https, lowercase host without www., no default port,
+    no trailing slash or fragment, sorted query. Zealy slugs are case-insensitive,
+    so the path is lowercased too (as URLs always were)."""
+    parts = urlsplit(url.strip())
+    scheme = "https" if parts.scheme.lower() in ("", "http", "https") else parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    netloc = host if parts.port in (None, 80, 443) else f"{host}:{parts.port}"
+    path = re.sub(r"/{2,}", "/", parts.path.lower()).rstrip("/") or "/"
+    query = urlencode(sorted(parse_qsl(parts.query)))
+    return urlunsplit((scheme, netloc, path, query, ""))
 
 # Global variables
-monitored_urls: Dict[str, URLData] = {}
+monitored_urls: Dict[str, URLData] = {}  # canonical url -> shared fetch state
+chat_settings: Dict[int, ChatSettings] = {}
+subscriptions: Dict[int, Dict[str, Subscription]] = {}  # chat -> canonical url -> subscription
 is_monitoring = False
-notification_queue = Queue()
+fetch_details: Dict[str, Dict] = {}  # url -> measurements from the latest fetch
+fetch_details_lock = threading.Lock()
 
-def create_driver():
-    """Create a reliable Chrome driver instance with generous timeouts"""
-    try:
-        print("🔧 Creating Chrome driver with generous timeouts...")
-        options = get_chrome_options()
-        
-        if IS_RENDER or not os.path.exists(CHROMEDRIVER_PATH):
-            driver = webdriver.Chrome(options=options)
-        else:
-            service = Service(executable_path=CHROMEDRIVER_PATH)
-            driver = webdriver.Chrome(service=service, options=options)
-        
-        # Set generous timeouts
-        driver.set_page_load_timeout(PAGE_LOAD_TIMEOUT)
-        driver.implicitly_wait(10)  # 10 seconds implicit wait
-        
-        print("✅ Driver created successfully with generous timeouts")
-        return driver
-        
-    except Exception as e:
-        print(f"❌ Failed to create driver: {e}")
-        print(f"❌ Full error details: {traceback.format_exc()}")
-        return None
+def get_chat_settings(chat_id: int) -> ChatSettings:
+    if chat_id not in chat_settings:
+        chat_settings[chat_id] = ChatSettings()
+    return chat_settings[chat_id]
 
-def get_content_hash_fast(url: str, debug_mode: bool = False) -> Tuple[Optional[str], float, Optional[str], Optional[str]]:
-    """Get content hash for URL with RELIABLE settings (not fast)"""
-    driver = None
-    start_time = time.time()
-    max_retries = 3
-    retry_count = 0
-    
-    while retry_count < max_retries:
+def chat_urls(chat_id: int) -> List[str]:
+    """A chat's URLs in the order it added them - the numbers /list shows.
+    Subscriptions whose board row is gone are skipped"""
+    subs = subscriptions.get(chat_id, {})
+    return sorted((url for url in subs if url in monitored_urls), key=lambda url: subs[url].added_at)
+
+def url_subscribers(url: str) -> List[int]:
+    return [chat_id for chat_id, subs in subscriptions.items() if url in subs]
+
+def can_edit_board(chat_id: int, url: str) -> bool:
+    """Rules and allowlist apply to every subscriber, so shared boards are the admin's to change"""
+    return is_admin(chat_id) or url_subscribers(url) == [chat_id]
+
+def prune_orphan_subscriptions() -> List[int]:
+    """Drop subscriptions to boards that no longer have a row. Returns the chats that changed"""
+    changed = []
+    for chat_id, subs in subscriptions.items():
+        orphans = [url for url in subs if url not in monitored_urls]
+        for url in orphans:
+            del subs[url]
+        if orphans:
+            print(f"🧹 Dropped {len(orphans)} subscriptions of chat {chat_id} to removed boards")
+            changed.append(chat_id)
+    return changed
+
+def subscribe(chat_id: int, url: str):
+    get_chat_settings(chat_id)
+    subscriptions.setdefault(chat_id, {}).setdefault(url, Subscription(added_at=time.time()))
+
+def unsubscribe(chat_id: int, url: str) -> bool:
+    """Drop a chat's subscription; the board itself goes once nobody watches it. Returns True if it did"""
+    subscriptions.get(chat_id, {}).pop(url, None)
+    if url_subscribers(url):
+        return False
+    monitored_urls.pop(url, None)
+    selector_resolver.remember(url, None)
+    due_queue.remove(url)
+    metrics.forget_url(url)
+    phase_timings.forget(url)
+    return True
+
+@dataclass
+class ChromeProcessGroup:
+    driver_pid: int
+    pgid: Optional[int]  # chromedriver runs in its own session, so this is its PID on POSIX
+    processes: List[List[float]] = field(default_factory=list)  # [pid, create_time] - guards against PID reuse
+    created_at: float = 0
+    owned: bool = True  # False for groups inherited from a previous instance
+
+class ChromeProcessRegistry:
+    """Records the chromedriver and browser processes create_driver spawned.
+    
+    Lets cleanup reap exactly those processes with targeted signals instead
+    of scanning the host for anything named chrome. The registry is written
+    to CHROME_REGISTRY_FILE so a restarted bot can reap what a crashed one
+    left behind.
+    """
+    
+    def __init__(self, path: str):
+        self.path = path
+        self._groups: Dict[int, ChromeProcessGroup] = {}
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()  # Snapshots reach the file in the order they were taken
+        self.reaped = 0
+        self.freed_mb = 0.0
+    
+    def register(self, driver):
+        """Record a freshly created driver's process group and browser processes"""
+        self.register_pid(driver.service.process.pid)
+    
+    def register_pid(self, pid: int):
+        """Record a process we spawned (chromedriver, or Chrome itself for the CDP backend) and its children"""
+        pgid = None
+        if hasattr(os, "getpgid"):
+            try:
+                pgid = os.getpgid(pid) if os.getpgid(pid) == pid else None
+            except OSError:
+                pass
+        with self._lock:
+            self._groups[pid] = ChromeProcessGroup(driver_pid=pid, pgid=pgid, created_at=time.time())
+        self.refresh(pid)
+    
+    def refresh(self, driver_pid: int):
+        """Pick up renderers and helpers Chrome started since registration"""
+        require("psutil")
+        try:
+            root = psutil.Process(driver_pid)
+            found = [[p.pid, p.create_time()] for p in [root] + root.children(recursive=True)]
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            return
+        with self._lock:
+            group = self._groups.get(driver_pid)
+            if not group:
+                return
+            known = {int(pid) for pid, _ in group.processes}
+            group.processes.extend(entry for entry in found if entry[0] not in known)
+        self._save()
+    
+    def reap(self, driver_pid: int, timeout: float = REAP_TIMEOUT) -> float:
+        """SIGTERM whatever is left of a driver's processes, SIGKILL stragglers. Returns MB freed"""
+        require("psutil")
+        with self._lock:
+            group = self._groups.pop(driver_pid, None)
+        if not group:
+            return 0.0
+        
+        procs = self._live_processes(group)
+        freed_mb = 0.0
+        if procs:
+            before_mb = sum(process_memory_mb(p)[0] for p in procs)
+            self._signal(group, procs, signal.SIGTERM)
+            _, alive = psutil.wait_procs(procs, timeout=timeout)
+            if alive:
+                self._signal(group, alive, getattr(signal, "SIGKILL", signal.SIGTERM))
+                _, alive = psutil.wait_procs(alive, timeout=1)
+            after_mb = sum(process_memory_mb(p)[0] for p in alive)
+            freed_mb = max(0.0, before_mb - after_mb)
+            self.reaped += len(procs) - len(alive)
+            self.freed_mb += freed_mb
+            print(f"🔪 Reaped {len(procs) - len(alive)}/{len(procs)} Chrome processes "
+                  f"of driver {driver_pid}, freed {freed_mb:.1f}MB")
+            if alive:
+                print(f"⚠️ {len(alive)} Chrome processes survived SIGKILL: {[p.pid for p in alive]}")
+        self._save()
+        return freed_mb
+    
+    def forget(self, driver_pid: int):
+        with self._lock:
+            self._groups.pop(driver_pid, None)
+        self._save()
+    
+    def reap_orphans(self) -> float:
+        """Reap groups whose chromedriver has died or that a previous instance left behind"""
+        require("psutil")
+        with self._lock:
+            groups = list(self._groups.values())
+        orphans = []
+        for group in groups:
+            if not group.owned:
+                orphans.append(group.driver_pid)
+                continue
+            try:
+                driver_alive = psutil.Process(group.driver_pid).is_running()
+            except psutil.NoSuchProcess:
+                driver_alive = False
+            if not driver_alive:
+                orphans.append(group.driver_pid)
+        return sum(self.reap(driver_pid) for driver_pid in orphans)
+    
+    def load_previous(self):
+        """Adopt the groups recorded by a previous instance so they can be reaped"""
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Could not read {self.path}: {e}")
+            return
+        with self._lock:
+            for entry in data:
+                group = ChromeProcessGroup(**entry)
+                group.owned = False
+                self._groups.setdefault(group.driver_pid, group)
+        print(f"📋 Loaded {len(data)} Chrome process groups from previous run")
+    
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "groups": len(self._groups),
+                "processes": sum(len(g.processes) for g in self._groups.values()),
+                "reaped": self.reaped,
+                "freed_mb": self.freed_mb,
+            }
+    
+    def _live_processes(self, group: ChromeProcessGroup) -> List:
+        procs = []
+        for pid, create_time in group.processes:
+            try:
+                proc = psutil.Process(int(pid))
+                if abs(proc.create_time() - create_time) < 1 and proc.status() != psutil.STATUS_ZOMBIE:
+                    procs.append(proc)
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+        return procs
+    
+    def _signal(self, group: ChromeProcessGroup, procs: List, sig):
+        # Signal the whole group only while one of our own processes still leads it
+        if group.pgid and hasattr(os, "killpg") and any(p.pid == group.pgid for p in procs):
+            try:
+                os.killpg(group.pgid, sig)
+                return
+            except OSError:
+                pass
+        for proc in procs:
+            try:
+                proc.send_signal(sig)
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                pass
+    
+    def _save(self):
+        with self._save_lock:
+            with self._lock:
+                data = [asdict(g) for g in self._groups.values()]
+            # Write a temp file beside the registry and swap it in, so a kill mid-write
+            # (an OOM restart) leaves the previous registry rather than a truncated one
+            tmp_path = None
+            try:
+                fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(self.path) + ".", suffix=".tmp",
+                                                dir=os.path.dirname(os.path.abspath(self.path)))
+                with os.fdopen(fd, 'w') as f:
+                    json.dump(data, f)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                print(f"⚠️ Could not write {self.path}: {e}")
+                if tmp_path and os.path.exists(tmp_path):
+                    try:
+                        os.unlink(tmp_path)
+                    except OSError:
+                        pass
+
+chrome_registry = ChromeProcessRegistry(CHROME_REGISTRY_FILE)
+
+def create_driver():
+    """Create a reliable Chrome driver instance with generous timeouts"""
+    try:
+        print("🔧 Creating Chrome driver with generous timeouts...")
+        wait_for_browser_setup()
+        require("selenium")
+        options = get_chrome_options()
+        
+        # Own session/process group, so the whole browser can be signalled at once
+        popen_kw = {"start_new_session": True} if os.name == "posix" else {}
+        if IS_RENDER or not os.path.exists(CHROMEDRIVER_PATH):
+            service = Service(popen_kw=popen_kw)
+        else:
+            service = Service(executable_path=CHROMEDRIVER_PATH, popen_kw=popen_kw)
+        driver = webdriver.Chrome(service=service, options=options)
+        
+        try:
+            chrome_registry.register(driver)
+        except Exception as e:
+            print(f"⚠️ Could not register Chrome processes: {e}")
+        
+        # Set generous timeouts
+        driver.set_page_load_timeout(PAGE_LOAD_TIMEOUT)
+        # No implicit wait - container lookups poll find_elements in explicit waits
+        driver.implicitly_wait(0)
+        
+        print("✅ Driver created successfully with generous timeouts")
+        return driver
+        
+    except Exception as e:
+        print(f"❌ Failed to create driver: {e}")
+        print(f"❌ Full error details: {traceback.format_exc()}")
+        return None
+
+def get_driver_memory_mb(driver) -> float:
+    """Get memory (PSS where available) of a driver's chromedriver process and all of its children in MB"""
+    require("psutil")
+    try:
+        return process_tree_memory_mb(psutil.Process(driver.service.process.pid))[0]
+    except Exception:
+        return 0
+
+# url -> driver of fetches currently holding a browser, for per-fetch attribution
+active_fetches: Dict[str, object] = {}
+active_fetches_lock = threading.Lock()
+
+def track_fetch(url: str, driver):
+    with active_fetches_lock:
+        active_fetches[url] = driver
+
+def untrack_fetch(url: str, share: int = 1):
+    """Stop tracking a fetch and record the browser memory attributed to it"""
+    with active_fetches_lock:
+        driver = active_fetches.pop(url, None)
+    if driver is not None:
+        record_fetch_detail(url, browser_memory_mb=get_driver_memory_mb(driver) / max(share, 1))
+
+def get_active_fetch_memory() -> Dict[str, float]:
+    """Browser memory per in-flight fetch; tabs sharing a browser show the whole browser"""
+    with active_fetches_lock:
+        fetches = dict(active_fetches)
+    return {url: get_driver_memory_mb(driver) for url, driver in fetches.items()}
+
+@dataclass
+class PooledDriver:
+    driver: object
+    created_at: float
+    uses: int = 0
+
+class DriverPool:
+    """Keeps a few warm Chrome sessions and hands them out one check at a time.
+
+    Sessions are health-checked on checkout and recycled after DRIVER_MAX_USES
+    checks or when their process tree exceeds DRIVER_MAX_MEMORY_MB.
+    Safe to use from executor threads.
+    """
+
+    def __init__(self, size: int, max_uses: int, max_memory_mb: float):
+        self.size = max(1, size)
+        self.max_uses = max_uses
+        self.max_memory_mb = max_memory_mb
+        self._idle: List[PooledDriver] = []
+        self._total = 0  # idle + checked out + being created
+        self._cond = threading.Condition()
+        self.created = 0
+        self.recycled = 0
+
+    def acquire(self, timeout: float = DRIVER_ACQUIRE_TIMEOUT) -> Optional[PooledDriver]:
+        """Check out a healthy session, creating one if the pool has room"""
+        deadline = time.time() + timeout
+        while True:
+            pooled = None
+            with self._cond:
+                while not self._idle and self._total >= self.size:
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        print("⚠️ Timed out waiting for a free Chrome session")
+                        return None
+                    self._cond.wait(remaining)
+                if self._idle:
+                    pooled = self._idle.pop()
+                else:
+                    self._total += 1  # Reserve the slot before the slow launch
+
+            if pooled is None:
+                driver = create_driver()
+                if not driver:
+                    with self._cond:
+                        self._total -= 1
+                        self._cond.notify()
+                    return None
+                self.created += 1
+                return PooledDriver(driver=driver, created_at=time.time())
+
+            if self._is_healthy(pooled):
+                print(f"♻️ Reusing warm Chrome session (use #{pooled.uses + 1})")
+                return pooled
+            self._discard(pooled, "failed health check")
+
+    def release(self, pooled: PooledDriver, healthy: bool = True):
+        """Return a session to the pool, recycling it if it is worn out"""
+        pooled.uses += 1
+        reason = None
+        if not healthy:
+            reason = "marked unhealthy"
+        elif pooled.uses >= self.max_uses:
+            reason = f"reached {pooled.uses} uses"
+        else:
+            chrome_registry.refresh(pooled.driver.service.process.pid)
+            memory_mb = get_driver_memory_mb(pooled.driver)
+            if memory_mb > self.max_memory_mb:
+                reason = f"using {memory_mb:.1f}MB > {self.max_memory_mb}MB"
+            elif not self._reset(pooled):
+                reason = "reset failed"
+
+        if reason:
+            self._discard(pooled, reason)
+            return
+
+        with self._cond:
+            self._idle.append(pooled)
+            self._cond.notify()
+
+    def close_idle(self):
+        """Quit all idle sessions, e.g. to free memory or when monitoring stops"""
+        with self._cond:
+            idle, self._idle = self._idle, []
+        for pooled in idle:
+            self._discard(pooled, "closing idle session")
+
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            idle = len(self._idle)
+            return {
+                "size": self.size,
+                "idle": idle,
+                "in_use": self._total - idle,
+                "created": self.created,
+                "recycled": self.recycled,
+            }
+
+    def _is_healthy(self, pooled: PooledDriver) -> bool:
+        try:
+            return pooled.driver.execute_script("return 1") == 1
+        except Exception as e:
+            print(f"⚠️ Pooled driver health check failed: {e}")
+            return False
+
+    def _reset(self, pooled: PooledDriver) -> bool:
+        """Drop the page so the idle session does not hold renderer memory"""
+        try:
+            handles = pooled.driver.window_handles
+            for handle in handles[1:]:
+                pooled.driver.switch_to.window(handle)
+                pooled.driver.close()
+            pooled.driver.switch_to.window(handles[0])
+            pooled.driver.get("about:blank")
+            return True
+        except Exception as e:
+            print(f"⚠️ Error resetting pooled driver: {e}")
+            return False
+
+    def _discard(self, pooled: PooledDriver, reason: str):
+        print(f"🔄 Recycling Chrome session ({reason})")
+        driver_pid = getattr(getattr(pooled.driver.service, "process", None), "pid", None)
+        if driver_pid:
+            chrome_registry.refresh(driver_pid)
+        try:
+            pooled.driver.quit()
+        except Exception as e:
+            print(f"⚠️ Error closing driver: {e}")
+        if driver_pid:
+            # quit() normally takes everything down - this catches what it leaves behind
+            chrome_registry.reap(driver_pid)
+        with self._cond:
+            self._total -= 1
+            self.recycled += 1
+            self._cond.notify()
+        gc.collect()
+
+driver_pool = DriverPool(DRIVER_POOL_SIZE, DRIVER_MAX_USES, DRIVER_MAX_MEMORY_MB)
+
+# Resolves once the observed subtree has had no mutations for quietMs,
+# or with timed_out=true once deadlineMs has passed
+DOM_STABILITY_SCRIPT = """
+const selector = arguments[0], quietMs = arguments[1], deadlineMs = arguments[2];
+const done = arguments[arguments.length - 1];
+const start = performance.now();
+const target = document.querySelector(selector) || document.body || document.documentElement;
+let mutations = 0, finished = false, quietTimer = null, deadlineTimer = null, observer = null;
+const finish = (timedOut) => {
+    if (finished) return;
+    finished = true;
+    if (observer) observer.disconnect();
+    clearTimeout(quietTimer);
+    clearTimeout(deadlineTimer);
+    done({elapsed_ms: performance.now() - start, mutations: mutations, timed_out: timedOut});
+};
+observer = new MutationObserver((records) => {
+    mutations += records.length;
+    clearTimeout(quietTimer);
+    quietTimer = setTimeout(() => finish(false), quietMs);
+});
+observer.observe(target, {childList: true, subtree: true, characterData: true, attributes: true});
+quietTimer = setTimeout(() => finish(false), quietMs);
+deadlineTimer = setTimeout(() => finish(true), deadlineMs);
+"""
+
+# Non-blocking variant for tabs that settle side by side: the first script starts
+# recording mutations on the container, the second reports how long it has been quiet
+DOM_QUIET_WATCH_SCRIPT = """
+const target = document.querySelector(arguments[0]) || document.body || document.documentElement;
+if (window.__domQuiet) window.__domQuiet.observer.disconnect();
+const state = {start: performance.now(), last: performance.now(), mutations: 0, observer: null};
+state.observer = new MutationObserver((records) => {
+    state.mutations += records.length;
+    state.last = performance.now();
+});
+state.observer.observe(target, {childList: true, subtree: true, characterData: true, attributes: true});
+window.__domQuiet = state;
+"""
+DOM_QUIET_READ_SCRIPT = """
+const state = window.__domQuiet;
+if (!state) return null;
+const now = performance.now();
+if (arguments[0]) state.observer.disconnect();
+return {quiet_ms: now - state.last, elapsed_ms: now - state.start, mutations: state.mutations};
+"""
+
+def wait_for_dom_stable(driver, selector: str, quiet_ms: int = DOM_QUIET_WINDOW_MS,
+                        deadline: float = DOM_STABLE_DEADLINE) -> Dict:
+    """Block until the element matching selector has been mutation-free for quiet_ms"""
+    start = time.time()
+    try:
+        driver.set_script_timeout(deadline + 5)
+        result = driver.execute_async_script(DOM_STABILITY_SCRIPT, selector, quiet_ms, int(deadline * 1000))
+        if result.get("timed_out"):
+            print(f"⚠️ DOM still changing after {deadline}s ({result.get('mutations', 0)} mutations)")
+        else:
+            print(f"✅ DOM stable after {result.get('elapsed_ms', 0) / 1000:.2f}s ({result.get('mutations', 0)} mutations)")
+        return {
+            "elapsed": result.get("elapsed_ms", 0) / 1000,
+            "mutations": result.get("mutations", 0),
+            "timed_out": bool(result.get("timed_out"))
+        }
+    except TimeoutException:
+        print(f"⚠️ DOM stability script timed out after {deadline}s")
+        return {"elapsed": time.time() - start, "mutations": 0, "timed_out": True}
+
+class SelectorResolver:
+    """Finds the content container with one combined wait over all candidates.
+    
+    The primary Zealy selector is always tried first and is the only one
+    accepted before SELECTOR_FALLBACK_GRACE seconds have passed. After that,
+    the fallback that matched last time (remembered per URL and persisted on
+    URLData.preferred_selector) goes ahead of the other generic ones. A
+    learned fallback expires as soon as the primary matches again, so a
+    board is never pinned to main/body and the nav and footer noise they
+    carry.
+    """
+    
+    def __init__(self, selectors: List[str]):
+        self.selectors = selectors
+        self._known: Dict[str, str] = {}
+        self._lock = threading.Lock()
+    
+    def get(self, url: str) -> Optional[str]:
+        with self._lock:
+            return self._known.get(url)
+    
+    def remember(self, url: str, selector: Optional[str]):
+        with self._lock:
+            if selector:
+                self._known[url] = selector
+            else:
+                self._known.pop(url, None)
+    
+    def candidates(self, url: str) -> List[str]:
+        """Primary first, then the learned fallback, then the remaining generic selectors"""
+        known = self.get(url)
+        return list(dict.fromkeys([ZEALY_CONTAINER_SELECTOR] + ([known] if known else []) + self.selectors))
+    
+    def matched(self, url: str, selector: str):
+        """Record which selector a fetch used, learning or expiring the URL's fallback"""
+        known = self.get(url)
+        if selector != known:
+            if selector == ZEALY_CONTAINER_SELECTOR:
+                if known:
+                    print(f"📍 Primary container matched again for {url}, dropping fallback {known}")
+            else:
+                print(f"📍 Learned fallback selector for {url}: {selector}")
+            self.remember(url, selector)
+        record_fetch_detail(url, selector=selector)
+    
+    def find_now(self, driver, url: str, elapsed: float):
+        """Single poll: return (selector, element) for the best acceptable match, or None"""
+        for selector in self.candidates(url):
+            if elapsed < SELECTOR_FALLBACK_GRACE and selector != ZEALY_CONTAINER_SELECTOR:
+                break  # Only the primary counts during the grace period
+            elements = driver.find_elements(By.CSS_SELECTOR, selector)
+            if elements:
+                self.matched(url, selector)
+                return selector, elements[0]
+        return None
+    
+    def resolve(self, driver, url: str, timeout: float = ELEMENT_WAIT_TIMEOUT):
+        """Wait up to timeout for any candidate. Returns (selector, element) or (None, None)"""
+        start = time.time()
+        try:
+            selector, element = WebDriverWait(driver, timeout, poll_frequency=0.25).until(
+                lambda d: self.find_now(d, url, time.time() - start)
+            )
+            print(f"✅ Found element with selector: {selector} in {time.time() - start:.2f}s")
+            return selector, element
+        except TimeoutException:
+            print(f"⚠️ No container selector matched after {timeout}s")
+            return None, None
+
+selector_resolver = SelectorResolver([
+    ZEALY_CONTAINER_SELECTOR,
+    "div[class*='flex'][class*='flex-col']",
+    "main",
+    "body"
+])
+
+def record_fetch_detail(url: str, **details):
+    """Attach extra measurements from a fetch (runs in executor threads)"""
+    with fetch_details_lock:
+        fetch_details.setdefault(url, {}).update(details)
+
+def pop_fetch_details(url: str) -> Dict:
+    """Take the measurements recorded for the latest fetch of url"""
+    with fetch_details_lock:
+        return fetch_details.pop(url, {})
+
+def record_phase_times(url: str, phases: Dict[str, float]):
+    """Add per-phase seconds to the latest fetch of url (phases already recorded are summed)"""
+    with fetch_details_lock:
+        recorded = fetch_details.setdefault(url, {}).setdefault("phases", {})
+        for phase, seconds in phases.items():
+            recorded[phase] = recorded.get(phase, 0.0) + seconds
+
+# Where a check's time goes. launch = pool acquire, including a Chrome start when no
+# session is idle; teardown = network stats plus handing the session back, which
+# includes driver.quit() and gc.collect() when the pool recycles it; overhead =
+# fetch time no phase accounts for (executor queueing, fetch-worker IPC)
+CHECK_PHASES = ["http", "launch", "navigate", "selector_wait", "stability_wait", "extract", "teardown", "overhead", "backoff"]
+
+class PhaseTimer:
+    """Charges wall time to whichever phase is current; start() switches phases"""
+    
+    def __init__(self):
+        self.phases: Dict[str, float] = {}
+        self._current: Optional[str] = None
+        self._started = 0.0
+    
+    def start(self, phase: Optional[str]):
+        now = time.perf_counter()
+        if self._current is not None:
+            self.phases[self._current] = self.phases.get(self._current, 0.0) + now - self._started
+        self._current, self._started = phase, now
+    
+    def stop(self) -> Dict[str, float]:
+        self.start(None)
+        return self.phases
+
+@dataclass
+class CheckTiming:
+    timestamp: float
+    total: float  # Whole check, retries and back-off included
+    attempts: int
+    ok: bool
+    phases: Dict[str, float]  # Seconds per CHECK_PHASES entry, summed over attempts
+
+class PhaseTimingLog:
+    """Ring buffer of the last PHASE_TIMING_HISTORY check timings per URL"""
+    
+    def __init__(self, history: int = PHASE_TIMING_HISTORY):
+        self.history = history
+        self._records: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+    
+    def add(self, url: str, timing: CheckTiming):
+        with self._lock:
+            self._records.setdefault(url, deque(maxlen=self.history)).append(timing)
+    
+    def forget(self, url: str):
+        with self._lock:
+            self._records.pop(url, None)
+    
+    def records(self, url: str) -> List[CheckTiming]:
+        with self._lock:
+            return list(self._records.get(url, ()))
+    
+    def percentiles(self, url: str) -> Dict[str, Tuple[float, float]]:
+        """(p50, p95) seconds per phase plus "total"; a phase a check skipped counts as 0 for it"""
+        records = self.records(url)
+        if not records:
+            return {}
+        series = {"total": [r.total for r in records]}
+        for phase in CHECK_PHASES:
+            if any(phase in r.phases for r in records):
+                series[phase] = [r.phases.get(phase, 0.0) for r in records]
+        return {name: (percentile(values, 50), percentile(values, 95)) for name, values in series.items()}
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile"""
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+def format_phase_times(phases: Dict[str, float]) -> str:
+    return " · ".join(f"{phase} {phases[phase]:.1f}s" for phase in CHECK_PHASES if phases.get(phase, 0) >= 0.05) or "-"
+
+def format_phase_percentiles(url: str) -> Optional[str]:
+    stats = phase_timings.percentiles(url)
+    if not stats:
+        return None
+    records = phase_timings.records(url)
+    parts = [f"{name} {p50:.1f}/{p95:.1f}s" for name, (p50, p95) in stats.items() if name == "total" or p95 >= 0.05]
+    retried = sum(1 for r in records if r.attempts > 1)
+    return f"⏱️ p50/p95 over {len(records)} checks ({retried} retried): " + " · ".join(parts)
+
+phase_timings = PhaseTimingLog()
+
+# Quest cards inside the board container - links into individual quests
+QUEST_CARD_SELECTOR = "a[href*='/quests/'], a[href*='/questboard/'], [data-testid*='quest-card'], [class*='QuestCard']"
+QUEST_REWARD_PATTERN = re.compile(r'\d[\d,.]*\s*(?:XP|xp|points?|USDT|USDC|\$)|\$\s*\d[\d,.]*')
+QUEST_STATUS_PATTERN = re.compile(r'\b(claimed|completed|done|locked|in review|pending|expired|claimable|failed|new)\b', re.IGNORECASE)
+MAX_DIFF_ITEMS = 10  # Quests listed per section of a change alert
+
+# innerText of each outermost quest card inside the container passed as arguments[0]
+QUEST_CARDS_SCRIPT = """
+const cards = Array.from(arguments[0].querySelectorAll(arguments[1]));
+return cards
+    .filter(card => !cards.some(other => other !== card && other.contains(card)))
+    .map(card => card.innerText)
+    .filter(text => text && text.trim());
+"""
+
+@dataclass
+class QuestRecord:
+    title: str
+    reward: str = ""
+    status: str = ""
+    
+    def fingerprint(self) -> str:
+        """Short hash of the fields that matter for change alerts"""
+        payload = f"{self.title}\x1f{self.reward}\x1f{self.status}"
+        return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+def parse_quest_cards(card_texts: List[str], url: Optional[str] = None) -> List[QuestRecord]:
+    """Turn quest card text into records: first plain line is the title.
+    
+    Only the URL's own normalization rules are applied to card text - the
+    default XP scrub would erase the reward.
+    """
+    pipeline = get_normalization_pipeline(get_url_rules(url), include_defaults=False)
+    records = []
+    for text in card_texts:
+        text = pipeline.normalize(text)
+        lines = [" ".join(line.split()) for line in text.splitlines() if line.strip()]
+        if not lines:
+            continue
+        rewards = QUEST_REWARD_PATTERN.findall(text)
+        status = QUEST_STATUS_PATTERN.search(text)
+        title = next(
+            (line for line in lines if not QUEST_REWARD_PATTERN.fullmatch(line) and not QUEST_STATUS_PATTERN.fullmatch(line)),
+            lines[0]
+        )
+        records.append(QuestRecord(
+            title=title,
+            reward=" ".join(" ".join(reward.split()) for reward in rewards),
+            status=status.group(1).lower() if status else ""
+        ))
+    return records
+
+def build_fingerprints(records: List[QuestRecord]) -> Dict[str, str]:
+    """Compact map of quest title -> record hash. Repeated titles get a #n suffix"""
+    fingerprints = {}
+    for record in records:
+        key = record.title
+        suffix = 2
+        while key in fingerprints:
+            key = f"{record.title} #{suffix}"
+            suffix += 1
+        fingerprints[key] = record.fingerprint()
+    return fingerprints
+
+def diff_fingerprints(old: Dict[str, str], new: Dict[str, str]) -> Dict[str, List[str]]:
+    """Set comparison of two fingerprint maps"""
+    return {
+        "added": sorted(new.keys() - old.keys()),
+        "removed": sorted(old.keys() - new.keys()),
+        "modified": sorted(key for key in new.keys() & old.keys() if new[key] != old[key])
+    }
+
+def extract_quest_fingerprints(driver, container, url: Optional[str] = None) -> Dict[str, str]:
+    """Fingerprint the quest cards inside a located container (empty if none found)"""
+    try:
+        card_texts = driver.execute_script(QUEST_CARDS_SCRIPT, container, QUEST_CARD_SELECTOR) or []
+        return build_fingerprints(parse_quest_cards(card_texts, url))
+    except Exception as e:
+        print(f"⚠️ Could not extract quest cards: {e}")
+        return {}
+
+class RegexScrubStage:
+    """Replace every match of a pre-compiled pattern"""
+    
+    def __init__(self, pattern: str, replacement: str = ""):
+        self.pattern = re.compile(pattern)
+        self.replacement = replacement
+    
+    def apply(self, text: str) -> str:
+        return self.pattern.sub(self.replacement, text)
+
+class LineFilterStage:
+    """Drop whole lines matching a pre-compiled pattern (e.g. countdowns, counters)"""
+    
+    def __init__(self, pattern: str):
+        self.pattern = re.compile(pattern)
+    
+    def apply(self, text: str) -> str:
+        return "\n".join(line for line in text.split("\n") if not self.pattern.search(line))
+
+class WhitespaceCollapseStage:
+    """Collapse runs of spaces/tabs and drop blank lines"""
+    
+    _spaces = re.compile(r'[ \t\r\f\v]+')
+    
+    def apply(self, text: str) -> str:
+        lines = (self._spaces.sub(" ", line).strip() for line in text.split("\n"))
+        return "\n".join(line for line in lines if line)
+
+# Per-URL rule types as stored in URLData.normalization_rules
+NORMALIZATION_STAGE_TYPES = {
+    "scrub": lambda rule: RegexScrubStage(rule["pattern"], rule.get("replacement", "")),
+    "drop_lines": lambda rule: LineFilterStage(rule["pattern"]),
+    "collapse_whitespace": lambda rule: WhitespaceCollapseStage(),
+}
+
+# Timestamps, XP counters and UUIDs - always scrubbed, keeps hashes compatible with saved state
+DEFAULT_NORMALIZATION_RULES = [
+    {"type": "scrub", "pattern": r'\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}Z|\d+ XP|\b[A-F0-9]{8}-(?:[A-F0-9]{4}-){3}[A-F0-9]{12}\b'}
+]
+
+class NormalizationPipeline:
+    """Ordered, pre-compiled normalization stages applied before hashing"""
+    
+    def __init__(self, rules: List[Dict[str, str]]):
+        self.rules = rules
+        self.stages = [NORMALIZATION_STAGE_TYPES[rule["type"]](rule) for rule in rules]
+    
+    def normalize(self, text: str) -> str:
+        for stage in self.stages:
+            text = stage.apply(text)
+        return text.strip()
+
+_pipeline_cache: Dict[str, NormalizationPipeline] = {}
+_pipeline_cache_lock = threading.Lock()
+
+def get_normalization_pipeline(url_rules: Optional[List[Dict[str, str]]] = None,
+                               include_defaults: bool = True) -> NormalizationPipeline:
+    """Compiled pipeline for a rule list, cached so patterns are compiled once"""
+    rules = (DEFAULT_NORMALIZATION_RULES if include_defaults else []) + list(url_rules or [])
+    key = json.dumps(rules, sort_keys=True)
+    with _pipeline_cache_lock:
+        pipeline = _pipeline_cache.get(key)
+        if pipeline is None:
+            pipeline = _pipeline_cache[key] = NormalizationPipeline(rules)
+        return pipeline
+
+def validate_normalization_rule(rule: Dict[str, str]) -> Optional[str]:
+    """Return an error message if a rule cannot be compiled"""
+    if rule.get("type") not in NORMALIZATION_STAGE_TYPES:
+        return f"Unknown rule type: {rule.get('type')}"
+    try:
+        NORMALIZATION_STAGE_TYPES[rule["type"]](rule)
+    except (re.error, KeyError) as e:
+        return f"Invalid rule: {e}"
+    return None
+
+def get_url_rules(url: Optional[str]) -> List[Dict[str, str]]:
+    """Per-URL normalization rules (safe to call from executor threads)"""
+    url_data = monitored_urls.get(url) if url else None
+    return url_data.normalization_rules if url_data else []
+
+def benchmark_normalization(text: str, url_rules: Optional[List[Dict[str, str]]] = None,
+                            iterations: int = 200) -> Dict[str, float]:
+    """Micro-benchmark: normalization cost in microseconds per KB of page text"""
+    pipeline = get_normalization_pipeline(url_rules)
+    size_kb = max(len(text.encode()) / 1024, 0.001)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        pipeline.normalize(text)
+    elapsed = time.perf_counter() - start
+    return {
+        "size_kb": size_kb,
+        "stages": len(pipeline.stages),
+        "us_per_call": elapsed / iterations * 1e6,
+        "us_per_kb": elapsed / iterations / size_kb * 1e6,
+    }
+
+def hash_page_content(content: str, url: Optional[str] = None) -> str:
+    """Run the URL's normalization pipeline (defaults + per-URL rules) and hash the result"""
+    clean_content = get_normalization_pipeline(get_url_rules(url)).normalize(content)
+    
+    print(f"📄 Content cleaned, original: {len(content)} chars, cleaned: {len(clean_content)} chars")
+    
+    return hashlib.sha256(clean_content.encode()).hexdigest()
+
+class SnapshotRecorder:
+    """Saves what each fetch extracted, for replaying through normalization offline.
+    
+    One JSON file per fetch under SNAPSHOT_DIR/<board>/ holding the container
+    text, the quest card texts, the rules and hash at capture time. With
+    SNAPSHOT_ARTIFACT=dom or mhtml the rendered page is saved next to it.
+    Only the newest SNAPSHOT_MAX_PER_URL snapshots per board are kept.
+    """
+    
+    def __init__(self, directory: str, artifact: str = "none", max_per_url: int = SNAPSHOT_MAX_PER_URL):
+        self.directory = directory
+        self.artifact = artifact
+        self.max_per_url = max_per_url
+        self._lock = threading.Lock()
+    
+    @property
+    def enabled(self) -> bool:
+        return bool(self.directory)
+    
+    def url_dir(self, url: str) -> str:
+        match = re.search(r'/cw/([\w-]+)', url)
+        slug = match.group(1) if match else "board"
+        return os.path.join(self.directory, f"{slug}-{hashlib.sha1(url.encode()).hexdigest()[:8]}")
+    
+    def capture(self, url: str, text: str, source: str, content_hash: str, driver=None, container=None,
+                fingerprints: Optional[Dict[str, str]] = None, card_texts: Optional[List[str]] = None) -> Optional[str]:
+        """Write one snapshot, returning its path. Never raises - capture must not fail a check"""
+        try:
+            directory = self.url_dir(url)
+            os.makedirs(directory, exist_ok=True)
+            captured_at = time.time()
+            name = f"{datetime.fromtimestamp(captured_at).strftime('%Y%m%d-%H%M%S-%f')}-{source}"
+            
+            artifact_file = None
+            if driver is not None:
+                if container is not None and card_texts is None:
+                    card_texts = driver.execute_script(QUEST_CARDS_SCRIPT, container, QUEST_CARD_SELECTOR) or []
+                if self.artifact == "mhtml":
+                    artifact_file = f"{name}.mhtml"
+                    data = driver.execute_cdp_cmd("Page.captureSnapshot", {"format": "mhtml"})["data"]
+                elif self.artifact == "dom":
+                    artifact_file = f"{name}.html"
+                    data = driver.page_source
+                if artifact_file:
+                    with open(os.path.join(directory, artifact_file), "w", encoding="utf-8") as f:
+                        f.write(data)
+            
+            snapshot = {
+                "url": url,
+                "captured_at": captured_at,
+                "source": source,
+                "hash": content_hash,
+                "rules": get_url_rules(url),
+                "text": text,
+                "card_texts": card_texts,
+                "fingerprints": fingerprints or {},
+                "artifact": artifact_file,
+            }
+            path = os.path.join(directory, f"{name}.json")
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(snapshot, f)
+            self._prune(directory)
+            return path
+        except Exception as e:
+            print(f"⚠️ Could not save snapshot for {url}: {e}")
+            return None
+    
+    def _prune(self, directory: str):
+        with self._lock:
+            snapshots = sorted(name for name in os.listdir(directory) if name.endswith(".json"))
+            for name in snapshots[:max(0, len(snapshots) - self.max_per_url)]:
+                stem = name[:-len(".json")]
+                for extension in (".json", ".html", ".mhtml"):
+                    try:
+                        os.remove(os.path.join(directory, stem + extension))
+                    except FileNotFoundError:
+                        pass
+
+def load_snapshots(path: str) -> List[Dict]:
+    """Snapshots in a board directory (or under a whole SNAPSHOT_DIR), oldest first"""
+    files = []
+    for root, _, names in os.walk(path):
+        files.extend(os.path.join(root, name) for name in names if name.endswith(".json"))
+    snapshots = []
+    for file in files:
+        with open(file, encoding="utf-8") as f:
+            snapshot = json.load(f)
+        snapshot["path"] = file
+        snapshots.append(snapshot)
+    return sorted(snapshots, key=lambda snapshot: snapshot["captured_at"])
+
+snapshot_recorder = SnapshotRecorder(SNAPSHOT_DIR, SNAPSHOT_ARTIFACT)
+
+def get_blocked_url_patterns(url: Optional[str]) -> List[str]:
+    """Default blocklist minus anything matched by the URL's allowlist"""
+    url_data = monitored_urls.get(url) if url else None
+    allowlist = url_data.resource_allowlist if url_data else []
+    return [
+        pattern for pattern in DEFAULT_BLOCKED_URL_PATTERNS
+        if not any(allowed == pattern or fnmatch.fnmatch(allowed, pattern) for allowed in allowlist)
+    ]
+
+def apply_resource_blocking(driver, url: str):
+    """Block images, media, fonts and trackers for the current tab via CDP"""
+    if not RESOURCE_BLOCKING_ENABLED:
+        return
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": get_blocked_url_patterns(url)})
+    except Exception as e:
+        print(f"⚠️ Could not enable resource blocking: {e}")
+
+def drain_performance_log(driver):
+    """Discard buffered Network events so the next stats cover one check only"""
+    try:
+        driver.get_log("performance")
+    except Exception:
+        pass
+
+def collect_network_stats(driver) -> Dict[str, Dict[str, int]]:
+    """Bytes transferred, requests and blocked requests per tab since the last drain"""
+    stats: Dict[str, Dict[str, int]] = {}
+    try:
+        entries = driver.get_log("performance")
+    except Exception as e:
+        print(f"⚠️ Could not read performance log: {e}")
+        return stats
+    
+    for entry in entries:
+        try:
+            message = json.loads(entry["message"])
+        except (KeyError, ValueError):
+            continue
+        event = message.get("message", {})
+        tab = stats.setdefault(message.get("webview", ""), {"bytes": 0, "requests": 0, "blocked": 0})
+        count_network_event(tab, event.get("method"), event.get("params", {}))
+    return stats
+
+def count_network_event(tab: Dict[str, int], method: Optional[str], params: Dict):
+    """Add one Network.* DevTools event to a tab's byte/request/blocked counts"""
+    if method == "Network.requestWillBeSent":
+        tab["requests"] += 1
+    elif method == "Network.loadingFinished":
+        tab["bytes"] += int(params.get("encodedDataLength", 0))
+    elif method == "Network.loadingFailed" and params.get("blockedReason"):
+        tab["blocked"] += 1
+
+def record_network_stats(url: str, tab_stats: Dict[str, int]):
+    record_fetch_detail(url, bytes_transferred=tab_stats["bytes"], request_count=tab_stats["requests"],
+                        blocked_requests=tab_stats["blocked"])
+    print(f"📶 {url}: {tab_stats['bytes'] / 1024:.0f}KB over {tab_stats['requests']} requests, {tab_stats['blocked']} blocked")
+
+def get_content_hash_fast(url: str, debug_mode: bool = False) -> Tuple[Optional[str], float, Optional[str], Optional[str]]:
+    """Get content hash for URL in a single attempt - retries are up to the caller's RetryPolicy"""
+    require("selenium")
+    start_time = time.time()
+    timer = PhaseTimer()
+    pooled = None
+    driver_healthy = True
+    try:
+        print(f"🌐 Loading URL: {url}")
+        timer.start("launch")
+        pooled = driver_pool.acquire()
+        
+        if not pooled:
+            return None, time.time() - start_time, "Failed to create driver", None
+        driver = pooled.driver
+        track_fetch(url, driver)
+        drain_performance_log(driver)
+        apply_resource_blocking(driver, url)
+        
+        print("🔄 Navigating to URL...")
+        timer.start("navigate")
+        driver.set_page_load_timeout(REQUEST_TIMEOUT)
+        navigation_start = time.time()
+        driver.get(url)
+        
+        print("⏳ Looking for page elements...")
+        timer.start("selector_wait")
+        # One combined wait over all candidate selectors, known-good selector first
+        selector, container = selector_resolver.resolve(driver, url)
+        
+        if not container:
+            print("❌ No suitable container found after trying all selectors")
+            return None, time.time() - start_time, "No suitable container found", None
+        
+        # Wait until the container stops changing instead of a fixed sleep
+        timer.start("stability_wait")
+        stability = wait_for_dom_stable(driver, selector)
+        stable_time = time.time() - navigation_start
+        record_fetch_detail(url, stable_time=stable_time, dom_mutations=stability["mutations"],
+                            stable_timed_out=stability["timed_out"])
+        
+        timer.start("extract")
+        content = container.text
+        
+        if not content or len(content.strip()) < 10:
+            print(f"⚠️ Content too short: {len(content)} chars")
+            return None, time.time() - start_time, f"Content too short: {len(content)} chars", None
+        
+        print(f"📄 Content retrieved successfully, length: {len(content)} chars")
+        
+        fingerprints = extract_quest_fingerprints(driver, container, url)
+        if fingerprints:
+            print(f"🧩 Fingerprinted {len(fingerprints)} quests")
+            record_fetch_detail(url, fingerprints=fingerprints)
+        
+        content_hash = hash_page_content(content, url)
+        if snapshot_recorder.enabled:
+            snapshot_recorder.capture(url, content, FETCH_SOURCE_BROWSER, content_hash, driver, container, fingerprints)
+        response_time = time.time() - start_time
+        
+        # Return sample for debugging if requested
+        content_sample = content[:500] if debug_mode else None
+        
+        print(f"🔢 Hash generated: {content_hash[:8]}... in {response_time:.2f}s")
+        return content_hash, response_time, None, content_sample
+        
+    except TimeoutException:
+        print(f"⚠️ Timeout waiting for page elements on {url}")
+        return None, time.time() - start_time, "Timeout waiting for page elements", None
+    except WebDriverException as e:
+        error_msg = f"WebDriver error: {str(e)}"
+        print(f"⚠️ {error_msg}")
+        # Navigation errors leave the session usable, anything else gets a fresh one
+        driver_healthy = classify_error(error_msg) in (ERROR_NAVIGATION, ERROR_PERMANENT)
+        return None, time.time() - start_time, error_msg, None
+    except Exception as e:
+        error_msg = f"Error: {str(e)}"
+        print(f"❌ {error_msg}")
+        print(f"❌ Full traceback: {traceback.format_exc()}")
+        driver_healthy = False
+        return None, time.time() - start_time, error_msg, None
+        
+    finally:
+        timer.start("teardown")
+        if pooled:
+            if driver_healthy:
+                tab_stats = collect_network_stats(pooled.driver)
+                if tab_stats:
+                    # One tab per check here, so all events belong to this URL
+                    record_network_stats(url, {
+                        key: sum(tab[key] for tab in tab_stats.values()) for key in ("bytes", "requests", "blocked")
+                    })
+            untrack_fetch(url)
+            # Hand the session back - the pool decides whether to recycle it
+            driver_pool.release(pooled, healthy=driver_healthy)
+        record_phase_times(url, timer.stop())
+
+def get_content_hashes_multitab(urls: List[str], debug_mode: bool = False) -> Dict[str, Tuple[Optional[str], float, Optional[str], Optional[str]]]:
+    """Load several URLs as tabs of one pooled browser and hash each container.
+
+    Navigations are started with CDP Page.navigate so they do not block on the
+    load event, then every tab is polled until its container has settled.
+    An error in one tab only fails that tab's URL.
+    Returns the same (hash, response_time, error, sample) tuple per URL as
+    get_content_hash_fast.
+    """
+    require("selenium")
+    urls = urls[:MAX_TABS_PER_BROWSER]
+    start_time = time.time()
+    results = {}
+    
+    pooled = driver_pool.acquire()
+    launch_time = time.time() - start_time
+    for url in urls:
+        record_phase_times(url, {"launch": launch_time})
+    if not pooled:
+        return {url: (None, time.time() - start_time, "Failed to create driver", None) for url in urls}
+    
+    driver = pooled.driver
+    driver_healthy = True
+    tabs = {}  # window handle -> (url, navigation start)
+    
+    try:
+        driver.set_page_load_timeout(REQUEST_TIMEOUT)
+        drain_performance_log(driver)
+        
+        for idx, url in enumerate(urls):
+            if idx > 0:
+                driver.switch_to.new_window('tab')
+            print(f"🗂️ Opening tab {idx + 1}/{len(urls)}: {url}")
+            track_fetch(url, driver)
+            apply_resource_blocking(driver, url)  # CDP network settings are per tab
+            navigate_start = time.time()
+            driver.execute_cdp_cmd("Page.navigate", {"url": url})
+            tabs[driver.current_window_handle] = (url, time.time())
+            record_phase_times(url, {"navigate": time.time() - navigate_start})
+        
+        # Tabs find their container and settle side by side under one deadline,
+        # so a slow tab no longer holds up the ones behind it
+        deadline = time.time() + REQUEST_TIMEOUT + DOM_STABLE_DEADLINE
+        pending = dict(tabs)
+        settling = {}  # window handle -> (selector, container, found at)
+        while pending:
+            for handle, (url, started) in list(pending.items()):
+                try:
+                    if handle in settling:
+                        if settle_tab(driver, handle, url, started, settling[handle], deadline, results, debug_mode):
+                            del pending[handle]
+                            del settling[handle]
+                        continue
+                    
+                    elapsed = time.time() - started
+                    if elapsed > REQUEST_TIMEOUT:
+                        record_phase_times(url, {"selector_wait": elapsed})
+                        results[url] = (None, elapsed, "Timeout waiting for page elements", None)
+                        del pending[handle]
+                        continue
+                    
+                    driver.switch_to.window(handle)
+                    match = selector_resolver.find_now(driver, url, elapsed)
+                    if match is None:
+                        continue
+                    selector, container = match
+                    driver.execute_script(DOM_QUIET_WATCH_SCRIPT, selector)
+                    settling[handle] = (selector, container, time.time())
+                except Exception as e:
+                    # One broken tab fails on its own - unless the browser itself is gone
+                    error = f"Tab error: {str(e).splitlines()[0] if str(e) else type(e).__name__}"
+                    print(f"⚠️ {error} ({url})")
+                    results[url] = (None, time.time() - started, error, None)
+                    pending.pop(handle, None)
+                    settling.pop(handle, None)
+                    if isinstance(e, WebDriverException) and classify_error(str(e)) == ERROR_DRIVER_CRASH:
+                        raise
+            
+            if pending:
+                time.sleep(0.25 if settling else 0.5)
+    
+    except WebDriverException as e:
+        print(f"⚠️ WebDriver error in multi-tab fetch: {str(e)}")
+        driver_healthy = False
+    except Exception as e:
+        print(f"❌ Multi-tab fetch error: {str(e)}")
+        print(f"❌ Full traceback: {traceback.format_exc()}")
+        driver_healthy = False
+    finally:
+        if driver_healthy:
+            # Performance log entries are tagged with the tab's target id, which is its window handle
+            tab_stats = collect_network_stats(driver)
+            for handle, (url, _) in tabs.items():
+                if handle in tab_stats:
+                    record_network_stats(url, tab_stats[handle])
+        # Tabs share one browser, so each gets an even share of its memory
+        for url, _ in tabs.values():
+            untrack_fetch(url, share=len(tabs))
+        teardown_start = time.time()
+        driver_pool.release(pooled, healthy=driver_healthy)
+        for url in urls:
+            record_phase_times(url, {"teardown": time.time() - teardown_start})
+    
+    # Anything left unresolved failed with the browser
+    for url in urls:
+        if url not in results:
+            results[url] = (None, time.time() - start_time, "Multi-tab fetch failed", None)
+    
+    return results
+
+def settle_tab(driver, handle: str, url: str, started: float, found: Tuple[str, object, float],
+               deadline: float, results: Dict, debug_mode: bool) -> bool:
+    """Hash a multi-tab container once its DOM has been quiet for DOM_QUIET_WINDOW_MS.
+    
+    Returns False while the tab should keep settling. A tab still changing at
+    its stability deadline (or the batch deadline) is hashed as it is.
+    """
+    selector, container, found_at = found
+    driver.switch_to.window(handle)
+    timed_out = time.time() >= min(found_at + DOM_STABLE_DEADLINE, deadline)
+    state = driver.execute_script(DOM_QUIET_READ_SCRIPT, False)
+    if state is None:  # The page replaced its document - watch the new one
+        driver.execute_script(DOM_QUIET_WATCH_SCRIPT, selector)
+        state = {"quiet_ms": 0, "mutations": 0}
+    if state["quiet_ms"] < DOM_QUIET_WINDOW_MS and not timed_out:
+        return False
+    driver.execute_script(DOM_QUIET_READ_SCRIPT, True)
+    
+    stable_time = time.time() - started
+    if timed_out:
+        print(f"⚠️ DOM still changing after {DOM_STABLE_DEADLINE}s ({state['mutations']} mutations)")
+    record_fetch_detail(url, stable_time=stable_time, dom_mutations=state["mutations"], stable_timed_out=timed_out)
+    
+    extract_start = time.time()
+    content = container.text
+    elapsed = time.time() - started
+    if not content or len(content.strip()) < 10:
+        results[url] = (None, elapsed, f"Content too short: {len(content)} chars", None)
+        return True
+    
+    fingerprints = extract_quest_fingerprints(driver, container, url)
+    if fingerprints:
+        record_fetch_detail(url, fingerprints=fingerprints)
+    
+    content_hash = hash_page_content(content, url)
+    if snapshot_recorder.enabled:
+        snapshot_recorder.capture(url, content, FETCH_SOURCE_BROWSER, content_hash, driver, container, fingerprints)
+    record_phase_times(url, {
+        "selector_wait": found_at - started,
+        "stability_wait": extract_start - found_at,
+        "extract": time.time() - extract_start,
+    })
+    content_sample = content[:500] if debug_mode else None
+    print(f"🔢 Tab hash for {url}: {content_hash[:8]}... in {elapsed:.2f}s")
+    results[url] = (content_hash, elapsed, None, content_sample)
+    return True
+
+class HttpFetcher:
+    """Fetches quest-board data over plain HTTP with a pooled keep-alive session.
+    
+    Tries, in order: the JSON endpoint from ZEALY_API_URL_TEMPLATE (if set),
+    the Next.js __NEXT_DATA__ payload embedded in the page, and the
+    server-rendered quest container. Returns the same
+    (hash, response_time, error, sample) tuple as get_content_hash_fast.
+    """
+    
+    def __init__(self, timeout: float = HTTP_TIMEOUT, max_connections: int = HTTP_MAX_CONNECTIONS):
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self._session: Optional[aiohttp.ClientSession] = None
+    
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.max_connections,
+                keepalive_timeout=60,
+                ttl_dns_cache=300
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers={
+                    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+                    "Accept": "text/html,application/json;q=0.9,*/*;q=0.8",
+                    "Accept-Language": "en-US,en;q=0.9"
+                }
+            )
+        return self._session
+    
+    async def close(self):
+        if self._session and not self._session.closed:
+            await self._session.close()
+        self._session = None
+    
+    async def fetch(self, url: str, debug_mode: bool = False) -> Tuple[Optional[str], float, Optional[str], Optional[str]]:
+        require("http")
+        start_time = time.time()
+        try:
+            content, records = None, []
+            if ZEALY_API_URL_TEMPLATE:
+                content, records = await self._fetch_api(url)
+            if content is None:
+                content, records = await self._fetch_page(url)
+            
+            if not content or len(content.strip()) < 10:
+                return None, time.time() - start_time, "HTTP content not parseable", None
+            
+            fingerprints = build_fingerprints(records) if records else {}
+            if fingerprints:
+                record_fetch_detail(url, fingerprints=fingerprints)
+            content_hash = hash_page_content(content, url)
+            if snapshot_recorder.enabled:
+                await asyncio.get_running_loop().run_in_executor(
+                    None, snapshot_recorder.capture, url, content, FETCH_SOURCE_HTTP, content_hash, None, None, fingerprints
+                )
+            response_time = time.time() - start_time
+            print(f"⚡ HTTP hash for {url}: {content_hash[:8]}... in {response_time:.2f}s")
+            return content_hash, response_time, None, content[:500] if debug_mode else None
+        
+        except asyncio.TimeoutError:
+            return None, time.time() - start_time, "HTTP timeout", None
+        except aiohttp.ClientError as e:
+            return None, time.time() - start_time, f"HTTP error: {str(e)}", None
+        except Exception as e:
+            print(f"⚠️ HTTP fetch error for {url}: {e}")
+            return None, time.time() - start_time, f"HTTP error: {str(e)}", None
+    
+    async def _fetch_api(self, url: str) -> Tuple[Optional[str], List["QuestRecord"]]:
+        match = re.search(r'/cw/([\w-]+)', url)
+        if not match:
+            return None, []
+        api_url = ZEALY_API_URL_TEMPLATE.format(community=match.group(1))
+        async with self._get_session().get(api_url) as response:
+            if response.status != 200:
+                print(f"⚠️ Quest API returned HTTP {response.status}")
+                return None, []
+            data = await response.json(content_type=None)
+        records = quest_records_from_json(data)
+        return normalize_quest_records(records), records
+    
+    async def _fetch_page(self, url: str) -> Tuple[Optional[str], List["QuestRecord"]]:
+        async with self._get_session().get(url) as response:
+            if response.status != 200:
+                raise aiohttp.ClientResponseError(
+                    response.request_info, response.history,
+                    status=response.status, message=f"HTTP {response.status}"
+                )
+            html = await response.text()
+        
+        soup = BeautifulSoup(html, "html.parser")
+        
+        next_data = soup.find("script", id="__NEXT_DATA__")
+        if next_data and next_data.string:
+            try:
+                records = quest_records_from_json(json.loads(next_data.string))
+                if records:
+                    return normalize_quest_records(records), records
+            except ValueError:
+                print("⚠️ Could not parse __NEXT_DATA__ payload")
+        
+        container = soup.select_one(ZEALY_CONTAINER_SELECTOR)
+        if container:
+            cards = container.select(QUEST_CARD_SELECTOR)
+            cards = [card for card in cards if not any(other is not card and card in other.descendants for other in cards)]
+            records = parse_quest_cards([card.get_text("\n", strip=True) for card in cards], url)
+            return container.get_text("\n", strip=True), records
+        return None, []
+
+def quest_records_from_json(data) -> List["QuestRecord"]:
+    """Collect quest-like objects from a JSON payload"""
+    records = []
+    
+    def walk(node):
+        if isinstance(node, dict):
+            title = node.get("name") or node.get("title")
+            if isinstance(title, str) and any(key in node for key in ("xp", "reward", "rewards", "categoryId", "questId")):
+                reward = node.get("xp", node.get("reward", node.get("rewards", "")))
+                status = node.get("status", node.get("state", ""))
+                records.append(QuestRecord(
+                    title=" ".join(title.split()),
+                    reward=reward if isinstance(reward, str) else json.dumps(reward, sort_keys=True),
+                    status=str(status or "")
+                ))
+            for value in node.values():
+                walk(value)
+        elif isinstance(node, list):
+            for item in node:
+                walk(item)
+    
+    walk(data)
+    return records
+
+def normalize_quest_records(records: List["QuestRecord"]) -> Optional[str]:
+    """Flatten quest records into stable, sorted text lines"""
+    if not records:
+        return None
+    return "\n".join(sorted(f"{record.title} | {record.reward} | {record.status}" for record in records))
+
+http_fetcher = HttpFetcher()
+
+# PROCESS-POOL FETCH BACKEND
+# Requests and results travel as compact JSON arrays over a multiprocessing Pipe:
+#   ["F", id, url, debug_mode, normalization_rules, resource_allowlist, preferred_selector]
+#   ["R", id, hash, response_time, error, sample, details]
+#   ["Q"]  - finish up and exit
+def _pack(message: list) -> bytes:
+    return json.dumps(message, separators=(",", ":")).encode()
+
+def _unpack(data: bytes) -> list:
+    return json.loads(data)
+
+def fetch_worker_main(conn, worker_index: int):
+    """Body of a fetch worker process: serve fetch requests until told to quit"""
+    global driver_pool
+    chrome_registry.path = f"chrome_processes-fetch{worker_index}.json"
+    driver_pool = DriverPool(1, DRIVER_MAX_USES, DRIVER_MAX_MEMORY_MB)
+    try:
+        while True:
+            try:
+                message = _unpack(conn.recv_bytes())
+            except EOFError:
+                break
+            if message[0] == "Q":
+                break
+            _, request_id, url, debug_mode, rules, allowlist, selector = message
+            # Just enough URLData for get_url_rules / get_blocked_url_patterns
+            monitored_urls[url] = URLData(
+                hash="", last_notified=0, last_checked=0, failures=0, consecutive_successes=0,
+                normalization_rules=rules, resource_allowlist=allowlist
+            )
+            selector_resolver.remember(url, selector)
+            try:
+                content_hash, response_time, error, sample = get_content_hash_fast(url, debug_mode)
+            except Exception as e:
+                content_hash, response_time, error, sample = None, 0, f"Fetch worker error: {e}", None
+            conn.send_bytes(_pack(["R", request_id, content_hash, response_time, error, sample, pop_fetch_details(url)]))
+            monitored_urls.pop(url, None)
+    finally:
+        driver_pool.close_idle()
+
+def limit_process_memory(pid: int, worker_index: int, limit_mb: int) -> Optional[str]:
+    """Put pid in its own cgroup v2 child with memory.max. Returns the cgroup path, or None if not allowed"""
+    parent = find_cgroup_dir()
+    if not parent:
+        return None
+    path = os.path.join(parent, f"zealy-fetch-{worker_index}")
+    try:
+        os.makedirs(path, exist_ok=True)
+    except OSError:
+        return None
+    try:
+        with open(os.path.join(path, "memory.max"), "w") as f:
+            f.write(str(limit_mb * 1024 * 1024))
+        with open(os.path.join(path, "cgroup.procs"), "w") as f:
+            f.write(str(pid))
+        return path
+    except OSError:
+        # Typically cgroup v2's no-internal-processes rule: our own cgroup still holds
+        # processes, so a child cannot take members. The RSS watchdog covers this case
         try:
-            print(f"🌐 Loading URL with generous timeouts: {url} (Attempt {retry_count + 1}/{max_retries})")
-            driver = create_driver()
-            
-            if not driver:
-                return None, time.time() - start_time, "Failed to create driver", None
-            
-            print(f"🔄 Navigating to URL...")
-            driver.set_page_load_timeout(REQUEST_TIMEOUT)
-            driver.get(url)
-            
-            print("⏳ Looking for page elements with generous timeouts...")
-            # Try different selectors with generous timeouts
-            selectors = [
-                ZEALY_CONTAINER_SELECTOR,
-                "div[class*='flex'][class*='flex-col']",
-                "main",
-                "body"
+            os.rmdir(path)
+        except OSError:
+            pass
+        return None
+
+@dataclass
+class FetchWorkerHandle:
+    index: int
+    process: object
+    conn: object
+    started_at: float
+    fetches: int = 0
+    cgroup: Optional[str] = None
+
+class FetchProcessPool:
+    """Runs browser fetches in separate processes so a leaking or hung Chrome
+    cannot take the event loop and Telegram handlers down with it.
+    
+    Each worker gets a cgroup memory.max of FETCH_WORKER_MEMORY_MB where the
+    kernel lets us create one. Otherwise the same ceiling is enforced by
+    measuring the worker's process tree after each fetch. Workers are
+    recycled after FETCH_WORKER_MAX_FETCHES fetches or once they pass
+    FETCH_WORKER_RECYCLE_MB. A worker that crashes or overruns the time
+    budget is killed, its Chrome reaped and a fresh one started. The caller
+    just sees a driver_crash error and URLData stays with the bot process.
+    """
+    
+    def __init__(self, size: int, max_fetches: int, recycle_mb: float, memory_limit_mb: int):
+        self.size = max(1, size)
+        self.max_fetches = max_fetches
+        self.recycle_mb = recycle_mb
+        self.memory_limit_mb = memory_limit_mb
+        self._ctx = multiprocessing.get_context("spawn")
+        self._idle: Optional[asyncio.Queue] = None
+        self._workers: Dict[int, FetchWorkerHandle] = {}
+        self._replacing: set = set()
+        self._next_request = 0
+        self.fetches = 0
+        self.restarts = 0
+        self.recycled = 0
+    
+    def _spawn(self, index: int) -> FetchWorkerHandle:
+        wait_for_browser_setup()  # Workers inherit PATH, which may now include chromedriver
+        parent_conn, child_conn = self._ctx.Pipe()
+        process = self._ctx.Process(
+            target=fetch_worker_main, args=(child_conn, index),
+            name=f"zealy-fetch-{index}", daemon=True
+        )
+        process.start()
+        child_conn.close()
+        handle = FetchWorkerHandle(index=index, process=process, conn=parent_conn, started_at=time.time())
+        handle.cgroup = limit_process_memory(process.pid, index, self.memory_limit_mb)
+        limit = f"cgroup {handle.cgroup}" if handle.cgroup else "watchdog"
+        print(f"🧰 Fetch worker {index} started (PID {process.pid}, {self.memory_limit_mb}MB ceiling via {limit})")
+        self._workers[index] = handle
+        return handle
+    
+    def _stop(self, handle: FetchWorkerHandle, reason: str, graceful: bool = True):
+        print(f"🔄 Restarting fetch worker {handle.index} ({reason})")
+        try:
+            if graceful and handle.process.is_alive():
+                handle.conn.send_bytes(_pack(["Q"]))
+                handle.process.join(REAP_TIMEOUT)
+        except (OSError, ValueError):
+            pass
+        if handle.process.is_alive():
+            handle.process.kill()
+            handle.process.join(REAP_TIMEOUT)
+        handle.conn.close()
+        # Chrome runs in its own session, so it outlives a killed worker - reap it from the worker's registry
+        orphans = ChromeProcessRegistry(f"chrome_processes-fetch{handle.index}.json")
+        orphans.load_previous()
+        orphans.reap_orphans()
+        if handle.cgroup:
+            try:
+                os.rmdir(handle.cgroup)
+            except OSError:
+                pass
+    
+    def _tree_memory_mb(self, handle: FetchWorkerHandle) -> float:
+        require("psutil")
+        try:
+            return process_tree_memory_mb(psutil.Process(handle.process.pid))[0]
+        except psutil.NoSuchProcess:
+            return 0.0
+    
+    def _roundtrip(self, handle: FetchWorkerHandle, request: list, timeout: float) -> list:
+        """Blocking send/receive, run in an executor thread"""
+        handle.conn.send_bytes(_pack(request))
+        deadline = time.time() + timeout
+        while True:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                raise TimeoutError(f"fetch worker timed out after {timeout:.0f}s")
+            if handle.conn.poll(min(remaining, 1.0)):
+                return _unpack(handle.conn.recv_bytes())
+            if not handle.process.is_alive():
+                raise EOFError(f"fetch worker exited with code {handle.process.exitcode}")
+            if not handle.cgroup and self._tree_memory_mb(handle) > self.memory_limit_mb:
+                raise MemoryError(f"fetch worker passed its {self.memory_limit_mb}MB ceiling")
+    
+    async def _replace(self, handle: FetchWorkerHandle, reason: str, graceful: bool):
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._stop, handle, reason, graceful)
+        self._idle.put_nowait(await loop.run_in_executor(None, self._spawn, handle.index))
+    
+    def _replace_soon(self, handle: FetchWorkerHandle, reason: str, graceful: bool = False) -> asyncio.Task:
+        """Swap a worker for a fresh one in its own task, so cancelling the caller cannot lose the slot"""
+        task = asyncio.get_running_loop().create_task(self._replace(handle, reason, graceful))
+        self._replacing.add(task)
+        task.add_done_callback(self._replacing.discard)
+        return task
+    
+    async def fetch(self, url: str, debug_mode: bool = False) -> Tuple[Optional[str], float, Optional[str], Optional[str]]:
+        loop = asyncio.get_running_loop()
+        if self._idle is None:
+            self._idle = asyncio.Queue()
+            for index in range(self.size):
+                self._idle.put_nowait(await loop.run_in_executor(None, self._spawn, index))
+        
+        handle = await self._idle.get()
+        settled = False  # True once the handle, or its replacement, is on its way back to _idle
+        try:
+            if not handle.process.is_alive():
+                # Died while idle - replace it before it costs a fetch attempt
+                self.restarts += 1
+                await loop.run_in_executor(None, self._stop, handle, f"exited with code {handle.process.exitcode}", False)
+                handle = await loop.run_in_executor(None, self._spawn, handle.index)
+            url_data = monitored_urls.get(url)
+            self._next_request += 1
+            request = [
+                "F", self._next_request, url, debug_mode,
+                url_data.normalization_rules if url_data else [],
+                url_data.resource_allowlist if url_data else [],
+                selector_resolver.get(url),
             ]
+            try:
+                response = await loop.run_in_executor(None, self._roundtrip, handle, request, CHECK_TIME_BUDGET)
+            except (EOFError, OSError, TimeoutError, MemoryError) as e:
+                # Covers a crashed worker (e.g. cgroup OOM kill) as well as one we gave up on
+                self.restarts += 1
+                settled = True
+                await asyncio.shield(self._replace_soon(handle, str(e)))
+                return None, 0, f"Fetch worker crashed: {e}", None
             
-            container = None
-            for selector in selectors:
-                try:
-                    print(f"🔍 Trying selector: {selector}")
-                    container = WebDriverWait(driver, 15).until(
-                        EC.presence_of_element_located((By.CSS_SELECTOR, selector))
-                    )
-                    print(f"✅ Found element with selector: {selector}")
-                    break
-                except TimeoutException:
-                    print(f"⚠️ Selector {selector} not found after 15s, trying next...")
-                    continue
+            _, _, content_hash, response_time, error, sample, details = response
+            if details:
+                record_phase_times(url, details.pop("phases", {}))
+                record_fetch_detail(url, **details)
             
-            if not container:
-                print(f"❌ No suitable container found after trying all selectors")
-                if retry_count < max_retries - 1:
-                    retry_count += 1
-                    time.sleep(5)  # Wait before retry
+            handle.fetches += 1
+            self.fetches += 1
+            reason = None
+            if handle.fetches >= self.max_fetches:
+                reason = f"{handle.fetches} fetches"
+            else:
+                memory_mb = await loop.run_in_executor(None, self._tree_memory_mb, handle)
+                if memory_mb > self.recycle_mb:
+                    reason = f"using {memory_mb:.1f}MB > {self.recycle_mb}MB"
+            settled = True
+            if reason:
+                self.recycled += 1
+                await asyncio.shield(self._replace_soon(handle, reason, graceful=True))
+            else:
+                self._idle.put_nowait(handle)
+            return content_hash, response_time, error, sample
+        finally:
+            if not settled:
+                # Cancelled (/stop, the check budget) or failed mid-request: an executor
+                # thread may still be using the pipe, so this worker cannot be reused
+                self.restarts += 1
+                self._replace_soon(handle, "fetch abandoned")
+    
+    def stats(self) -> Dict[str, int]:
+        return {
+            "workers": len(self._workers),
+            "fetches": self.fetches,
+            "restarts": self.restarts,
+            "recycled": self.recycled,
+        }
+    
+    def close(self):
+        for handle in list(self._workers.values()):
+            self._stop(handle, "shutting down")
+        self._workers.clear()
+        self._idle = None
+
+fetch_process_pool = FetchProcessPool(FETCH_WORKERS, FETCH_WORKER_MAX_FETCHES, FETCH_WORKER_RECYCLE_MB, FETCH_WORKER_MEMORY_MB)
+
+class CdpError(Exception):
+    """A DevTools protocol command failed or the browser went away"""
+
+def js_call(script: str, *args, awaits: bool = False) -> str:
+    """Wrap a Selenium-style script (reads arguments[...]) as a Runtime.evaluate expression.
+    
+    args are JSON-encoded. awaits=True appends a resolve callback, like
+    execute_async_script, and the expression evaluates to a promise.
+    """
+    function = f"(function() {{{script}}})"
+    encoded = [json.dumps(arg) for arg in args]
+    if awaits:
+        return f"new Promise(resolve => {function}.apply(null, [{', '.join(encoded + ['resolve'])}]))"
+    return f"{function}.apply(null, [{', '.join(encoded)}])"
+
+# Resolves with the first acceptable container selector, or null after timeoutMs.
+# Same rule as SelectorResolver.find_now: only `immediate` ones before graceMs
+CONTAINER_WAIT_SCRIPT = """
+const candidates = arguments[0], immediate = arguments[1], graceMs = arguments[2], timeoutMs = arguments[3];
+const done = arguments[arguments.length - 1];
+const start = performance.now();
+const poll = () => {
+    const elapsed = performance.now() - start;
+    for (const selector of candidates) {
+        if (elapsed < graceMs && !immediate.includes(selector)) continue;
+        if (document.querySelector(selector)) return done(selector);
+    }
+    if (elapsed >= timeoutMs) return done(null);
+    setTimeout(poll, 250);
+};
+poll();
+"""
+
+# Container text and quest card texts in one round trip
+CDP_EXTRACT_SCRIPT = """
+const container = document.querySelector(arguments[0]);
+if (!container) return null;
+const cards = (function() {""" + QUEST_CARDS_SCRIPT + """}).apply(null, [container, arguments[1]]);
+return {text: container.innerText || "", cards: cards || []};
+"""
+
+class CdpBrowser:
+    """One headless Chrome spoken to over its DevTools WebSocket.
+    
+    Commands are JSON messages matched to their replies by id; a reader task
+    resolves the waiting futures and hands events to per-page listeners,
+    keyed by the flattened session id of each attached target.
+    """
+    
+    def __init__(self):
+        self.process = None
+        self.page_loads = 0
+        self._profile_dir: Optional[str] = None
+        self._session = None
+        self._ws = None
+        self._reader: Optional[asyncio.Task] = None
+        self._stderr_task: Optional[asyncio.Task] = None
+        self._next_id = 0
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._listeners: Dict[str, object] = {}
+    
+    @property
+    def alive(self) -> bool:
+        return (self.process is not None and self.process.returncode is None
+                and self._ws is not None and not self._ws.closed)
+    
+    async def start(self):
+        require("http")
+        binary = find_chrome_binary() or next(
+            filter(None, map(shutil.which, ("chromium", "chromium-browser", "google-chrome", "chrome"))), None
+        )
+        if not binary:
+            raise CdpError(f"Chrome not found at {CHROME_PATH} or on PATH")
+        # Remote debugging is the whole point here, so drop the Render flag that would turn DevTools off
+        args = [arg for arg in chrome_arguments() if arg != "--disable-dev-tools"]
+        self._profile_dir = tempfile.mkdtemp(prefix="zealy-cdp-")
+        self.process = await asyncio.create_subprocess_exec(
+            binary, *args, "--remote-debugging-port=0", f"--user-data-dir={self._profile_dir}", "about:blank",
+            stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.PIPE,
+            start_new_session=hasattr(os, "setsid")  # Own process group, reaped as one
+        )
+        chrome_registry.register_pid(self.process.pid)
+        ws_url = await asyncio.wait_for(self._read_ws_url(), CDP_LAUNCH_TIMEOUT)
+        # Chrome blocks once the stderr pipe fills, so keep reading it
+        self._stderr_task = asyncio.create_task(self._drain_stderr())
+        self._session = aiohttp.ClientSession()
+        self._ws = await self._session.ws_connect(ws_url, max_msg_size=0)
+        self._reader = asyncio.create_task(self._read_loop())
+        print(f"🛰️ CDP browser started (PID {self.process.pid}) at {ws_url}")
+    
+    async def _read_ws_url(self) -> str:
+        while True:
+            line = await self.process.stderr.readline()
+            if not line:
+                raise CdpError(f"Chrome exited with code {await self.process.wait()} before DevTools was listening")
+            match = re.search(rb"DevTools listening on (ws://\S+)", line)
+            if match:
+                return match.group(1).decode()
+    
+    async def _drain_stderr(self):
+        while await self.process.stderr.readline():
+            pass
+    
+    async def _read_loop(self):
+        try:
+            async for message in self._ws:
+                if message.type != aiohttp.WSMsgType.TEXT:
                     continue
-                return None, time.time() - start_time, "No suitable container found", None
+                data = json.loads(message.data)
+                if "id" in data:
+                    future = self._pending.pop(data["id"], None)
+                    if future is None or future.done():
+                        continue
+                    if "error" in data:
+                        future.set_exception(CdpError(data["error"].get("message", "unknown error")))
+                    else:
+                        future.set_result(data.get("result", {}))
+                else:
+                    listener = self._listeners.get(data.get("sessionId"))
+                    if listener:
+                        listener(data.get("method"), data.get("params", {}))
+        finally:
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(CdpError("Chrome disconnected"))
+            self._pending.clear()
+    
+    async def send(self, method: str, params: Optional[Dict] = None, session_id: Optional[str] = None,
+                   timeout: float = REQUEST_TIMEOUT) -> Dict:
+        if not self.alive:
+            raise CdpError("Chrome not reachable")
+        self._next_id += 1
+        message_id = self._next_id
+        message = {"id": message_id, "method": method, "params": params or {}}
+        if session_id:
+            message["sessionId"] = session_id
+        future = asyncio.get_running_loop().create_future()
+        self._pending[message_id] = future
+        try:
+            await self._ws.send_str(json.dumps(message))
+            return await asyncio.wait_for(future, timeout)
+        finally:
+            self._pending.pop(message_id, None)
+    
+    async def evaluate(self, session_id: str, expression: str, timeout: float = REQUEST_TIMEOUT):
+        """Runtime.evaluate, awaiting a returned promise. Retries while a navigation swaps the document"""
+        deadline = time.time() + timeout
+        while True:
+            try:
+                result = await self.send("Runtime.evaluate", {
+                    "expression": expression, "awaitPromise": True, "returnByValue": True
+                }, session_id, max(deadline - time.time(), 1))
+            except CdpError as e:
+                if "context" in str(e).lower() and time.time() < deadline:
+                    await asyncio.sleep(0.25)
+                    continue
+                raise
+            if "exceptionDetails" in result:
+                details = result["exceptionDetails"]
+                raise CdpError(f"JavaScript error: {details.get('exception', {}).get('description') or details.get('text')}")
+            return result.get("result", {}).get("value")
+    
+    def listen(self, session_id: str, listener):
+        self._listeners[session_id] = listener
+    
+    def unlisten(self, session_id: Optional[str]):
+        self._listeners.pop(session_id, None)
+    
+    def memory_mb(self) -> float:
+        """Process tree memory (blocking - run in an executor)"""
+        require("psutil")
+        if self.process is None:
+            return 0.0
+        chrome_registry.refresh(self.process.pid)
+        try:
+            return process_tree_memory_mb(psutil.Process(self.process.pid))[0]
+        except psutil.NoSuchProcess:
+            return 0.0
+    
+    async def close(self):
+        if self._ws is not None:
+            await self._ws.close()
+        if self._reader:
+            self._reader.cancel()
+        if self._session is not None:
+            await self._session.close()
+        if self.process is not None:
+            await asyncio.get_running_loop().run_in_executor(None, chrome_registry.reap, self.process.pid)
+            try:
+                await asyncio.wait_for(self.process.wait(), REAP_TIMEOUT)
+            except asyncio.TimeoutError:
+                pass
+        if self._stderr_task:
+            self._stderr_task.cancel()
+        if self._profile_dir:
+            shutil.rmtree(self._profile_dir, ignore_errors=True)
+    
+    def kill(self):
+        """Synchronous close for shutdown paths that run after the event loop has stopped"""
+        if self.process is not None:
+            chrome_registry.reap(self.process.pid)
+        if self._profile_dir:
+            shutil.rmtree(self._profile_dir, ignore_errors=True)
+
+class CdpFetcher:
+    """FETCH_BACKEND=cdp: checks load as pages of one headless Chrome driven from the event loop.
+    
+    Navigation, the container wait and the DOM stability wait are protocol
+    events and Runtime.evaluate promises awaited on the loop, so a check in
+    flight costs a tab rather than an executor thread plus a browser. Up to
+    max_targets pages load at once. The browser is restarted after
+    max_fetches page loads or once its process tree passes recycle_mb (after
+    in-flight pages finish), and straight away if it crashes. Returns the
+    same (hash, response_time, error, sample) tuple as get_content_hash_fast.
+    """
+    
+    def __init__(self, max_targets: int, max_fetches: int, recycle_mb: float):
+        self.max_targets = max(1, max_targets)
+        self.max_fetches = max_fetches
+        self.recycle_mb = recycle_mb
+        self.browser: Optional[CdpBrowser] = None
+        self._cond: Optional[asyncio.Condition] = None
+        self._recycle_reason: Optional[str] = None
+        self.active = 0
+        self.fetches = 0
+        self.launches = 0
+        self.restarts = 0
+        self.recycled = 0
+    
+    async def _restart(self, reason: Optional[str]):
+        if self.browser is not None:
+            print(f"🔄 Restarting CDP browser ({reason})")
+            await self.browser.close()
+            self.browser = None
+        self._recycle_reason = None
+    
+    async def _acquire(self) -> CdpBrowser:
+        if self._cond is None:
+            self._cond = asyncio.Condition()
+        async with self._cond:
+            # A recycle waits for the pages still loading in the old browser
+            await self._cond.wait_for(
+                lambda: self.active < self.max_targets and not (self._recycle_reason and self.active)
+            )
+            if self.browser is not None and not self.browser.alive:
+                self.restarts += 1
+                await self._restart("browser died")
+            elif self._recycle_reason:
+                await self._restart(self._recycle_reason)
+            if self.browser is None:
+                browser = CdpBrowser()
+                try:
+                    await browser.start()
+                except BaseException:
+                    await browser.close()
+                    raise
+                self.browser = browser
+                self.launches += 1
+            self.active += 1
+            return self.browser
+    
+    async def _release(self, browser: CdpBrowser, url: str):
+        memory_mb = await asyncio.get_running_loop().run_in_executor(None, browser.memory_mb)
+        async with self._cond:
+            # Pages share one browser, so each gets an even share of its memory
+            record_fetch_detail(url, browser_memory_mb=memory_mb / max(self.active, 1))
+            self.active -= 1
+            self.fetches += 1
+            if browser is self.browser and not self._recycle_reason:
+                browser.page_loads += 1
+                if browser.page_loads >= self.max_fetches:
+                    self._recycle_reason = f"{browser.page_loads} page loads"
+                elif memory_mb > self.recycle_mb:
+                    self._recycle_reason = f"using {memory_mb:.1f}MB > {self.recycle_mb}MB"
+                if self._recycle_reason:
+                    self.recycled += 1
+            if self._recycle_reason and not self.active:
+                await self._restart(self._recycle_reason)
+            self._cond.notify_all()
+    
+    async def fetch(self, url: str, debug_mode: bool = False) -> Tuple[Optional[str], float, Optional[str], Optional[str]]:
+        start_time = time.time()
+        timer = PhaseTimer()
+        print(f"🛰️ Loading URL over CDP: {url}")
+        timer.start("launch")
+        try:
+            browser = await self._acquire()
+        except Exception as e:
+            record_phase_times(url, timer.stop())
+            print(f"❌ Could not start CDP browser: {e}")
+            return None, time.time() - start_time, f"Failed to create driver: {e}", None
+        
+        target_id = None
+        session_id = None
+        tab_stats = {"bytes": 0, "requests": 0, "blocked": 0}
+        loaded = asyncio.Event()
+        
+        def on_event(method: str, params: Dict):
+            if method == "Page.loadEventFired":
+                loaded.set()
+            else:
+                count_network_event(tab_stats, method, params)
+        
+        try:
+            target_id = (await browser.send("Target.createTarget", {"url": "about:blank"}))["targetId"]
+            session_id = (await browser.send("Target.attachToTarget", {"targetId": target_id, "flatten": True}))["sessionId"]
+            browser.listen(session_id, on_event)
+            await browser.send("Page.enable", {}, session_id)
+            await browser.send("Network.enable", {}, session_id)
+            if RESOURCE_BLOCKING_ENABLED:
+                await browser.send("Network.setBlockedURLs", {"urls": get_blocked_url_patterns(url)}, session_id)
             
-            # Wait a bit more for content to load
-            time.sleep(2)
+            timer.start("navigate")
+            navigation_start = time.time()
+            loaded.clear()  # Only the load event of the page we are about to open counts
+            navigation = await browser.send("Page.navigate", {"url": url}, session_id)
+            if navigation.get("errorText"):
+                print(f"⚠️ Navigation failed for {url}: {navigation['errorText']}")
+                return None, time.time() - start_time, f"Navigation error: {navigation['errorText']}", None
+            await asyncio.wait_for(loaded.wait(), REQUEST_TIMEOUT)
             
-            content = container.text
+            timer.start("selector_wait")
+            selector = await browser.evaluate(session_id, js_call(
+                CONTAINER_WAIT_SCRIPT, selector_resolver.candidates(url), [ZEALY_CONTAINER_SELECTOR],
+                SELECTOR_FALLBACK_GRACE * 1000, ELEMENT_WAIT_TIMEOUT * 1000, awaits=True
+            ), ELEMENT_WAIT_TIMEOUT + 5)
+            if not selector:
+                print("❌ No suitable container found after trying all selectors")
+                return None, time.time() - start_time, "No suitable container found", None
+            selector_resolver.matched(url, selector)
             
-            if not content or len(content.strip()) < 10:
+            timer.start("stability_wait")
+            stability = await browser.evaluate(session_id, js_call(
+                DOM_STABILITY_SCRIPT, selector, DOM_QUIET_WINDOW_MS, DOM_STABLE_DEADLINE * 1000, awaits=True
+            ), DOM_STABLE_DEADLINE + 5)
+            record_fetch_detail(url, stable_time=time.time() - navigation_start, dom_mutations=stability["mutations"],
+                                stable_timed_out=bool(stability["timed_out"]))
+            
+            timer.start("extract")
+            extracted = await browser.evaluate(session_id, js_call(CDP_EXTRACT_SCRIPT, selector, QUEST_CARD_SELECTOR))
+            content = extracted["text"] if extracted else ""
+            if len(content.strip()) < 10:
                 print(f"⚠️ Content too short: {len(content)} chars")
-                if retry_count < max_retries - 1:
-                    retry_count += 1
-                    time.sleep(5)  # Wait before retry
-                    continue
                 return None, time.time() - start_time, f"Content too short: {len(content)} chars", None
             
-            print(f"📄 Content retrieved successfully, length: {len(content)} chars")
+            fingerprints = build_fingerprints(parse_quest_cards(extracted["cards"], url))
+            if fingerprints:
+                print(f"🧩 Fingerprinted {len(fingerprints)} quests")
+                record_fetch_detail(url, fingerprints=fingerprints)
             
-            # Use the simpler content cleaning from second code
-            clean_content = re.sub(
-                r'\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}Z|\d+ XP|\b[A-F0-9]{8}-(?:[A-F0-9]{4}-){3}[A-F0-9]{12}\b', 
-                '', 
-                content
-            )
-            
-            print(f"📄 Content cleaned, original: {len(content)} chars, cleaned: {len(clean_content)} chars")
-            
-            content_hash = hashlib.sha256(clean_content.strip().encode()).hexdigest()
+            content_hash = hash_page_content(content, url)
+            if snapshot_recorder.enabled:
+                await asyncio.get_running_loop().run_in_executor(
+                    None, lambda: snapshot_recorder.capture(url, content, FETCH_SOURCE_BROWSER, content_hash,
+                                                            fingerprints=fingerprints, card_texts=extracted["cards"])
+                )
             response_time = time.time() - start_time
-            
-            # Return sample for debugging if requested
             content_sample = content[:500] if debug_mode else None
-            
             print(f"🔢 Hash generated: {content_hash[:8]}... in {response_time:.2f}s")
             return content_hash, response_time, None, content_sample
-            
-        except TimeoutException:
+        
+        except asyncio.TimeoutError:
             print(f"⚠️ Timeout waiting for page elements on {url}")
-            if retry_count < max_retries - 1:
-                retry_count += 1
-                time.sleep(5)
-                continue
             return None, time.time() - start_time, "Timeout waiting for page elements", None
-        except WebDriverException as e:
-            print(f"⚠️ WebDriver error: {str(e)}")
-            if retry_count < max_retries - 1:
-                retry_count += 1
-                time.sleep(5)
-                continue
-            return None, time.time() - start_time, f"WebDriver error: {str(e)}", None
+        except CdpError as e:
+            error_msg = f"CDP error: {e}"
+            print(f"⚠️ {error_msg}")
+            return None, time.time() - start_time, error_msg, None
         except Exception as e:
             error_msg = f"Error: {str(e)}"
             print(f"❌ {error_msg}")
             print(f"❌ Full traceback: {traceback.format_exc()}")
-            if retry_count < max_retries - 1:
-                retry_count += 1
-                time.sleep(5)
-                continue
             return None, time.time() - start_time, error_msg, None
-            
+        
         finally:
-            if driver:
+            timer.start("teardown")
+            browser.unlisten(session_id)
+            if target_id and browser.alive:
                 try:
-                    print("🔄 Closing driver...")
-                    driver.quit()
-                    print("✅ Driver closed successfully")
-                    # Force cleanup after each driver use
-                    gc.collect()
-                except Exception as e:
-                    print(f"⚠️ Error closing driver: {e}")
+                    await browser.send("Target.closeTarget", {"targetId": target_id}, timeout=REAP_TIMEOUT)
+                except (CdpError, asyncio.TimeoutError):
+                    pass
+            if tab_stats["requests"]:
+                record_network_stats(url, tab_stats)
+            await self._release(browser, url)
+            record_phase_times(url, timer.stop())
+    
+    def stats(self) -> Dict[str, int]:
+        return {
+            "browsers": int(self.browser is not None and self.browser.alive),
+            "pages": self.active,
+            "fetches": self.fetches,
+            "launches": self.launches,
+            "restarts": self.restarts,
+            "recycled": self.recycled,
+        }
+    
+    async def close_idle(self):
+        """Close the browser unless pages are loading - it is started again on the next fetch"""
+        if self._cond is None:
+            return
+        async with self._cond:
+            if self.browser is not None and not self.active:
+                await self.browser.close()
+                self.browser = None
+                self._recycle_reason = None
+    
+    async def close(self):
+        if self.browser is not None:
+            await self.browser.close()
+            self.browser = None
+    
+    def kill(self):
+        """Synchronous shutdown for finally blocks that run after the event loop has closed"""
+        if self.browser is not None:
+            self.browser.kill()
+            self.browser = None
+
+cdp_fetcher = CdpFetcher(CDP_MAX_TARGETS, CDP_MAX_FETCHES, CDP_RECYCLE_MB)
+
+async def fetch_url_content(url: str, debug_mode: bool = False) -> Tuple[Optional[str], float, Optional[str], Optional[str], str]:
+    """Fetch over HTTP first, falling back to Chrome. Returns the usual tuple plus the source used"""
+    if HTTP_FIRST_ENABLED:
+        http_start = time.time()
+        result = await http_fetcher.fetch(url, debug_mode)
+        record_phase_times(url, {"http": time.time() - http_start})
+        if result[0] is not None:
+            return result + (FETCH_SOURCE_HTTP,)
+        # Even a 404 goes to Chrome - the board may be client-rendered under a route the server does not know
+        print(f"↪️ HTTP fast path failed for {url} ({result[2]}), falling back to Chrome")
+    
+    if FETCH_BACKEND == "process":
+        result = await fetch_process_pool.fetch(url, debug_mode)
+    elif FETCH_BACKEND == "cdp":
+        result = await cdp_fetcher.fetch(url, debug_mode)
+    else:
+        loop = asyncio.get_event_loop()
+        result = await loop.run_in_executor(None, get_content_hash_fast, url, debug_mode)
+    return result + (FETCH_SOURCE_BROWSER,)
+
+# Error classes - decide what is worth retrying
+ERROR_TIMEOUT = "timeout"
+ERROR_NAVIGATION = "navigation"
+ERROR_EMPTY_CONTENT = "empty_content"
+ERROR_DRIVER_CRASH = "driver_crash"
+ERROR_PERMANENT = "permanent"
+ERROR_UNKNOWN = "unknown"
+RETRYABLE_ERRORS = (ERROR_TIMEOUT, ERROR_NAVIGATION, ERROR_EMPTY_CONTENT, ERROR_DRIVER_CRASH, ERROR_UNKNOWN)
+
+def classify_error(error: Optional[str]) -> str:
+    """Map a fetch error message to an error class"""
+    if not error:
+        return ERROR_UNKNOWN
+    text = error.lower()
+    # DNS failures (net::ERR_NAME_NOT_RESOLVED) are usually transient and fall through to navigation
+    if any(marker in text for marker in ("page not found", "invalid argument")):
+        return ERROR_PERMANENT
+    if any(marker in text for marker in ("failed to create driver", "invalid session id", "chrome not reachable",
+                                         "session deleted", "disconnected", "crashed", "no such window")):
+        return ERROR_DRIVER_CRASH
+    if "timeout" in text or "timed out" in text:
+        return ERROR_TIMEOUT
+    if any(marker in text for marker in ("content too short", "no suitable container", "not parseable")):
+        return ERROR_EMPTY_CONTENT
+    if "net::err_" in text or "http error" in text:
+        return ERROR_NAVIGATION
+    return ERROR_UNKNOWN
+
+class RetryPolicy:
+    """Jittered exponential back-off bounded by attempts and a total time budget"""
+    
+    def __init__(self, max_attempts: int = MAX_RETRIES, base_delay: float = RETRY_DELAY_BASE,
+                 max_delay: float = RETRY_DELAY_MAX, budget: float = CHECK_TIME_BUDGET):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget = budget
+    
+    def delay(self, attempt: int) -> float:
+        """Back-off before attempt number attempt + 1 (attempt counts from 1)"""
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        return delay * random.uniform(0.5, 1.5)
+    
+    def next_delay(self, attempt: int, error_class: str, elapsed: float, expected_duration: float) -> Optional[float]:
+        """Delay before the next attempt, or None if the check should give up"""
+        if error_class not in RETRYABLE_ERRORS or attempt >= self.max_attempts:
+            return None
+        delay = self.delay(attempt)
+        if elapsed + delay + expected_duration > self.budget:
+            print(f"⏱️ Retry budget exhausted ({elapsed:.1f}s of {self.budget}s used)")
+            return None
+        return delay
+
+retry_policy = RetryPolicy()
+
+# METRICS
+# Prometheus text exposition (format 0.0.4) served on /metrics when METRICS_PORT is set.
+# Counters and histograms are filled in as checks run; gauges are read at scrape time.
+
+def _escape_label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_labels(labels: Tuple[Tuple[str, str], ...], extra: str = "") -> str:
+    parts = [f'{name}="{_escape_label(value)}"' for name, value in labels]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Counter:
+    """Monotonic counter, one series per label combination"""
+    
+    kind = "counter"
+    
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values: Dict[Tuple[Tuple[str, str], ...], float] = {}
+        self._lock = threading.Lock()
+    
+    def _key(self, labels: Dict[str, str]) -> Tuple[Tuple[str, str], ...]:
+        return tuple((name, str(labels.get(name, ""))) for name in self.labelnames)
+    
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+    
+    def forget(self, label: str, value: str):
+        """Drop every series whose label equals value, e.g. a URL nobody monitors any more"""
+        with self._lock:
+            for key in [key for key in self._values if (label, value) in key]:
+                del self._values[key]
+    
+    def samples(self) -> List[str]:
+        with self._lock:
+            return [f"{self.name}{_format_labels(key)} {_format_value(value)}" for key, value in sorted(self._values.items())]
+
+class Histogram(Counter):
+    """Cumulative-bucket histogram with _sum and _count per label combination"""
+    
+    kind = "histogram"
+    
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = METRICS_LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+    
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            series[0][bisect.bisect_left(self.buckets, value)] += 1
+            series[1] += value
+            series[2] += 1
+    
+    def samples(self) -> List[str]:
+        lines = []
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._values.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, counts):
+                    cumulative += bucket_count
+                    le = 'le="%s"' % _format_value(bound)
+                    lines.append(f"{self.name}_bucket{_format_labels(key, le)} {cumulative}")
+                lines.append(f"{self.name}_sum{_format_labels(key)} {_format_value(total)}")
+                lines.append(f"{self.name}_count{_format_labels(key)} {count}")
+        return lines
+
+class Gauge:
+    """Value read from a callback at scrape time; the callback may return a number or {labels: value}"""
+    
+    kind = "gauge"
+    
+    def __init__(self, name: str, documentation: str, read, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.read = read
+    
+    def forget(self, label: str, value: str):
+        pass
+    
+    def samples(self) -> List[str]:
+        try:
+            value = self.read()
+        except Exception as e:
+            print(f"⚠️ Metric {self.name} unavailable: {e}")
+            return []
+        if value is None:
+            return []
+        if not isinstance(value, dict):
+            return [f"{self.name} {_format_value(value)}"]
+        return [f"{self.name}{_format_labels(tuple(zip(self.labelnames, key if isinstance(key, tuple) else (key,))))} {_format_value(v)}"
+                for key, v in sorted(value.items()) if v is not None]
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: List = []
+    
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+    
+    def counter(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+    
+    def histogram(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                  buckets: Tuple[float, ...] = METRICS_LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+    
+    def gauge(self, name: str, documentation: str, read, labelnames: Tuple[str, ...] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, read, labelnames))
+    
+    def forget_url(self, url: str):
+        for metric in self._metrics:
+            metric.forget("url", url)
+    
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+metrics = MetricsRegistry()
+
+def _memory_gauge(snapshot: MemorySnapshot) -> Dict[str, Optional[float]]:
+    scopes = {
+        "process": snapshot.python_mb,
+        "tree": snapshot.tree_mb,
+        "effective": snapshot.effective_mb,
+        "cgroup": snapshot.cgroup_current_mb,
+    }
+    return {scope: None if mb is None else mb * 1024 * 1024 for scope, mb in scopes.items()}
+
+# Fetch / check outcomes
+FETCH_DURATION = metrics.histogram("zealy_fetch_duration_seconds", "Wall time of one fetch attempt", ("url", "source", "outcome"))
+CHECK_DURATION = metrics.histogram("zealy_check_duration_seconds", "Wall time of one check including retries and back-off", ("url",))
+CHECKS_TOTAL = metrics.counter("zealy_checks_total", "Finished checks by result and error class", ("url", "result", "error_class"))
+FETCH_ATTEMPTS_TOTAL = metrics.counter("zealy_fetch_attempts_total", "Fetch attempts by source and error class", ("source", "error_class"))
+CHANGES_TOTAL = metrics.counter("zealy_changes_total", "Detected board changes", ("url",))
+# Notifications
+NOTIFICATION_SEND_DURATION = metrics.histogram("zealy_notification_send_seconds", "Duration of one Telegram send_message call", ("outcome",))
+NOTIFICATION_DELIVERY_LATENCY = metrics.histogram("zealy_notification_delivery_seconds", "Time from enqueue to delivery",
+                                                  buckets=(0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300))
+NOTIFICATIONS_TOTAL = metrics.counter("zealy_notifications_total", "Outbound Telegram messages by outcome", ("outcome",))
+# Event loop
+EVENT_LOOP_LAG = metrics.histogram("zealy_event_loop_lag_seconds", "How late the event loop woke up for a timed sleep",
+                                   buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5))
+_last_event_loop_lag = 0.0
+# Read at scrape time
+metrics.gauge("zealy_event_loop_lag_last_seconds", "Most recent event loop lag sample", lambda: _last_event_loop_lag)
+metrics.gauge("zealy_monitored_urls", "Distinct boards in the registry", lambda: len(monitored_urls))
+metrics.gauge("zealy_monitoring_active", "1 while the check scheduler is running", lambda: int(is_monitoring))
+metrics.gauge("zealy_due_queue_depth", "URLs waiting in the scheduler's due queue", lambda: len(due_queue))
+metrics.gauge("zealy_checks_in_flight", "Checks currently holding a concurrency slot", lambda: concurrency_limiter.active)
+metrics.gauge("zealy_check_concurrency_limit", "Current adaptive concurrency limit", lambda: concurrency_limiter.limit)
+metrics.gauge("zealy_notification_queue_depth", "Outbound messages not yet delivered, held digests included", lambda: notification_queue.depth())
+metrics.gauge("zealy_drivers", "Pooled Chrome sessions by state",
+              lambda: {"in_use": driver_pool.stats()["in_use"], "idle": driver_pool.stats()["idle"]}, ("state",))
+metrics.gauge("zealy_fetch_workers", "Live fetch worker processes (FETCH_BACKEND=process)", lambda: fetch_process_pool.stats()["workers"])
+metrics.gauge("zealy_cdp_pages", "Pages loading in the CDP browser (FETCH_BACKEND=cdp)", lambda: cdp_fetcher.active)
+metrics.gauge("zealy_memory_bytes", "Memory by scope (process, tree = bot plus Chrome, effective = what thresholds act on, cgroup)",
+              lambda: _memory_gauge(latest_memory_snapshot()), ("scope",))
+metrics.gauge("zealy_memory_pressure_level", "Memory pressure level (0 normal .. 3 alert)",
+              lambda: PRESSURE_LEVELS.index(memory_pressure_watcher.level))
+metrics.gauge("zealy_circuit_breakers_open", "URLs parked by their circuit breaker",
+              lambda: sum(1 for data in monitored_urls.values() if data.breaker_state != BREAKER_CLOSED))
+
+async def monitor_event_loop_lag(interval: float = EVENT_LOOP_LAG_INTERVAL):
+    """Sleep for interval and record how much later than asked the loop woke up"""
+    global _last_event_loop_lag
+    while True:
+        started = time.monotonic()
+        await asyncio.sleep(interval)
+        _last_event_loop_lag = max(0.0, time.monotonic() - started - interval)
+        EVENT_LOOP_LAG.observe(_last_event_loop_lag)
+
+_metrics_runner = None
+
+async def start_metrics_server(port: int = METRICS_PORT, host: str = METRICS_HOST) -> List[asyncio.Task]:
+    """Serve /metrics and start the event loop lag probe. Returns the tasks to keep a reference to"""
+    global _metrics_runner
+    if not port or _metrics_runner is not None:
+        return []
+    require("http")
+    
+    async def handle_metrics(request: web.Request) -> web.Response:
+        body = await asyncio.get_running_loop().run_in_executor(None, metrics.render)
+        return web.Response(body=body.encode(), headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"})
     
-    return None, time.time() - start_time, "Max retries reached", None
+    app = web.Application()
+    app.router.add_get("/metrics", handle_metrics)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    try:
+        await web.TCPSite(runner, host, port).start()
+    except OSError as e:
+        print(f"⚠️ Metrics server could not bind {host}:{port}: {e}")
+        await runner.cleanup()
+        return []
+    _metrics_runner = runner
+    print(f"📈 Metrics on http://{host}:{port}/metrics")
+    return [asyncio.create_task(monitor_event_loop_lag())]
+
+async def stop_metrics_server():
+    global _metrics_runner
+    if _metrics_runner is not None:
+        await _metrics_runner.cleanup()
+        _metrics_runner = None
 
-async def check_single_url(url: str, url_data: URLData) -> Tuple[str, bool, Optional[str]]:
-    """Check a single URL for changes with generous retry logic"""
-    retry_count = 0
+async def check_single_url(url: str, url_data: URLData, prefetched: Optional[Tuple] = None) -> Tuple[str, bool, Optional[str]]:
+    """Check a single URL for changes under the shared RetryPolicy.
+    
+    prefetched is an already fetched (hash, response_time, error, sample, source)
+    result, e.g. from a multi-tab batch; it is used as the first attempt.
+    Permanent errors are not retried, and a URL in half-open circuit breaker
+    state gets a single trial attempt.
+    """
+    start_time = time.time()
+    policy = retry_policy
+    if url_data.breaker_state == BREAKER_HALF_OPEN:
+        policy = RetryPolicy(max_attempts=1)
+    attempt = 0
     last_error = None
+    check_phases: Dict[str, float] = {}
     
-    while retry_count < MAX_RETRIES:
+    while True:
+        attempt += 1
         try:
-            print(f"🔄 Checking URL (attempt {retry_count + 1}/{MAX_RETRIES}): {url}")
-            loop = asyncio.get_event_loop()
-            hash_result, response_time, error, content_sample = await loop.run_in_executor(
-                None, get_content_hash_fast, url, False
-            )
-            
-            if hash_result is None:
-                retry_count += 1
-                last_error = error or "Unknown error"
-                
-                if retry_count < MAX_RETRIES:
-                    delay = RETRY_DELAY_BASE * retry_count
-                    print(f"⏳ Retrying {url} in {delay:.1f}s (attempt {retry_count + 1}/{MAX_RETRIES})")
-                    print(f"⚠️ Last error: {last_error}")
-                    await asyncio.sleep(delay)
-                    continue
-                else:
-                    url_data.failures += 1
-                    url_data.consecutive_successes = 0
-                    url_data.last_error = last_error
-                    print(f"❌ Max retries reached for {url}. Failure #{url_data.failures}")
-                    print(f"❌ Final error: {last_error}")
-                    return url, False, last_error
+            print(f"🔄 Checking URL (attempt {attempt}/{policy.max_attempts}): {url}")
+            fetch_started = None
+            if prefetched is not None and attempt == 1:
+                hash_result, response_time, error, content_sample, source = prefetched
+                fetch_time = response_time
+            else:
+                fetch_started = time.time()
+                hash_result, response_time, error, content_sample, source = await fetch_url_content(url)
+                fetch_time = time.time() - fetch_started
+            attempt_class = "none" if hash_result is not None else classify_error(error or "Unknown error")
+            FETCH_DURATION.observe(fetch_time, url=url, source=source, outcome="ok" if hash_result is not None else "error")
+            FETCH_ATTEMPTS_TOTAL.inc(source=source, error_class=attempt_class)
             
-            # Success case
-            url_data.failures = 0
-            url_data.consecutive_successes += 1
-            url_data.last_error = None
-            url_data.check_count += 1
-            url_data.update_response_time(response_time)
-            url_data.last_checked = time.time()
+            details = pop_fetch_details(url)
+            attempt_phases = details.get("phases", {})
+            if fetch_started is not None:
+                attempt_phases["overhead"] = max(0.0, fetch_time - sum(attempt_phases.values()))
+            for phase, seconds in attempt_phases.items():
+                check_phases[phase] = check_phases.get(phase, 0.0) + seconds
+            fingerprints = details.get("fingerprints")
+            if "stable_time" in details:
+                url_data.update_stable_time(details["stable_time"])
+            if "selector" in details:
+                url_data.preferred_selector = details["selector"]
+            if "browser_memory_mb" in details:
+                url_data.last_browser_memory_mb = details["browser_memory_mb"]
+                url_data.peak_browser_memory_mb = max(url_data.peak_browser_memory_mb, details["browser_memory_mb"])
+            if "bytes_transferred" in details:
+                url_data.last_bytes_transferred = details["bytes_transferred"]
+                url_data.last_request_count = details["request_count"]
+                url_data.last_blocked_requests = details["blocked_requests"]
             
-            # Check for changes
-            has_changes = url_data.hash != hash_result
-            if has_changes:
-                print(f"🔔 Change detected for {url}")
-                url_data.hash = hash_result
-                return url, True, None
-            else:
-                print(f"✓ No changes for {url} (avg: {url_data.avg_response_time:.2f}s)")
-                return url, False, None
-                
+            if hash_result is not None:
+                break
+            last_error = error or "Unknown error"
         except Exception as e:
-            retry_count += 1
             last_error = f"Unexpected error: {str(e)}"
             print(f"⚠️ Error checking {url}: {last_error}")
             print(f"⚠️ Full traceback: {traceback.format_exc()}")
-            
-            if retry_count < MAX_RETRIES:
-                delay = RETRY_DELAY_BASE * retry_count
-                print(f"⏳ Retrying after error in {delay}s...")
-                await asyncio.sleep(delay)
+        
+        error_class = classify_error(last_error)
+        delay = policy.next_delay(attempt, error_class, time.time() - start_time, url_data.avg_response_time)
+        if delay is None:
+            url_data.record_failure(last_error, error_class)
+            CHECK_DURATION.observe(time.time() - start_time, url=url)
+            CHECKS_TOTAL.inc(url=url, result="failure", error_class=error_class)
+            phase_timings.add(url, CheckTiming(start_time, time.time() - start_time, attempt, False, check_phases))
+            url_data.phase_summary = format_phase_percentiles(url) or ""
+            print(f"❌ Giving up on {url} after {attempt} attempt(s). Failure #{url_data.failures}")
+            print(f"❌ Final error ({error_class}): {last_error}")
+            return url, False, last_error
+        
+        print(f"⏳ Retrying {url} in {delay:.1f}s ({error_class}: {last_error})")
+        backoff_start = time.time()
+        await asyncio.sleep(delay)
+        check_phases["backoff"] = check_phases.get("backoff", 0.0) + time.time() - backoff_start
+    
+    # Success case
+    CHECK_DURATION.observe(time.time() - start_time, url=url)
+    CHECKS_TOTAL.inc(url=url, result="success", error_class="none")
+    phase_timings.add(url, CheckTiming(start_time, time.time() - start_time, attempt, True, check_phases))
+    url_data.phase_summary = format_phase_percentiles(url) or ""
+    url_data.record_success()
+    url_data.check_count += 1
+    url_data.update_response_time(response_time)
+    url_data.last_checked = time.time()
+    
+    # Check for changes against the last result from the same source
+    previous_hash = url_data.previous_hash(source)
+    previous_fingerprints = url_data.source_fingerprints.get(source)
+    url_data.source_hashes[source] = hash_result
+    url_data.hash = hash_result
+    if fingerprints:
+        url_data.source_fingerprints[source] = fingerprints
+    else:
+        # A stale map would be diffed against whatever the next check finds
+        url_data.source_fingerprints.pop(source, None)
+    if previous_hash is None:
+        print(f"📌 First {source} baseline for {url}")
+        return url, False, None
+    
+    if fingerprints and previous_fingerprints:
+        # Quest-level comparison - page noise outside quest cards is ignored
+        diff = diff_fingerprints(previous_fingerprints, fingerprints)
+        has_changes = any(diff.values())
+        if has_changes:
+            url_data.last_diff = diff
+        elif previous_hash != hash_result:
+            print(f"🔇 Page text changed but quests did not for {url}")
+    else:
+        if fingerprints or previous_fingerprints:
+            missing = "this" if not fingerprints else "the previous"
+            print(f"📄 No quest fingerprints on {missing} {source} check of {url} - comparing the whole-page hash")
+        has_changes = previous_hash != hash_result
+        if has_changes:
+            url_data.last_diff = {}
+    
+    if has_changes:
+        CHANGES_TOTAL.inc(url=url)
+        print(f"🔔 Change detected for {url}")
+        return url, True, None
+    else:
+        print(f"✓ No changes for {url} via {source} (avg: {url_data.avg_response_time:.2f}s)")
+        return url, False, None
+
+def split_message(text: str, limit: int = TELEGRAM_MAX_MESSAGE_LENGTH) -> List[str]:
+    """Split text into Telegram-sized parts, preferring line then word boundaries"""
+    parts = []
+    while len(text) > limit:
+        cut = text.rfind("\n", 0, limit + 1)
+        if cut <= 0:
+            cut = text.rfind(" ", 0, limit + 1)
+        if cut <= 0:
+            cut = limit
+        parts.append(text[:cut])
+        # Drop the separator we split on, keep everything else
+        text = text[cut + 1:] if text[cut] in ("\n", " ") else text[cut:]
+    if text or not parts:
+        parts.append(text)
+    return parts
+
+async def reply_long(message, text: str):
+    """reply_text that sends every part of a long message instead of truncating it"""
+    for part in split_message(text):
+        await message.reply_text(part)
+
+class TokenBucket:
+    """Allows `rate` sends per second with bursts of up to `capacity`"""
+    
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+    
+    def wait_time(self) -> float:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+    
+    def take(self):
+        self.tokens -= 1
+
+@dataclass
+class OutboundMessage:
+    chat_id: int
+    text: str
+    enqueued_at: float
+
+class NotificationQueue:
+    """Outbound Telegram messages, delivered by a single sender task.
+    
+    Priority messages jump ahead of normal ones. Change alerts queued with
+    digest=True are held until the scheduler finishes a cycle (or
+    DIGEST_WINDOW passes) and go out as one message per chat. Sends are paced
+    by a per-chat token bucket, wait out RetryAfter (up to
+    SEND_MAX_RETRY_AFTER times and SEND_RETRY_AFTER_BUDGET seconds), and retry
+    network errors with backoff, so callers never block on Telegram.
+    """
+    
+    def __init__(self):
+        self.bot = None
+        self._priority: deque = deque()
+        self._normal: deque = deque()
+        self._digest: Dict[int, List[str]] = {}
+        self._digest_deadline: Optional[float] = None
+        self._buckets: Dict[int, TokenBucket] = {}
+        self._wake: Optional[asyncio.Event] = None
+        self._idle: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self.sent = 0
+        self.failed = 0
+        self.retry_after_count = 0
+        self.send_latencies: deque = deque(maxlen=200)  # enqueue -> delivered, seconds
+    
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+    
+    def depth(self) -> int:
+        return len(self._priority) + len(self._normal) + sum(len(v) for v in self._digest.values())
+    
+    def start(self, bot):
+        self.bot = bot
+        if self.running:
+            return
+        require("telegram")
+        self._wake = asyncio.Event()
+        self._idle = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+    
+    def put(self, text: str, chat_id: int = None, priority: bool = False, digest: bool = False):
+        chat_id = CHAT_ID if chat_id is None else chat_id
+        if digest:
+            self._digest.setdefault(chat_id, []).append(text)
+            if self._digest_deadline is None:
+                self._digest_deadline = time.monotonic() + DIGEST_WINDOW
+        else:
+            lane = self._priority if priority else self._normal
+            now = time.monotonic()
+            lane.extend(OutboundMessage(chat_id, part, now) for part in split_message(text))
+        if self._wake:
+            self._idle.clear()
+            self._wake.set()
+    
+    def flush_digest(self):
+        """End of a check cycle: turn held change alerts into one priority message per chat"""
+        digest, self._digest = self._digest, {}
+        self._digest_deadline = None
+        for chat_id, alerts in digest.items():
+            if len(alerts) == 1:
+                text = alerts[0]
             else:
-                url_data.failures += 1
-                url_data.consecutive_successes = 0
-                url_data.last_error = last_error
-                return url, False, last_error
+                text = f"🚨 {len(alerts)} CHANGES DETECTED\n\n" + "\n\n".join(alerts)
+            self.put(text, chat_id=chat_id, priority=True)
+    
+    async def drain(self, timeout: float = 30):
+        """Flush held alerts and wait until everything queued has been handled"""
+        self.flush_digest()
+        # _idle is only set once the sender finds both lanes empty, so this also
+        # waits for a message that was already popped and is mid-send
+        if self.running and (self.depth() or not self._idle.is_set()):
+            try:
+                await asyncio.wait_for(self._idle.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                print(f"⚠️ {self.depth()} notifications still queued after {timeout}s")
+    
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+    
+    async def _run(self):
+        while True:
+            try:
+                if self._digest_deadline is not None and time.monotonic() >= self._digest_deadline:
+                    self.flush_digest()
+                
+                lane = self._priority or self._normal
+                if not lane:
+                    self._idle.set()
+                    self._wake.clear()
+                    timeout = None
+                    if self._digest_deadline is not None:
+                        timeout = max(0.0, self._digest_deadline - time.monotonic())
+                    try:
+                        await asyncio.wait_for(self._wake.wait(), timeout=timeout)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                
+                bucket = self._buckets.setdefault(lane[0].chat_id, TokenBucket(CHAT_MESSAGES_PER_SECOND, CHAT_MESSAGE_BURST))
+                wait = bucket.wait_time()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                    continue  # A priority message may have arrived meanwhile
+                bucket.take()
+                await self._deliver(lane.popleft())
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"❌ Notification sender error: {e}")
+                await asyncio.sleep(1)
+    
+    async def _deliver(self, item: OutboundMessage):
+        attempts = 0
+        backoff_delay = 1
+        retry_afters = 0
+        retry_after_waited = 0.0
+        while attempts < SEND_MAX_ATTEMPTS:
+            send_started = time.monotonic()
+            try:
+                await self.bot.send_message(chat_id=item.chat_id, text=item.text)
+                self.sent += 1
+                self.send_latencies.append(time.monotonic() - item.enqueued_at)
+                NOTIFICATION_SEND_DURATION.observe(time.monotonic() - send_started, outcome="ok")
+                NOTIFICATION_DELIVERY_LATENCY.observe(self.send_latencies[-1])
+                NOTIFICATIONS_TOTAL.inc(outcome="sent")
+                print(f"✅ Sent notification: {item.text[:50]}...")
+                return True
+            except RetryAfter as e:
+                NOTIFICATION_SEND_DURATION.observe(time.monotonic() - send_started, outcome="retry_after")
+                # Telegram told us exactly how long to back off - does not count as a failed attempt
+                # but a chat that stays throttled must not hold the whole queue forever
+                retry_after = e.retry_after.total_seconds() if hasattr(e.retry_after, "total_seconds") else e.retry_after
+                self.retry_after_count += 1
+                retry_afters += 1
+                if retry_afters > SEND_MAX_RETRY_AFTER or retry_after_waited + retry_after > SEND_RETRY_AFTER_BUDGET:
+                    print(f"⏳ Telegram rate limit - giving up after {retry_afters} waits ({retry_after_waited:.0f}s)")
+                    break
+                print(f"⏳ Telegram rate limit - retrying in {retry_after}s")
+                retry_after_waited += retry_after
+                await asyncio.sleep(retry_after)
+            except BadRequest as e:
+                NOTIFICATION_SEND_DURATION.observe(time.monotonic() - send_started, outcome="error")
+                print(f"❌ Telegram rejected notification: {e}")
+                break
+            except NetworkError as e:
+                NOTIFICATION_SEND_DURATION.observe(time.monotonic() - send_started, outcome="error")
+                attempts += 1
+                print(f"📡 Network error: {str(e)} - Retry {attempts}/{SEND_MAX_ATTEMPTS}")
+                if attempts < SEND_MAX_ATTEMPTS:
+                    await asyncio.sleep(backoff_delay)
+                    backoff_delay *= 2
+            except TelegramError as e:
+                NOTIFICATION_SEND_DURATION.observe(time.monotonic() - send_started, outcome="error")
+                print(f"❌ Telegram error sending notification: {e}")
+                break
+        
+        self.failed += 1
+        NOTIFICATIONS_TOTAL.inc(outcome="failed")
+        print(f"❌ Failed to send notification: {item.text[:50]}...")
+        return False
+
+notification_queue = NotificationQueue()
+
+async def send_notification(bot, message: str, priority: bool = False, digest: bool = False, chat_id: int = None):
+    """Queue a Telegram notification (to the admin chat by default) - delivery happens on the sender task"""
+    if SHARD_ROLE == "worker":
+        await asyncio.get_running_loop().run_in_executor(
+            None, shard_coordinator.post_notification, message, chat_id, priority, digest
+        )
+        return True
+    notification_queue.start(bot)
+    notification_queue.put(message, chat_id=chat_id, priority=priority, digest=digest)
+    return True
+
+class AdaptiveConcurrencyLimiter:
+    """Async semaphore whose limit follows live memory headroom.
+    
+    Below MEMORY_WARNING_MB the limit grows by one slot whenever there is room
+    for another check (CHECK_MEMORY_ESTIMATE_MB), above it the limit is halved,
+    and above MEMORY_CRITICAL_MB no new checks are admitted at all.
+    """
+    
+    def __init__(self, max_limit: int, min_limit: int = 1):
+        self.max_limit = max(min_limit, max_limit)
+        self.min_limit = min_limit
+        self.limit = min_limit
+        self.active = 0
+        self._cond = asyncio.Condition()
+    
+    def adjust(self, memory_mb: float) -> int:
+        """Recompute the limit from the current memory figure"""
+        if memory_mb > MEMORY_CRITICAL_MB:
+            new_limit = 0
+        elif memory_mb > MEMORY_WARNING_MB:
+            new_limit = max(self.min_limit, self.limit // 2)
+        elif MEMORY_WARNING_MB - memory_mb > CHECK_MEMORY_ESTIMATE_MB:
+            new_limit = min(self.max_limit, max(self.limit, self.min_limit) + 1)
+        else:
+            new_limit = max(self.limit, self.min_limit)
+        
+        if new_limit != self.limit:
+            print(f"🎚️ Check concurrency {self.limit} -> {new_limit} (memory: {memory_mb:.1f}MB)")
+            self.limit = new_limit
+        return self.limit
+    
+    async def acquire(self) -> bool:
+        """Wait for a free slot. Returns False if memory is critical"""
+        async with self._cond:
+            while True:
+                memory_mb = get_memory_usage()
+                self.adjust(memory_mb)
+                if memory_mb > MEMORY_CRITICAL_MB:
+                    return False
+                if self.active < self.limit:
+                    self.active += 1
+                    return True
+                try:
+                    # Re-read memory periodically so the limit can grow back
+                    await asyncio.wait_for(self._cond.wait(), timeout=2)
+                except asyncio.TimeoutError:
+                    pass
+    
+    async def release(self):
+        async with self._cond:
+            self.active -= 1
+            self._cond.notify_all()
     
-    return url, False, last_error
+    async def refresh(self, memory_mb: float):
+        """Apply a memory reading pushed by the pressure watcher"""
+        async with self._cond:
+            self.adjust(memory_mb)
+            self._cond.notify_all()
 
-async def send_notification(bot, message: str, priority: bool = False):
-    """Send Telegram notification with retry logic"""
-    retries = 0
-    backoff_delay = 1
+concurrency_limiter = AdaptiveConcurrencyLimiter(MAX_CONCURRENT_CHECKS)
+
+def format_quest_diff(diff: Dict[str, List[str]]) -> str:
+    """Alert lines listing added/removed/modified quests (empty when unknown)"""
+    lines = []
+    for key, label in (("added", "➕ New quests"), ("removed", "➖ Removed quests"), ("modified", "✏️ Updated quests")):
+        titles = diff.get(key) or []
+        if not titles:
+            continue
+        lines.append(f"{label} ({len(titles)}):")
+        lines.extend(f"  • {title}" for title in titles[:MAX_DIFF_ITEMS])
+        if len(titles) > MAX_DIFF_ITEMS:
+            lines.append(f"  … and {len(titles) - MAX_DIFF_ITEMS} more")
+    return "\n".join(lines) + "\n" if lines else ""
+
+async def handle_check_result(bot, result: Tuple[str, bool, Optional[str]], current_time: float, previous_breaker_state: str) -> bool:
+    """Send change/breaker notifications for one check result. Returns True on change"""
+    url, has_changes, error = result
     
-    while retries < 3:
-        try:
-            await bot.send_message(chat_id=CHAT_ID, text=message)
-            print(f"✅ Sent notification: {message[:50]}...")
-            return True
-        except (TelegramError, NetworkError) as e:
-            print(f"📡 Network error: {str(e)} - Retry {retries+1}/3")
-            retries += 1
-            if retries < 3:
-                await asyncio.sleep(backoff_delay)
-                backoff_delay *= 2
-    
-    print(f"❌ Failed to send notification after 3 retries")
-    return False
+    if url not in monitored_urls:
+        print(f"⚠️ URL {url} was removed during processing")
+        return False
+        
+    url_data = monitored_urls[url]
+    subscribers = url_subscribers(url)
+    
+    if has_changes:
+        # One fetch, fanned out to every chat watching this board
+        message = (
+            f"🚨 CHANGE DETECTED!\n{url}\n"
+            f"{format_quest_diff(url_data.last_diff)}"
+            f"Avg response: {url_data.avg_response_time:.2f}s\nCheck #{url_data.check_count}"
+        )
+        notified = []
+        for chat_id in subscribers:
+            settings = get_chat_settings(chat_id)
+            subscription = subscriptions[chat_id][url]
+            if not settings.notify_changes:
+                continue
+            # Check rate limiting for notifications
+            if current_time - subscription.last_notified > settings.min_notify_interval:
+                await send_notification(bot, message, digest=True, chat_id=chat_id)
+                subscription.last_notified = current_time
+                notified.append(chat_id)
+            else:
+                print(f"🔕 Change detected but notification rate limited for chat {chat_id}")
+        if notified:
+            url_data.last_notified = current_time
+            save_bot_state(chats=notified)
+    
+    # Circuit breaker transitions - park failing URLs instead of removing them
+    status_message = None
+    if url_data.breaker_state == BREAKER_OPEN and previous_breaker_state != BREAKER_OPEN:
+        park_minutes = (url_data.breaker_open_until - time.time()) / 60
+        print(f"⏸️ Parking {url} for {park_minutes:.0f}m after {url_data.failures} failures")
+        status_message = (
+            f"⏸️ Paused checks for {url}\n"
+            f"Failures: {url_data.failures} ({url_data.last_error_class})\n"
+            f"Retrying in {park_minutes:.0f} min\n"
+            f"Last error: {url_data.last_error or 'Unknown'}"
+        )
+    elif url_data.breaker_state == BREAKER_CLOSED and previous_breaker_state != BREAKER_CLOSED:
+        print(f"▶️ {url} recovered, breaker closed")
+        status_message = f"▶️ Monitoring recovered for {url}"
+    if status_message:
+        for chat_id in subscribers:
+            if get_chat_settings(chat_id).notify_status:
+                await send_notification(bot, status_message, chat_id=chat_id)
+    
+    return has_changes
 
-async def check_urls_sequential(bot):
-    """Check URLs sequentially (one by one) with detailed logging"""
-    global monitored_urls
-    current_time = time.time()
+class DueQueue:
+    """Min-heap of URLs keyed on their next due time (stale entries are skipped lazily)"""
+    
+    def __init__(self):
+        self._heap: List[Tuple[float, str]] = []
+        self._due: Dict[str, float] = {}
+    
+    def schedule(self, url: str, due: float):
+        self._due[url] = due
+        heapq.heappush(self._heap, (due, url))
+    
+    def remove(self, url: str):
+        self._due.pop(url, None)
+    
+    def __contains__(self, url: str) -> bool:
+        return url in self._due
+    
+    def __len__(self) -> int:
+        return len(self._due)
+    
+    def _drop_stale(self):
+        while self._heap and self._due.get(self._heap[0][1]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
     
-    if not monitored_urls:
-        print("⚠️ No URLs to check")
-        return
+    def next_due(self) -> Optional[float]:
+        self._drop_stale()
+        return self._heap[0][0] if self._heap else None
     
-    print(f"🔍 Checking {len(monitored_urls)} URLs sequentially...")
+    def pop_due(self, now: float) -> List[str]:
+        """Remove and return every URL due at or before now, earliest first"""
+        due_urls = []
+        self._drop_stale()
+        while self._heap and self._heap[0][0] <= now:
+            due, url = heapq.heappop(self._heap)
+            if self._due.get(url) == due:
+                del self._due[url]
+                due_urls.append(url)
+            self._drop_stale()
+        return due_urls
+
+due_queue = DueQueue()
+
+async def run_check_unit(bot, unit: List[str]) -> int:
+    """Check one unit of URLs (one URL, or one browser's worth of tabs) and reschedule them.
     
+    The caller holds a concurrency_limiter slot, which is released here.
+    Returns the number of changes detected.
+    """
     changes_detected = 0
-    urls_to_remove = []
-    
-    for idx, (url, url_data) in enumerate(list(monitored_urls.items()), 1):
-        try:
-            print(f"\n🔄 Processing URL {idx}/{len(monitored_urls)}: {url}")
-            
-            # Check memory before each URL check - SAVE STATE FREQUENTLY
-            memory_mb = get_memory_usage()
-            if memory_mb > MEMORY_CRITICAL_MB:  # 480MB
-                print(f"🚨 CRITICAL MEMORY during URL check: {memory_mb:.1f}MB")
-                save_bot_state()  # Save before potential crash
-                print("🚨 STOPPING checks to prevent crash!")
-                break  # Stop checking URLs immediately
-            elif memory_mb > MEMORY_WARNING_MB:  # 450MB
-                print(f"⚠️ HIGH MEMORY during URL check: {memory_mb:.1f}MB - saving state...")
-                save_bot_state()  # Save state frequently when memory is high
-                cleanup_memory()
-            
-            result = await check_single_url(url, url_data)
-            
-            if isinstance(result, Exception):
-                print(f"⚠️ Task exception: {result}")
-                continue
-                
-            url, has_changes, error = result
-            
-            if url not in monitored_urls:
-                print(f"⚠️ URL {url} was removed during processing")
+    try:
+        prefetched = {}
+        if FETCH_MODE == "multitab":
+            batch = [url for url in unit if url in monitored_urls]
+            if HTTP_FIRST_ENABLED:
+                http_results = await asyncio.gather(*(http_fetcher.fetch(url) for url in batch))
+                for url, result in zip(batch, http_results):
+                    if result[0] is not None:
+                        prefetched[url] = result + (FETCH_SOURCE_HTTP,)
+                batch = [url for url in batch if url not in prefetched]
+            if batch:
+                print(f"🗂️ Fetching {len(batch)} URLs in one browser")
+                loop = asyncio.get_event_loop()
+                tab_results = await loop.run_in_executor(
+                    None, get_content_hashes_multitab, batch, False
+                )
+                for url, result in tab_results.items():
+                    prefetched[url] = result + (FETCH_SOURCE_BROWSER,)
+        
+        for url in unit:
+            url_data = monitored_urls.get(url)
+            if url_data is None:
+                print(f"⚠️ URL {url} was removed before its check")
                 continue
-                
-            url_data = monitored_urls[url]
-            
-            if has_changes:
-                changes_detected += 1
-                # Check rate limiting for notifications
-                if current_time - url_data.last_notified > 60:
-                    await send_notification(
-                        bot, 
-                        f"🚨 CHANGE DETECTED!\n{url}\nAvg response: {url_data.avg_response_time:.2f}s\nCheck #{url_data.check_count}",
-                        priority=True
-                    )
-                    url_data.last_notified = current_time
+            try:
+                print(f"\n🔄 Processing URL: {url}")
+                previous_breaker_state = url_data.breaker_state
+                result = await check_single_url(url, url_data, prefetched.pop(url, None))
+                has_changes = await handle_check_result(bot, result, time.time(), previous_breaker_state)
+                if has_changes:
+                    changes_detected += 1
+                if result[2] is None:
+                    url_data.schedule_next(has_changes, time.time())
                 else:
-                    print(f"🔕 Change detected but notification rate limited")
+                    url_data.next_check_due = time.time() + url_data.check_interval
+            except Exception as e:
+                print(f"⚠️ Error processing URL {url}: {e}")
+                print(f"⚠️ Full traceback: {traceback.format_exc()}")
+                url_data.next_check_due = time.time() + url_data.check_interval
             
-            # Handle failures with generous threshold
-            if url_data.failures > FAILURE_THRESHOLD:
-                urls_to_remove.append(url)
-                print(f"🗑️ Marking {url} for removal after {url_data.failures} failures")
-            elif url_data.failures > 3 and url_data.consecutive_successes == 0:
-                await send_notification(
-                    bot,
-                    f"⚠️ Monitoring issues for {url}\nFailures: {url_data.failures}/{FAILURE_THRESHOLD}\nLast error: {url_data.last_error or 'Unknown'}"
-                )
-                
-        except Exception as e:
-            print(f"⚠️ Error processing URL {url}: {e}")
-            print(f"⚠️ Full traceback: {traceback.format_exc()}")
-    
-    # Remove problematic URLs
-    for url in urls_to_remove:
-        del monitored_urls[url]
-        await send_notification(
-            bot, 
-            f"🔴 Removed from monitoring (too many failures): {url}",
-            priority=True
-        )
-        print(f"🗑️ Removed {url} after {FAILURE_THRESHOLD} failures")
-    
-    print(f"✅ Sequential check complete: {changes_detected} changes, {len(urls_to_remove)} removed")
-    
-    # Save state after each check cycle
-    save_bot_state()
+            if url in monitored_urls:
+                due_queue.schedule(url, url_data.next_check_due)
+        # Only the checked URLs are written, coalesced with other finished units
+        save_bot_state(unit)
+    finally:
+        await concurrency_limiter.release()
+    return changes_detected
 
 # AUTH MIDDLEWARE
+def is_admin(chat_id: int) -> bool:
+    return chat_id == CHAT_ID
+
+def is_authorized(chat_id: int) -> bool:
+    """The admin, allow-listed chats, chats the admin gave a quota, or anyone with OPEN_REGISTRATION"""
+    return is_admin(chat_id) or chat_id in ALLOWED_CHAT_IDS or chat_id in chat_settings or OPEN_REGISTRATION
+
+async def require_admin(update: Update) -> bool:
+    if is_admin(update.effective_chat.id):
+        return True
+    await update.message.reply_text("🚫 This command is only available to the bot admin")
+    return False
+
 async def auth_middleware(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.effective_chat.id
     print(f"📨 Message from chat ID: {user_id}")
-    print(f"📨 Expected chat ID: {CHAT_ID}")
-    print(f"📨 Match: {user_id == CHAT_ID}")
     
-    if user_id != CHAT_ID:
+    if not is_authorized(user_id):
         print(f"🚫 Unauthorized access from chat ID: {user_id}")
         await update.message.reply_text(f"🚫 Unauthorized access! Your chat ID: {user_id}")
         raise ApplicationHandlerStop
@@ -789,10 +4401,14 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
         "/stop - Stop monitoring\n"
         "/status - Show monitoring statistics\n"
         "/debug <number> - Debug URL content\n"
+        "/rules <number> [drop|scrub <regex> | collapse | clear] - Per-URL normalization\n"
+        "/allow <number> [pattern | clear] - Let blocked resources through for a URL\n"
         "/purge - Remove all URLs\n"
+        "/settings [changes|status on/off | interval <seconds>] - Notification settings\n"
         "/memory - Show memory usage\n"
-        f"\nMax URLs: {MAX_URLS}\n"
-        f"Check interval: {CHECK_INTERVAL}s\n"
+        + ("/quota <chat_id> <max_urls> - Let a chat use the bot (0 blocks new URLs)\n" if is_admin(update.effective_chat.id) else "")
+        + f"\nMax URLs: {get_chat_settings(update.effective_chat.id).max_urls}\n"
+        f"Check interval: {MIN_CHECK_INTERVAL}-{MAX_CHECK_INTERVAL}s (adaptive)\n"
         f"Memory alert: {MEMORY_LIMIT_MB}MB\n"
         f"Current memory: {memory_mb:.1f}MB\n"
         "🔄 Auto-restart after Render restarts!"
@@ -800,46 +4416,123 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 async def memory_status(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Show current memory usage and statistics"""
-    memory_mb = get_memory_usage()
+    if not await require_admin(update):
+        return
+    
+    # An explicit request gets a fresh sample, taken off the loop
+    snapshot = await asyncio.get_running_loop().run_in_executor(None, get_memory_snapshot)
+    memory_mb = snapshot.effective_mb
     memory_percent = (memory_mb / MEMORY_LIMIT_MB) * 100
     
     status_emoji = "🟢" if memory_percent < 60 else "🟡" if memory_percent < 80 else "🔴"
+    pool_stats = driver_pool.stats()
+    
+    breakdown = [
+        f"🐍 Bot process: {snapshot.python_mb:.1f}MB (RSS)",
+        f"🌳 Process tree: {snapshot.tree_mb:.1f}MB {snapshot.metric.upper()} over {snapshot.process_count} processes",
+    ]
+    if snapshot.cgroup_current_mb is not None:
+        limit = f"{snapshot.cgroup_max_mb:.0f}MB" if snapshot.cgroup_max_mb else "unlimited"
+        breakdown.append(
+            f"📦 Container: {snapshot.cgroup_current_mb:.1f}MB "
+            f"(working set {snapshot.cgroup_working_set_mb:.1f}MB, limit {limit})"
+        )
+    breakdown.append(
+        f"📟 Pressure: {memory_pressure_watcher.level} via {memory_pressure_watcher.backend} "
+        f"({memory_pressure_watcher.transitions} transitions, {memory_pressure_watcher.events} kernel events)"
+    )
+    registry_stats = chrome_registry.stats()
+    breakdown.append(
+        f"🔪 Chrome registry: {registry_stats['processes']} processes in {registry_stats['groups']} groups, "
+        f"reaped {registry_stats['reaped']} ({registry_stats['freed_mb']:.1f}MB freed)"
+    )
+    if FETCH_BACKEND == "process":
+        pool = fetch_process_pool.stats()
+        breakdown.append(
+            f"🧰 Fetch workers: {pool['workers']} processes, {pool['fetches']} fetches since start, "
+            f"{pool['recycled']} recycled, {pool['restarts']} crash restarts"
+        )
+    if FETCH_BACKEND == "cdp":
+        cdp = cdp_fetcher.stats()
+        breakdown.append(
+            f"🛰️ CDP browser: {'up' if cdp['browsers'] else 'down'}, {cdp['pages']} pages loading, "
+            f"{cdp['fetches']} fetches, {cdp['launches']} launches, {cdp['recycled']} recycled, "
+            f"{cdp['restarts']} crash restarts"
+        )
+    for url, fetch_mb in get_active_fetch_memory().items():
+        breakdown.append(f"🌐 {url[:40]}: {fetch_mb:.1f}MB")
     
     await update.message.reply_text(
         f"📊 Memory Status:\n\n"
         f"{status_emoji} Current usage: {memory_mb:.1f}MB\n"
+        + "\n".join(breakdown) + "\n"
         f"📏 Alert limit: {MEMORY_LIMIT_MB}MB\n"
         f"📈 Usage: {memory_percent:.1f}%\n"
         f"⚠️ Warning at: {MEMORY_WARNING_MB}MB\n"
         f"🔴 Critical at: {MEMORY_CRITICAL_MB}MB\n"
         f"🚨 Alert at: {MEMORY_LIMIT_MB}MB (Render will restart)\n\n"
-        f"💾 State file: {'✅ Exists' if os.path.exists(STATE_FILE) else '❌ Missing'}\n"
-        f"🔍 URLs monitored: {len(monitored_urls)}\n"
-        f"📡 Monitoring active: {'✅ Yes' if is_monitoring else '❌ No'}"
+        f"💾 State file: {'✅ Exists' if os.path.exists(STATE_DB_FILE) else '❌ Missing'} "
+        f"({state_store.writes} writes, {state_store.rows_written} rows)\n"
+        f"🔍 URLs monitored: {len(monitored_urls)} boards for {len(chat_settings)} chats "
+        f"({sum(len(subs) for subs in subscriptions.values())} subscriptions)\n"
+        f"📡 Monitoring active: {'✅ Yes' if is_monitoring else '❌ No'}\n"
+        f"🌐 Chrome sessions: {pool_stats['in_use']} busy, {pool_stats['idle']} idle "
+        f"(max {pool_stats['size']}, launched {pool_stats['created']}, recycled {pool_stats['recycled']})"
     )
 
 async def add_url(update: Update, context: ContextTypes.DEFAULT_TYPE):
     print("📨 /add command received!")
+    chat_id = update.effective_chat.id
+    settings = get_chat_settings(chat_id)
     
-    if len(monitored_urls) >= MAX_URLS:
-        await update.message.reply_text(f"❌ Maximum URLs limit ({MAX_URLS}) reached")
+    if len(chat_urls(chat_id)) >= settings.max_urls:
+        await update.message.reply_text(f"❌ Maximum URLs limit ({settings.max_urls}) reached")
         return
     
     if not context.args or not context.args[0]:
         await update.message.reply_text("❌ Usage: /add <zealy-url>")
         return
     
-    url = context.args[0].lower()
+    url = canonical_url(context.args[0])
     print(f"📥 Attempting to add URL: {url}")
     
-    if not re.match(r'^https://(www\.)?zealy\.io/cw/[\w/-]+', url):
+    if not re.match(r'^https://zealy\.io/cw/[\w/-]+', url):
         await update.message.reply_text("❌ Invalid Zealy URL format")
         return
     
-    if url in monitored_urls:
+    if url in subscriptions.get(chat_id, {}):
         await update.message.reply_text("ℹ️ URL already monitored")
         return
     
+    if url in monitored_urls:
+        # Another chat already watches this board - share its fetches
+        subscribe(chat_id, url)
+        save_bot_state(chats=[chat_id])
+        await update.message.reply_text(
+            f"✅ Successfully added: {url}\n"
+            f"👥 Already checked for {len(url_subscribers(url)) - 1} other chat(s) - sharing results\n"
+            f"📊 Now monitoring: {len(chat_urls(chat_id))}/{settings.max_urls}"
+        )
+        return
+    
+    if len(monitored_urls) >= MAX_TOTAL_URLS:
+        await update.message.reply_text(f"❌ The bot is at its limit of {MAX_TOTAL_URLS} monitored boards")
+        return
+    
+    if SHARD_ROLE == "frontend":
+        # No browsers in the frontend - the owning worker's first check records the baseline
+        monitored_urls[url] = URLData(
+            hash="", last_notified=0, last_checked=0, failures=0, consecutive_successes=0
+        )
+        subscribe(chat_id, url)
+        save_bot_state([url], chats=[chat_id], immediate=True)
+        await update.message.reply_text(
+            f"✅ Successfully added: {url}\n"
+            f"🧩 A worker will take the baseline on its first check\n"
+            f"📊 Now monitoring: {len(chat_urls(chat_id))}/{settings.max_urls}"
+        )
+        return
+    
     memory_mb = get_memory_usage()
     if memory_mb > MEMORY_WARNING_MB:  # Don't add URLs if memory is above 450MB
         await update.message.reply_text(
@@ -855,12 +4548,9 @@ async def add_url(update: Update, context: ContextTypes.DEFAULT_TYPE):
     )
     
     try:
-        loop = asyncio.get_event_loop()
         print(f"🔄 Getting initial hash for {url}...")
         
-        initial_hash, response_time, error, content_sample = await loop.run_in_executor(
-            None, get_content_hash_fast, url, False
-        )
+        initial_hash, response_time, error, content_sample, source = await fetch_url_content(url)
         
         if not initial_hash:
             await processing_msg.edit_text(f"❌ Failed to verify URL: {error}")
@@ -873,17 +4563,24 @@ async def add_url(update: Update, context: ContextTypes.DEFAULT_TYPE):
             failures=0,
             consecutive_successes=1,
             check_count=1,
-            avg_response_time=response_time
+            avg_response_time=response_time,
+            source_hashes={source: initial_hash},
+            preferred_selector=selector_resolver.get(url)
         )
+        details = pop_fetch_details(url)
+        if details.get("fingerprints"):
+            monitored_urls[url].source_fingerprints[source] = details["fingerprints"]
+        
+        subscribe(chat_id, url)
         
         # Save state immediately after adding URL
-        save_bot_state()
+        save_bot_state([url], chats=[chat_id], immediate=True)
         
         print(f"✅ URL added successfully: {url}")
         memory_after = get_memory_usage()
         await processing_msg.edit_text(
             f"✅ Successfully added: {url}\n"
-            f"📊 Now monitoring: {len(monitored_urls)}/{MAX_URLS}\n"
+            f"📊 Now monitoring: {len(chat_urls(chat_id))}/{settings.max_urls}\n"
             f"⚡ Initial load time: {response_time:.2f}s\n"
             f"🔢 Content hash: {initial_hash[:12]}...\n"
             f"💾 Memory: {memory_after:.1f}MB/{MEMORY_LIMIT_MB}MB"
@@ -898,25 +4595,35 @@ async def add_url(update: Update, context: ContextTypes.DEFAULT_TYPE):
             print(f"❌ Could not edit message: {str(e)}")
 
 async def list_urls(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    if not monitored_urls:
+    chat_id = update.effective_chat.id
+    urls = chat_urls(chat_id)
+    if not urls:
         await update.message.reply_text("📋 No URLs monitored")
         return
     
     memory_mb = get_memory_usage()
     message_lines = ["📋 Monitored URLs:\n"]
-    for idx, (url, data) in enumerate(monitored_urls.items(), 1):
-        status = "✅" if data.failures == 0 else f"⚠️({data.failures})"
+    for idx, url in enumerate(urls, 1):
+        data = monitored_urls.get(url)
+        if data is None:
+            continue
+        if data.breaker_state == BREAKER_OPEN:
+            status = "⏸️"
+        else:
+            status = "✅" if data.failures == 0 else f"⚠️({data.failures})"
         avg_time = f" | {data.avg_response_time:.1f}s" if data.avg_response_time > 0 else ""
-        message_lines.append(f"{idx}. {status} {url}{avg_time}")
+        shared = len(url_subscribers(url))
+        shared_text = f" | 👥{shared}" if shared > 1 else ""
+        message_lines.append(f"{idx}. {status} {url}{avg_time}{shared_text}")
     
-    message_lines.append(f"\n📊 Using {len(monitored_urls)}/{MAX_URLS} slots")
+    message_lines.append(f"\n📊 Using {len(urls)}/{get_chat_settings(chat_id).max_urls} slots")
     message_lines.append(f"💾 Memory: {memory_mb:.1f}MB/{MEMORY_LIMIT_MB}MB")
     message_lines.append(f"⚙️ Auto-restart enabled")
-    message = "\n".join(message_lines)[:4000]
-    await update.message.reply_text(message)
+    await reply_long(update.message, "\n".join(message_lines))
 
 async def remove_url(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    if not monitored_urls:
+    chat_id = update.effective_chat.id
+    if not chat_urls(chat_id):
         await update.message.reply_text("❌ No URLs to remove")
         return
     
@@ -926,22 +4633,22 @@ async def remove_url(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     try:
         url_index = int(context.args[0]) - 1
-        url_list = list(monitored_urls.keys())
+        url_list = chat_urls(update.effective_chat.id)
         
         if url_index < 0 or url_index >= len(url_list):
             await update.message.reply_text(f"❌ Invalid number. Use a number between 1 and {len(url_list)}")
             return
         
         url_to_remove = url_list[url_index]
-        del monitored_urls[url_to_remove]
+        unsubscribe(chat_id, url_to_remove)
         
         # Save state after removing URL
-        save_bot_state()
+        save_bot_state([url_to_remove], chats=[chat_id], immediate=True)
         
         memory_mb = get_memory_usage()
         await update.message.reply_text(
             f"✅ Removed: {url_to_remove}\n"
-            f"📊 Now monitoring: {len(monitored_urls)}/{MAX_URLS}\n"
+            f"📊 Now monitoring: {len(chat_urls(chat_id))}/{get_chat_settings(chat_id).max_urls}\n"
             f"💾 Memory: {memory_mb:.1f}MB/{MEMORY_LIMIT_MB}MB"
         )
         print(f"🗑️ Manually removed URL: {url_to_remove}")
@@ -953,7 +4660,8 @@ async def remove_url(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text(f"❌ Error removing URL: {str(e)}")
 
 async def status(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    if not monitored_urls:
+    urls = chat_urls(update.effective_chat.id)
+    if not urls:
         await update.message.reply_text("📊 No URLs being monitored")
         return
     
@@ -964,7 +4672,10 @@ async def status(update: Update, context: ContextTypes.DEFAULT_TYPE):
     total_failures = 0
     avg_response_times = []
     
-    for url, data in monitored_urls.items():
+    for url in urls:
+        data = monitored_urls.get(url)
+        if data is None:
+            continue
         total_checks += data.check_count
         total_failures += data.failures
         if data.avg_response_time > 0:
@@ -973,12 +4684,19 @@ async def status(update: Update, context: ContextTypes.DEFAULT_TYPE):
         status_lines.append(
             f"🔗 {url[:45]}...\n"
             f"   ✅ Checks: {data.check_count} | Failures: {data.failures}\n"
-            f"   ⚡ Avg time: {data.avg_response_time:.2f}s\n"
-            f"   🕐 Last: {time.time() - data.last_checked:.0f}s ago"
+            f"   ⚡ Avg time: {data.avg_response_time:.2f}s | Stable after: {data.avg_stable_time:.2f}s\n"
+            f"   📶 Last load: {data.last_bytes_transferred / 1024:.0f}KB, {data.last_request_count} requests, {data.last_blocked_requests} blocked\n"
+            f"   🌐 Browser memory: {data.last_browser_memory_mb:.0f}MB (peak {data.peak_browser_memory_mb:.0f}MB)\n"
+            f"   🕐 Last: {time.time() - data.last_checked:.0f}s ago | Every {data.check_interval:.0f}s | Changes: {data.change_count}"
         )
+        phase_line = format_phase_percentiles(url) or data.phase_summary
+        if phase_line:
+            status_lines.append(f"   {phase_line}")
         
         if data.last_error:
-            status_lines.append(f"   ❌ Error: {data.last_error[:40]}...")
+            status_lines.append(f"   ❌ Error ({data.last_error_class}): {data.last_error[:40]}...")
+        if data.breaker_state == BREAKER_OPEN:
+            status_lines.append(f"   ⏸️ Parked for {max(0, data.breaker_open_until - time.time()) / 60:.0f} more min")
         
         status_lines.append("")
     
@@ -988,11 +4706,37 @@ async def status(update: Update, context: ContextTypes.DEFAULT_TYPE):
     status_lines.append(f"📈 Total checks: {total_checks} | Total failures: {total_failures}")
     status_lines.append(f"📈 Overall avg response: {overall_avg:.2f}s")
     status_lines.append(f"🔄 Monitoring: {'✅ Active' if is_monitoring else '❌ Stopped'}")
+    if SHARD_ROLE == "frontend":
+        leases = shard_coordinator.lease_counts()
+        status_lines.append(
+            f"🧩 Workers: {', '.join(f'{worker}: {count}' for worker, count in sorted(leases.items())) or 'none holding leases'}"
+        )
+    status_lines.append(
+        f"📨 Notifications: {notification_queue.sent} sent, {notification_queue.depth()} queued, "
+        f"{notification_queue.failed} failed, {notification_queue.retry_after_count} rate-limited"
+    )
     status_lines.append(f"💾 Memory: {memory_mb:.1f}MB/{MEMORY_LIMIT_MB}MB ({memory_percent:.1f}%)")
     status_lines.append(f"🔄 Auto-restart: {'🟢 Ready' if memory_percent < 90 else '🟡 Soon' if memory_percent < 95 else '🔴 Imminent'}")
     
-    message = "\n".join(status_lines)[:4000]
-    await update.message.reply_text(message)
+    await reply_long(update.message, "\n".join(status_lines))
+
+def format_stored_debug(url: str, url_index: int) -> str:
+    """/debug for the frontend: the URL's last stored check result, without fetching"""
+    data = monitored_urls[url]
+    owner = shard_coordinator.lease_owner(url)
+    lines = [
+        f"🔍 Stored result for URL #{url_index + 1}:",
+        f"🧩 Checked by: {owner or 'no worker holds the lease'}",
+        f"📄 Hashes: {', '.join(f'{source} {value[:16]}...' for source, value in data.source_hashes.items()) or 'no baseline yet'}",
+        f"🧩 Quests fingerprinted: {', '.join(f'{source} {len(prints)}' for source, prints in data.source_fingerprints.items()) or 'none'}",
+        format_quest_diff(data.last_diff).rstrip(),
+        f"⚡ Avg response: {data.avg_response_time:.2f}s | Stable after: {data.avg_stable_time:.2f}s",
+        format_phase_percentiles(url) or data.phase_summary or "⏱️ No timed checks yet",
+        f"📊 Check count: {data.check_count}",
+        f"❌ Failures: {data.failures}" + (f" ({data.last_error_class}: {data.last_error[:80]})" if data.last_error else ""),
+        f"🕐 Last checked: {time.time() - data.last_checked:.0f}s ago" if data.last_checked else "🕐 Not checked yet",
+    ]
+    return "\n".join(line for line in lines if line)
 
 async def debug_url(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Debug command to see what content is being monitored for a URL"""
@@ -1002,13 +4746,20 @@ async def debug_url(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     try:
         url_index = int(context.args[0]) - 1
-        url_list = list(monitored_urls.keys())
+        url_list = chat_urls(update.effective_chat.id)
         
         if url_index < 0 or url_index >= len(url_list):
             await update.message.reply_text(f"❌ Invalid number. Use a number between 1 and {len(url_list)}")
             return
         
         url = url_list[url_index]
+        
+        if SHARD_ROLE == "frontend":
+            # No browsers in the frontend - show what the owning worker last stored
+            await sync_registry()
+            await reply_long(update.message, format_stored_debug(url, url_index))
+            return
+        
         memory_mb = get_memory_usage()
         
         if memory_mb > MEMORY_WARNING_MB:
@@ -1025,20 +4776,26 @@ async def debug_url(update: Update, context: ContextTypes.DEFAULT_TYPE):
         )
         
         # Get content in debug mode
-        loop = asyncio.get_event_loop()
-        hash_result, response_time, error, content_sample = await loop.run_in_executor(
-            None, get_content_hash_fast, url, True  # Debug mode ON
-        )
+        hash_result, response_time, error, content_sample, source = await fetch_url_content(url, True)
         
+        details = pop_fetch_details(url)
         if hash_result:
             current_data = monitored_urls[url]
+            previous_hash = current_data.previous_hash(source) or current_data.hash
+            stored_fingerprints = current_data.source_fingerprints.get(source, {})
+            quest_diff = diff_fingerprints(stored_fingerprints, details.get("fingerprints") or {}) if stored_fingerprints else {}
             memory_after = get_memory_usage()
             debug_info = [
                 f"🔍 Debug Info for URL #{url_index + 1}:",
-                f"📄 Current hash: {current_data.hash[:16]}...",
+                f"🌐 Fetched via: {source}",
+                f"📄 Current hash: {previous_hash[:16]}...",
                 f"📄 New hash: {hash_result[:16]}...",
-                f"🔄 Hashes match: {'✅ Yes' if current_data.hash == hash_result else '❌ No - CHANGE DETECTED!'}",
+                f"🔄 Hashes match: {'✅ Yes' if previous_hash == hash_result else '❌ No - CHANGE DETECTED!'}",
+                f"🧩 Quests fingerprinted: {len(details.get('fingerprints') or {})} (stored: {len(stored_fingerprints)})",
+                format_quest_diff(quest_diff).rstrip(),
                 f"⚡ Response time: {response_time:.2f}s",
+                f"⏱️ This fetch: {format_phase_times(details.get('phases', {}))}",
+                format_phase_percentiles(url) or "⏱️ No timed checks yet",
                 f"📊 Check count: {current_data.check_count}",
                 f"❌ Failures: {current_data.failures}",
                 f"🕐 Last checked: {time.time() - current_data.last_checked:.0f}s ago",
@@ -1048,10 +4805,15 @@ async def debug_url(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 f"```{content_sample[:500] if content_sample else 'No sample available'}```"
             ]
             
-            debug_message = "\n".join(debug_info)
-            await processing_msg.edit_text(debug_message[:4000])
+            debug_parts = split_message("\n".join(debug_info))
+            await processing_msg.edit_text(debug_parts[0])
+            for part in debug_parts[1:]:
+                await update.message.reply_text(part)
         else:
-            await processing_msg.edit_text(f"❌ Failed to get content: {error}")
+            await processing_msg.edit_text(
+                f"❌ Failed to get content: {error}\n"
+                f"⏱️ This fetch: {format_phase_times(details.get('phases', {}))}"
+            )
             
     except ValueError:
         await update.message.reply_text("❌ Please provide a valid number")
@@ -1060,9 +4822,193 @@ async def debug_url(update: Update, context: ContextTypes.DEFAULT_TYPE):
         print(f"❌ Full traceback: {traceback.format_exc()}")
         await update.message.reply_text(f"❌ Debug error: {str(e)}")
 
+async def normalization_rules(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Show or edit the per-URL normalization rules"""
+    usage = (
+        "❌ Usage:\n"
+        "/rules <number> - Show rules\n"
+        "/rules <number> drop <regex> - Ignore lines matching regex\n"
+        "/rules <number> scrub <regex> - Remove text matching regex\n"
+        "/rules <number> collapse - Collapse whitespace\n"
+        "/rules <number> clear - Remove all custom rules"
+    )
+    if not context.args:
+        await update.message.reply_text(usage)
+        return
+    
+    try:
+        url_index = int(context.args[0]) - 1
+        url_list = chat_urls(update.effective_chat.id)
+        
+        if url_index < 0 or url_index >= len(url_list):
+            await update.message.reply_text(f"❌ Invalid number. Use a number between 1 and {len(url_list)}")
+            return
+        
+        url = url_list[url_index]
+        url_data = monitored_urls[url]
+        action = context.args[1].lower() if len(context.args) > 1 else "show"
+        
+        if action != "show" and not can_edit_board(update.effective_chat.id, url):
+            await update.message.reply_text(
+                f"❌ {len(url_subscribers(url))} chats watch {url} - only the admin can change its rules"
+            )
+            return
+        
+        if action == "show":
+            lines = [f"🧹 Normalization rules for {url}:", "Default: timestamps, XP counters, UUIDs"]
+            for idx, rule in enumerate(url_data.normalization_rules, 1):
+                lines.append(f"{idx}. {rule['type']} {rule.get('pattern', '')}".rstrip())
+            if not url_data.normalization_rules:
+                lines.append("No custom rules")
+            await reply_long(update.message, "\n".join(lines))
+            return
+        
+        if action == "clear":
+            url_data.normalization_rules = []
+        elif action in ("drop", "scrub"):
+            pattern = " ".join(context.args[2:])
+            if not pattern:
+                await update.message.reply_text(usage)
+                return
+            rule = {"type": "drop_lines" if action == "drop" else "scrub", "pattern": pattern}
+            error = validate_normalization_rule(rule)
+            if error:
+                await update.message.reply_text(f"❌ {error}")
+                return
+            url_data.normalization_rules.append(rule)
+        elif action == "collapse":
+            url_data.normalization_rules.append({"type": "collapse_whitespace"})
+        else:
+            await update.message.reply_text(usage)
+            return
+        
+        # New rules change the hash - take a fresh baseline instead of alerting
+        url_data.reset_baseline()
+        url_data.config_revision += 1
+        save_bot_state([url], fields=("normalization_rules", "config_revision") + BASELINE_FIELDS)
+        await update.message.reply_text(
+            f"✅ Rules updated for {url}\n"
+            f"📏 Custom rules: {len(url_data.normalization_rules)}\n"
+            f"📌 Next check records a new baseline"
+        )
+        
+    except ValueError:
+        await update.message.reply_text("❌ Please provide a valid number")
+    except Exception as e:
+        print(f"⚠️ Error in normalization_rules: {str(e)}")
+        await update.message.reply_text(f"❌ Error updating rules: {str(e)}")
+
+async def resource_allowlist(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Show or edit which blocked resources a URL is allowed to load"""
+    if not context.args:
+        await update.message.reply_text(
+            "❌ Usage:\n"
+            "/allow <number> - Show allowlist\n"
+            "/allow <number> <pattern> - Allow e.g. *.svg or a full resource URL\n"
+            "/allow <number> clear - Block everything on the default list again"
+        )
+        return
+    
+    try:
+        url_index = int(context.args[0]) - 1
+        url_list = chat_urls(update.effective_chat.id)
+        
+        if url_index < 0 or url_index >= len(url_list):
+            await update.message.reply_text(f"❌ Invalid number. Use a number between 1 and {len(url_list)}")
+            return
+        
+        url = url_list[url_index]
+        url_data = monitored_urls[url]
+        
+        if len(context.args) > 1:
+            if not can_edit_board(update.effective_chat.id, url):
+                await update.message.reply_text(
+                    f"❌ {len(url_subscribers(url))} chats watch {url} - only the admin can change its allowlist"
+                )
+                return
+            if context.args[1].lower() == "clear":
+                url_data.resource_allowlist = []
+            else:
+                url_data.resource_allowlist.append(context.args[1])
+            url_data.config_revision += 1
+            save_bot_state([url], fields=("resource_allowlist", "config_revision"))
+        
+        blocked = get_blocked_url_patterns(url)
+        await update.message.reply_text(
+            f"🚦 Resource rules for {url}\n"
+            f"✅ Allowed: {', '.join(url_data.resource_allowlist) or 'none'}\n"
+            f"⛔ Blocking {len(blocked)}/{len(DEFAULT_BLOCKED_URL_PATTERNS)} default patterns"
+            f"{'' if RESOURCE_BLOCKING_ENABLED else ' (blocking disabled)'}"
+        )
+        
+    except ValueError:
+        await update.message.reply_text("❌ Please provide a valid number")
+    except Exception as e:
+        print(f"⚠️ Error in resource_allowlist: {str(e)}")
+        await update.message.reply_text(f"❌ Error updating allowlist: {str(e)}")
+
+async def chat_settings_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Show or change this chat's notification settings"""
+    chat_id = update.effective_chat.id
+    settings = get_chat_settings(chat_id)
+    usage = (
+        "❌ Usage:\n"
+        "/settings - Show settings\n"
+        "/settings changes on|off - Change alerts\n"
+        "/settings status on|off - Paused/recovered notices\n"
+        "/settings interval <seconds> - Min time between alerts for one URL"
+    )
+    
+    try:
+        if context.args:
+            key = context.args[0].lower()
+            value = context.args[1].lower() if len(context.args) > 1 else ""
+            if key in ("changes", "status") and value in ("on", "off"):
+                setattr(settings, "notify_changes" if key == "changes" else "notify_status", value == "on")
+            elif key == "interval" and value:
+                settings.min_notify_interval = max(0, int(value))
+            else:
+                await update.message.reply_text(usage)
+                return
+            save_bot_state(chats=[chat_id])
+        
+        await update.message.reply_text(
+            f"⚙️ Settings for this chat:\n"
+            f"🚨 Change alerts: {'on' if settings.notify_changes else 'off'}\n"
+            f"⏸️ Status notices: {'on' if settings.notify_status else 'off'}\n"
+            f"⏱️ Min alert interval: {settings.min_notify_interval}s\n"
+            f"📊 URLs: {len(chat_urls(chat_id))}/{settings.max_urls}"
+        )
+    except ValueError:
+        await update.message.reply_text("❌ Please provide a valid number")
+
+async def set_quota(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Admin: let a chat use the bot and set how many URLs it may watch"""
+    if not await require_admin(update):
+        return
+    
+    if len(context.args) < 2:
+        await update.message.reply_text("❌ Usage: /quota <chat_id> <max_urls>")
+        return
+    
+    try:
+        chat_id = int(context.args[0])
+        max_urls = max(0, int(context.args[1]))
+        get_chat_settings(chat_id).max_urls = max_urls
+        save_bot_state(chats=[chat_id])
+        await update.message.reply_text(
+            f"✅ Chat {chat_id} may now watch {max_urls} URLs "
+            f"(currently {len(chat_urls(chat_id))})"
+        )
+    except ValueError:
+        await update.message.reply_text("❌ Please provide a valid number")
+
 async def run_monitoring(update: Update, context: ContextTypes.DEFAULT_TYPE):
     global is_monitoring
     
+    if not await require_admin(update):
+        return
+    
     if is_monitoring:
         await update.message.reply_text("⚠️ Already monitoring")
         return
@@ -1071,6 +5017,14 @@ async def run_monitoring(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text("❌ No URLs to monitor")
         return
     
+    # A loop that is still winding down after /stop would dispatch the same URLs as a new one
+    if not await wait_for_monitor_task(context.application):
+        await update.message.reply_text("⏳ The previous monitoring loop is still stopping - try /run again in a moment")
+        return
+    if is_monitoring:  # Another /run got in while we waited
+        await update.message.reply_text("⚠️ Already monitoring")
+        return
+    
     memory_mb = get_memory_usage()
     if memory_mb > MEMORY_CRITICAL_MB:  # Don't start monitoring if memory too high
         await update.message.reply_text(
@@ -1079,20 +5033,29 @@ async def run_monitoring(update: Update, context: ContextTypes.DEFAULT_TYPE):
         )
         return
     
+    if SHARD_ROLE == "frontend":
+        # Workers follow the shared is_monitoring flag
+        is_monitoring = True
+        save_bot_state(immediate=True)
+        await send_notification(context.bot, "🔔 Monitoring started with memory management!")
+        await update.message.reply_text(
+            f"✅ Monitoring started on {len(shard_coordinator.lease_counts())} worker(s)\n"
+            f"🔍 {len(monitored_urls)} URLs, spread by consistent hashing"
+        )
+        return
+    
     try:
         is_monitoring = True
         
-        # Start memory monitor task
-        memory_task = asyncio.create_task(memory_monitor())
-        context.chat_data['memory_task'] = memory_task
+        # Start the (single) memory pressure watcher
+        start_memory_watcher(context.application.bot)
         
         # Start monitoring task
-        monitor_task = asyncio.create_task(start_monitoring(context.application.bot))
-        context.chat_data['monitor_task'] = monitor_task
+        start_monitor_task(context.application)
         
         await update.message.reply_text(
             f"✅ Monitoring started with memory management!\n"
-            f"🔍 Checking {len(monitored_urls)} URLs every {CHECK_INTERVAL}s\n"
+            f"🔍 Checking {len(monitored_urls)} URLs every {MIN_CHECK_INTERVAL}-{MAX_CHECK_INTERVAL}s (adapts per URL)\n"
             f"💾 Memory alert: {MEMORY_LIMIT_MB}MB (current: {memory_mb:.1f}MB)\n"
             f"🔄 Auto-restart after Render restarts\n"
             f"💾 State auto-saved after each cycle"
@@ -1106,28 +5069,35 @@ async def run_monitoring(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 async def stop_monitoring(update: Update, context: ContextTypes.DEFAULT_TYPE):
     global is_monitoring
+    
+    if not await require_admin(update):
+        return
+    
     is_monitoring = False
     
-    # Cancel monitoring task
-    if 'monitor_task' in context.chat_data:
-        try:
-            context.chat_data['monitor_task'].cancel()
-            del context.chat_data['monitor_task']
-            print("🛑 Monitor task cancelled")
-        except Exception as e:
-            print(f"⚠️ Error cancelling monitor task: {str(e)}")
+    if SHARD_ROLE == "frontend":
+        save_bot_state(immediate=True)
+        await send_notification(context.bot, "🔴 Monitoring stopped!")
+        await update.message.reply_text("🛑 Monitoring stopped on all workers\n💾 State saved")
+        return
     
-    # Cancel memory monitor task
-    if 'memory_task' in context.chat_data:
-        try:
-            context.chat_data['memory_task'].cancel()
-            del context.chat_data['memory_task']
-            print("🛑 Memory monitor task cancelled")
-        except Exception as e:
-            print(f"⚠️ Error cancelling memory task: {str(e)}")
+    # Cancel the monitoring loop (from /run or auto-start) and wait for its cleanup
+    if await wait_for_monitor_task(context.application, cancel=True):
+        print("🛑 Monitor task cancelled")
+    else:
+        print(f"⚠️ Monitor task still stopping after {MONITOR_STOP_TIMEOUT}s")
+    
+    # Stop the memory pressure watcher
+    memory_pressure_watcher.stop()
+    print("🛑 Memory pressure watcher stopped")
     
     # Save state when stopping
-    save_bot_state()
+    save_bot_state(immediate=True)
+    
+    # Warm Chrome sessions and HTTP connections are not needed while monitoring is off
+    await asyncio.get_running_loop().run_in_executor(None, driver_pool.close_idle)
+    await cdp_fetcher.close_idle()
+    await http_fetcher.close()
     
     memory_mb = get_memory_usage()
     await update.message.reply_text(
@@ -1137,12 +5107,14 @@ async def stop_monitoring(update: Update, context: ContextTypes.DEFAULT_TYPE):
     )
 
 async def purge_urls(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    global monitored_urls
-    count = len(monitored_urls)
-    monitored_urls.clear()
+    chat_id = update.effective_chat.id
+    purged = chat_urls(chat_id)
+    count = len(purged)
+    for url in purged:
+        unsubscribe(chat_id, url)
     
     # Save state after purging
-    save_bot_state()
+    save_bot_state(purged, chats=[chat_id], immediate=True)
     
     memory_mb = get_memory_usage()
     await update.message.reply_text(
@@ -1151,49 +5123,412 @@ async def purge_urls(update: Update, context: ContextTypes.DEFAULT_TYPE):
     )
 
 async def start_monitoring(bot):
-    """Main monitoring loop with detailed logging and memory management"""
-    global is_monitoring
-    await send_notification(bot, "🔔 Monitoring started with memory management!")
+    """Main monitoring loop - dispatches each URL when it falls due, within memory-aware limits"""
+    # Workers all run this loop - the frontend announces the sharded start once
+    if SHARD_ROLE != "worker":
+        await send_notification(bot, "🔔 Monitoring started with memory management!")
     print("🔍 Entering monitoring loop with memory management")
     
-    cycle_count = 0
-    
+    in_flight: Dict[asyncio.Task, List[str]] = {}
+    try:
+        await monitoring_loop(bot, in_flight)
+    finally:
+        # Runs on cancellation too, so /run never starts a loop while this one still holds URLs
+        for task in in_flight:
+            task.cancel()
+        if in_flight:
+            await asyncio.wait(list(in_flight))
+        # Unchecked URLs are re-queued from their saved due times next start
+        for url in list(monitored_urls):
+            due_queue.remove(url)
+        save_bot_state(immediate=True)
+        
+        print("👋 Exiting monitoring loop")
+        if SHARD_ROLE != "worker":
+            await send_notification(bot, "🔴 Monitoring stopped!")
+
+async def monitoring_loop(bot, in_flight: Dict[asyncio.Task, List[str]]):
+    """start_monitoring's scheduler loop; runs until is_monitoring is cleared or it is cancelled"""
     while is_monitoring:
         try:
-            cycle_count += 1
-            memory_mb = get_memory_usage()
-            print(f"\n🔄 Starting monitoring cycle #{cycle_count}")
-            print(f"🔄 Checking {len(monitored_urls)} URLs | Memory: {memory_mb:.1f}MB")
-            start_time = time.time()
+            now = time.time()
             
-            await check_urls_sequential(bot)
+            # Pick up newly added URLs and restore due times after a restart
+            busy = {url for unit in in_flight.values() for url in unit}
+            for url, url_data in monitored_urls.items():
+                if url not in due_queue and url not in busy and shard_owns(url):
+                    due_queue.schedule(url, url_data.next_check_due or now)
             
-            elapsed = time.time() - start_time
-            wait_time = max(CHECK_INTERVAL - elapsed, 5)  # Minimum 5 second wait
+            # Collect finished checks
+            for task in [task for task in in_flight if task.done()]:
+                unit = in_flight.pop(task)
+                if not task.cancelled() and task.exception():
+                    print(f"⚠️ Check task for {unit} failed: {task.exception()}")
             
-            memory_after = get_memory_usage()
-            print(f"✓ Cycle #{cycle_count} complete in {elapsed:.2f}s")
-            print(f"💾 Memory: {memory_after:.1f}MB/{MEMORY_LIMIT_MB}MB, waiting {wait_time:.2f}s")
+            # Every dispatched check has finished - send this cycle's changes as one digest
+            if not in_flight:
+                notification_queue.flush_digest()
+            
+            # Parked URLs come back when their breaker cooldown ends
+            due_urls = []
+            for url in due_queue.pop_due(now):
+                url_data = monitored_urls.get(url)
+                if url_data is None or not shard_owns(url):
+                    continue
+                if url_data.breaker_allows(now):
+                    due_urls.append(url)
+                else:
+                    due_queue.schedule(url, url_data.breaker_open_until)
+            
+            unit_size = MAX_TABS_PER_BROWSER if FETCH_MODE == "multitab" else 1
+            units = [due_urls[i:i + unit_size] for i in range(0, len(due_urls), unit_size)]
+            if units:
+                print(f"\n🔄 {len(due_urls)} URLs due | {len(in_flight)} units in flight | Memory: {get_memory_usage():.1f}MB")
+            
+            for idx, unit in enumerate(units):
+                if not await concurrency_limiter.acquire():
+                    print(f"🚨 CRITICAL MEMORY during URL checks: {get_memory_usage():.1f}MB")
+                    save_bot_state(immediate=True)  # Save before potential crash
+                    print("🚨 Holding new checks to prevent crash!")
+                    for deferred in units[idx:]:
+                        for url in deferred:
+                            due_queue.schedule(url, time.time() + MIN_CHECK_INTERVAL)
+                    break
+                
+                memory_mb = get_memory_usage()
+                if memory_mb > MEMORY_WARNING_MB:  # 450MB
+                    print(f"⚠️ HIGH MEMORY during URL check: {memory_mb:.1f}MB - saving state...")
+                    save_bot_state(immediate=True)  # Save state frequently when memory is high
+                    # Safe only when no other check has a browser open
+                    cleanup = cleanup_memory if concurrency_limiter.active <= 1 else light_cleanup
+                    await asyncio.get_running_loop().run_in_executor(None, cleanup)
+                
+                in_flight[asyncio.create_task(run_check_unit(bot, unit))] = unit
             
+            # Sleep until the next URL is due, waking regularly to collect finished checks
+            next_due = due_queue.next_due()
+            wait_time = SCHEDULER_TICK if next_due is None else min(max(next_due - time.time(), 0.1), SCHEDULER_TICK)
             await asyncio.sleep(wait_time)
             
         except asyncio.CancelledError:
             print("🚫 Monitoring task was cancelled")
-            break
+            raise
         except Exception as e:
-            print(f"🚨 Monitoring error in cycle #{cycle_count}: {str(e)}")
+            print(f"🚨 Monitoring error: {str(e)}")
             print(f"🚨 Full traceback: {traceback.format_exc()}")
             await send_notification(bot, f"⚠️ Monitoring error: {str(e)[:100]}...")
             print("⏳ Waiting 30 seconds before retry...")
             await asyncio.sleep(30)
+
+def start_monitor_task(application):
+    """Start the monitoring loop. /run and auto-start share this one handle, which /stop cancels"""
+    application.bot_data['monitor_task'] = asyncio.create_task(start_monitoring(application.bot))
+
+async def wait_for_monitor_task(application, cancel: bool = False, timeout: float = MONITOR_STOP_TIMEOUT) -> bool:
+    """Wait for the monitoring loop to finish (cancelling it first if asked). True once none is running"""
+    task = application.bot_data.get('monitor_task')
+    if task is None:
+        return True
+    if cancel:
+        task.cancel()
+    if not task.done():
+        await asyncio.wait([task], timeout=timeout)
+    if not task.done():
+        return False
+    if application.bot_data.get('monitor_task') is task:
+        del application.bot_data['monitor_task']
+    return True
+
+# SHARDING
+class HashRing:
+    """Consistent-hash ring: adding or removing a worker only moves that worker's share of URLs"""
     
-    print("👋 Exiting monitoring loop")
-    await send_notification(bot, "🔴 Monitoring stopped!")
+    def __init__(self, nodes: List[str], vnodes: int = SHARD_VNODES):
+        self._points = sorted(
+            (self._hash(f"{node}#{i}"), node) for node in nodes for i in range(vnodes)
+        )
+        self._keys = [point for point, _ in self._points]
+    
+    @staticmethod
+    def _hash(key: str) -> int:
+        return int(hashlib.md5(key.encode()).hexdigest()[:16], 16)
+    
+    def owner(self, key: str) -> Optional[str]:
+        if not self._points:
+            return None
+        idx = bisect.bisect(self._keys, self._hash(key)) % len(self._points)
+        return self._points[idx][1]
+
+class ShardCoordinator:
+    """Lease table, heartbeats and notification outbox shared through the state database.
+    
+    Every worker heartbeats into shard_workers and builds the same hash ring
+    from the workers seen within SHARD_LEASE_TTL. A worker checks a URL only
+    while it holds that URL's lease: it claims leases the ring assigns to it
+    once they are free or expired, renews them on every heartbeat and drops
+    the ones the ring has moved elsewhere. A dead worker's leases simply
+    expire. Workers cannot reach Telegram, so their notifications go through
+    the outbox table, which the frontend relays.
+    """
+    
+    def __init__(self, path: str, worker_id: str):
+        self.path = path
+        self.worker_id = worker_id
+        self.owned: set = set()
+        self.live_workers: List[str] = []
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+    
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=10)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS shard_workers (worker_id TEXT PRIMARY KEY, heartbeat REAL NOT NULL, pid INTEGER, host TEXT)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS url_leases (url TEXT PRIMARY KEY, worker_id TEXT NOT NULL, expires REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS outbox (id INTEGER PRIMARY KEY AUTOINCREMENT, chat_id INTEGER, "
+                "text TEXT NOT NULL, priority INTEGER NOT NULL, digest INTEGER NOT NULL, created REAL NOT NULL)"
+            )
+            self._conn.commit()
+        return self._conn
+    
+    def heartbeat_and_rebalance(self, urls: List[str]) -> Tuple[set, set]:
+        """Heartbeat, then claim/renew/release leases. Returns (gained, lost) URLs"""
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO shard_workers (worker_id, heartbeat, pid, host) VALUES (?, ?, ?, ?)",
+                    (self.worker_id, now, os.getpid(), socket.gethostname())
+                )
+            self.live_workers = [
+                row[0] for row in conn.execute(
+                    "SELECT worker_id FROM shard_workers WHERE heartbeat > ? ORDER BY worker_id", (now - SHARD_LEASE_TTL,)
+                )
+            ]
+            ring = HashRing(self.live_workers)
+            mine = [url for url in urls if ring.owner(url) == self.worker_id]
+            others = [url for url in self.owned if url not in mine]
+            
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                # Claim free or expired leases, renew our own
+                conn.executemany(
+                    "INSERT INTO url_leases (url, worker_id, expires) VALUES (?, ?, ?) "
+                    "ON CONFLICT(url) DO UPDATE SET worker_id = excluded.worker_id, expires = excluded.expires "
+                    "WHERE url_leases.worker_id = excluded.worker_id OR url_leases.expires < ?",
+                    [(url, self.worker_id, now + SHARD_LEASE_TTL, now) for url in mine]
+                )
+                # Hand back URLs the ring moved to another worker (or that were removed)
+                conn.executemany(
+                    "DELETE FROM url_leases WHERE url = ? AND worker_id = ?", [(url, self.worker_id) for url in others]
+                )
+                held = {
+                    row[0] for row in conn.execute("SELECT url FROM url_leases WHERE worker_id = ?", (self.worker_id,))
+                }
+        
+        gained, lost = held - self.owned, self.owned - held
+        self.owned = held
+        return gained, lost
+    
+    def leave(self):
+        """Release everything so other workers take over without waiting for the TTL"""
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute("DELETE FROM url_leases WHERE worker_id = ?", (self.worker_id,))
+                conn.execute("DELETE FROM shard_workers WHERE worker_id = ?", (self.worker_id,))
+        self.owned = set()
+    
+    def post_notification(self, text: str, chat_id: Optional[int], priority: bool, digest: bool):
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    "INSERT INTO outbox (chat_id, text, priority, digest, created) VALUES (?, ?, ?, ?, ?)",
+                    (chat_id, text, int(priority), int(digest), time.time())
+                )
+    
+    def take_notifications(self, limit: int = 100) -> List[Tuple]:
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                rows = conn.execute(
+                    "SELECT id, chat_id, text, priority, digest FROM outbox ORDER BY id LIMIT ?", (limit,)
+                ).fetchall()
+                if rows:
+                    conn.execute("DELETE FROM outbox WHERE id <= ?", (rows[-1][0],))
+        return rows
+    
+    def lease_counts(self) -> Dict[str, int]:
+        with self._lock:
+            conn = self._connect()
+            return dict(conn.execute(
+                "SELECT worker_id, COUNT(*) FROM url_leases WHERE expires > ? GROUP BY worker_id", (time.time(),)
+            ).fetchall())
+    
+    def lease_owner(self, url: str) -> Optional[str]:
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT worker_id FROM url_leases WHERE url = ? AND expires > ?", (url, time.time())
+            ).fetchone()
+            return row[0] if row else None
+
+shard_coordinator = ShardCoordinator(STATE_DB_FILE, WORKER_ID)
+
+def shard_owns(url: str) -> bool:
+    """Whether this process should check url - always, unless it is a worker without the lease"""
+    return SHARD_ROLE != "worker" or url in shard_coordinator.owned
+
+async def sync_registry():
+    """Merge the shared registry written by other processes into this one's view"""
+    loop = asyncio.get_running_loop()
+    urls, meta, chats = await loop.run_in_executor(state_store._writer, state_store.load)
+    known_fields = set(URLData.__dataclass_fields__)
+    
+    for url, url_data_dict in urls.items():
+        row = URLData(**{k: v for k, v in url_data_dict.items() if k in known_fields})
+        local = monitored_urls.get(url)
+        if local is None:
+            if SHARD_ROLE == "worker":
+                monitored_urls[url] = row
+                selector_resolver.remember(url, row.preferred_selector)
+        elif row.config_revision > local.config_revision or (
+            row.config_revision == local.config_revision and not (SHARD_ROLE == "worker" and url in shard_coordinator.owned)
+        ):
+            # Newer user edits always win; otherwise the URL's owner keeps its own results
+            monitored_urls[url] = row
+    
+    if SHARD_ROLE == "worker":
+        for url in [url for url in monitored_urls if url not in urls]:
+            monitored_urls.pop(url, None)
+            due_queue.remove(url)
+            metrics.forget_url(url)
+            phase_timings.forget(url)
+        # Keep our own rate-limit bookkeeping, take everything else from the frontend
+        for chat_id, chat in chats.items():
+            local_subs = subscriptions.get(chat_id, {})
+            chat_settings[chat_id] = ChatSettings(**chat.get("settings", {}))
+            subscriptions[chat_id] = {}
+            for url, sub in chat.get("subscriptions", {}).items():
+                subscription = Subscription(**sub)
+                if url in local_subs:
+                    subscription.last_notified = max(subscription.last_notified, local_subs[url].last_notified)
+                subscriptions[chat_id][url] = subscription
+        for chat_id in [chat_id for chat_id in chat_settings if chat_id not in chats]:
+            chat_settings.pop(chat_id, None)
+            subscriptions.pop(chat_id, None)
+    return meta
+
+async def relay_worker_notifications(bot):
+    """Frontend: deliver what the workers put in the outbox"""
+    loop = asyncio.get_running_loop()
+    while True:
+        try:
+            rows = await loop.run_in_executor(None, shard_coordinator.take_notifications)
+            for _, chat_id, text, priority, digest in rows:
+                notification_queue.start(bot)
+                notification_queue.put(text, chat_id=chat_id, priority=bool(priority), digest=bool(digest))
+            if not rows:
+                await asyncio.sleep(OUTBOX_POLL_INTERVAL)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"⚠️ Error relaying worker notifications: {e}")
+            await asyncio.sleep(OUTBOX_POLL_INTERVAL)
+
+async def sync_frontend_registry():
+    """Frontend: keep /status and /list current with the workers' check results"""
+    while True:
+        try:
+            await asyncio.sleep(SHARD_SYNC_INTERVAL)
+            await sync_registry()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"⚠️ Error syncing registry: {e}")
+
+async def run_worker():
+    """Worker: hold leases for this worker's share of URLs and check them while monitoring is on"""
+    global is_monitoring
+    loop = asyncio.get_running_loop()
+    monitor_task = None
+    last_sync = 0.0
+    print(f"🧩 Worker {WORKER_ID} joining shard group in {STATE_DB_FILE}")
+    start_memory_watcher(None)
+    metrics_tasks = await start_metrics_server()
+    
+    try:
+        while True:
+            try:
+                if time.time() - last_sync >= SHARD_SYNC_INTERVAL:
+                    meta = await sync_registry()
+                    last_sync = time.time()
+                    wanted = bool(meta.get("is_monitoring", False))
+                    if wanted and not is_monitoring:
+                        is_monitoring = True
+                        monitor_task = asyncio.create_task(start_monitoring(None))
+                    elif not wanted and is_monitoring:
+                        is_monitoring = False
+                        # Finish the old loop before a later start can begin a second one
+                        if monitor_task:
+                            monitor_task.cancel()
+                            await asyncio.wait([monitor_task])
+                            monitor_task = None
+                
+                gained, lost = await loop.run_in_executor(
+                    None, shard_coordinator.heartbeat_and_rebalance, list(monitored_urls)
+                )
+                if gained or lost:
+                    print(f"🧩 Rebalanced: +{len(gained)} -{len(lost)} URLs, own {len(shard_coordinator.owned)} "
+                          f"of {len(monitored_urls)} across {len(shard_coordinator.live_workers)} workers")
+                for url in lost:
+                    due_queue.remove(url)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️ Worker heartbeat error: {e}")
+            await asyncio.sleep(SHARD_HEARTBEAT_INTERVAL)
+    finally:
+        is_monitoring = False
+        if monitor_task:
+            monitor_task.cancel()
+        for task in metrics_tasks:
+            task.cancel()
+        await stop_metrics_server()
+        await state_store.flush_async()
+        shard_coordinator.leave()
+        print(f"👋 Worker {WORKER_ID} left the shard group")
+
+def worker_main():
+    """Entry point for ZEALY_ROLE=worker - no Telegram, just checks"""
+    if not validate_environment():
+        exit_with_error()
+    load_bot_state()
+    kill_previous_instances()
+    if FETCH_BACKEND != "cdp":
+        start_browser_setup()
+    try:
+        asyncio.run(run_worker())
+    except KeyboardInterrupt:
+        print("\n🛑 Worker shutdown requested")
+    finally:
+        driver_pool.close_idle()
+        fetch_process_pool.close()
+        cdp_fetcher.kill()
 
 def main():
     """Main function with comprehensive setup and memory management"""
+    if not validate_environment():
+        exit_with_error()
     try:
-        global CHROME_PATH, CHROMEDRIVER_PATH
+        global CHROME_PATH
         
         print(f"🚀 Starting bot at {datetime.now()}")
         print(f"🌍 Operating System: {platform.system()}")
@@ -1205,6 +5540,8 @@ def main():
         print(f"⚙️ Memory critical: {MEMORY_CRITICAL_MB}MB") 
         print(f"⚙️ Memory check interval: {MEMORY_CHECK_INTERVAL}s")
         print(f"⚙️ Auto-restart enabled for Render")
+        if snapshot_recorder.enabled:
+            print(f"📸 Saving page snapshots to {SNAPSHOT_DIR} (artifact: {SNAPSHOT_ARTIFACT})")
         
         # Load previous state
         should_auto_restart = load_bot_state()
@@ -1212,6 +5549,12 @@ def main():
         # Kill previous instances
         kill_previous_instances()
         
+        # Browser and HTTP stacks load while Telegram starts - the frontend never fetches
+        if SHARD_ROLE != "frontend":
+            if FETCH_BACKEND != "cdp":  # The CDP backend needs neither Selenium nor chromedriver
+                start_browser_setup()
+            preload_in_background("http")
+        
         # Show initial memory usage
         initial_memory = get_memory_usage()
         print(f"📊 Initial memory usage: {initial_memory:.1f}MB")
@@ -1231,26 +5574,50 @@ def main():
                         print(f"✅ Found Chrome at: {path}")
                         CHROME_PATH = path
                         break
-            
-            # Try to find ChromeDriver if not at expected path
-            if not os.path.exists(CHROMEDRIVER_PATH):
-                chromedriver_in_path = shutil.which('chromedriver')
-                if chromedriver_in_path:
-                    print(f"✅ Found Chromedriver in PATH: {chromedriver_in_path}")
-                    CHROMEDRIVER_PATH = chromedriver_in_path
         
         # Set event loop policy for Windows
         if sys.platform == "win32":
             asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
 
+        require("telegram")
         print("🔧 Creating Telegram application...")
         print(f"🤖 Bot token (first 10 chars): {TELEGRAM_BOT_TOKEN[:10]}...")
         print(f"💬 Target chat ID: {CHAT_ID}")
         
+        async def post_init(application):
+            print(f"⏱️ First poll ready {startup_elapsed():.2f}s after process start")
+            application.bot_data['metrics_tasks'] = await start_metrics_server()
+            if SHARD_ROLE == "frontend":
+                # Keep references so the tasks are not garbage collected
+                application.bot_data['shard_tasks'] = [
+                    asyncio.create_task(relay_worker_notifications(application.bot)),
+                    asyncio.create_task(sync_frontend_registry()),
+                ]
+                print("🧩 Frontend mode - checks run in ZEALY_ROLE=worker processes")
+            
+            # Auto-start monitoring if needed (after a delay to let bot fully start)
+            if should_auto_restart:
+                print("⏳ Scheduling auto-start monitoring in 5 seconds...")
+                async def delayed_auto_start():
+                    await asyncio.sleep(5)  # Wait for bot to fully initialize
+                    await auto_start_monitoring(application)
+                
+                # Schedule the auto-start
+                application.bot_data['auto_start_task'] = asyncio.create_task(delayed_auto_start())
+        
+        async def post_stop(application):
+            # Polling has stopped but the bot is still initialized - deliver held digests
+            # and queued alerts before shutdown closes its HTTP session
+            await notification_queue.drain(timeout=SHUTDOWN_DRAIN_TIMEOUT)
+            notification_queue.stop()
+        
         # Create Telegram application
         application = (
             Application.builder()
             .token(TELEGRAM_BOT_TOKEN)
+            .base_url(TELEGRAM_API_BASE_URL)
+            .post_init(post_init)
+            .post_stop(post_stop)
             .concurrent_updates(True)
             .read_timeout(30)
             .write_timeout(30)
@@ -1275,6 +5642,10 @@ def main():
             CommandHandler("purge", purge_urls),
             CommandHandler("status", status),
             CommandHandler("debug", debug_url),
+            CommandHandler("rules", normalization_rules),
+            CommandHandler("allow", resource_allowlist),
+            CommandHandler("settings", chat_settings_command),
+            CommandHandler("quota", set_quota),
             CommandHandler("memory", memory_status)  # New memory command
         ]
         
@@ -1288,16 +5659,6 @@ def main():
         print("✅ Bot is ready! Send /start to test.")
         print(f"⚙️ MEMORY-MANAGED MODE: Alert at {MEMORY_LIMIT_MB}MB!")
         
-        # Auto-start monitoring if needed (after a delay to let bot fully start)
-        if should_auto_restart:
-            print("⏳ Scheduling auto-start monitoring in 5 seconds...")
-            async def delayed_auto_start():
-                await asyncio.sleep(5)  # Wait for bot to fully initialize
-                await auto_start_monitoring(application)
-            
-            # Schedule the auto-start
-            asyncio.create_task(delayed_auto_start())
-        
         # Start polling with proper cleanup and generous timeouts
         application.run_polling(
             drop_pending_updates=True,
@@ -1317,12 +5678,24 @@ def main():
         if not IS_RENDER:
             input("Press Enter to exit...")
     finally:
+        # run_polling handles SIGTERM/SIGINT itself and returns normally, so this is the
+        # one place a Render redeploy passes through - write what the debounce still holds
+        try:
+            state_store.flush()
+        except Exception as e:
+            print(f"❌ Error saving bot state: {e}")
+        driver_pool.close_idle()
+        fetch_process_pool.close()
+        cdp_fetcher.kill()
         print("🧹 Cleanup complete")
 
 if __name__ == "__main__":
     print("🚀 Starting Zealy monitoring bot with memory management...")
     try:
-        main()
+        if SHARD_ROLE == "worker":
+            worker_main()
+        else:
+            main()
     except Exception as e:
         print(f"❌ CRITICAL ERROR in __main__: {str(e)}")
         print(f"❌ Full traceback: {traceback.format_exc()}")